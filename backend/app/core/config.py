@@ -5,7 +5,7 @@
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -56,6 +56,8 @@ class Settings(BaseSettings):
     DEEPSEEK_CACHE_DIR: str = "data/deepseek_cache"
     DEEPSEEK_CACHE_MAX_SIZE_MB: int = 500
     DEEPSEEK_CACHE_TTL_HOURS: int = 168  # 7天
+    DEEPSEEK_CACHE_MEMORY_MB: int = 32  # 每个进程内存缓存的大小上限
+    DEEPSEEK_CACHE_LEASE_SECONDS: int = 600  # 同一内容只由一个进程请求 API，其他进程最多等待的秒数
     
     # DeepSeek 重试配置
     DEEPSEEK_RETRY_MAX_RETRIES: int = 3
@@ -68,12 +70,63 @@ class Settings(BaseSettings):
     DEEPSEEK_CIRCUIT_RECOVERY_TIMEOUT: int = 60
     DEEPSEEK_REQUEST_TIMEOUT: int = 60
     
+    # DeepSeek 连接池配置（每个进程一个共享的异步客户端）
+    DEEPSEEK_MAX_CONCURRENCY: int = 32  # 同时在途的请求数（也是连接数上限）
+    DEEPSEEK_MAX_KEEPALIVE: int = 16  # 保持的空闲连接数
+    DEEPSEEK_KEEPALIVE_EXPIRY: float = 30.0  # 空闲连接保持时间（秒）
+    
+    # DeepSeek 限流配置（本机各进程通过 SQLite 文件共享额度）
+    DEEPSEEK_RATE_LIMIT_ENABLED: bool = True
+    DEEPSEEK_RATE_LIMIT_DB: str = "data/llm_rate_limit.db"
+    DEEPSEEK_RPM_LIMIT: int = 120  # 每分钟请求数
+    DEEPSEEK_TPM_LIMIT: int = 300000  # 每分钟 token 数（请求前按估算值预扣，完成后按实际用量校正）
+    DEEPSEEK_MIN_CONCURRENCY: int = 1  # 自适应并发上限的下限（上限为 DEEPSEEK_MAX_CONCURRENCY）
+    DEEPSEEK_LATENCY_TARGET_SECONDS: float = 30.0  # 请求耗时超过该值时减小并发上限
+    
     # 文件扫描配置
     SCAN_PATH: str = r"D:\zyfdownloadanalysis"
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
+    SCAN_WORKERS: int = 4  # 并发列举目录的线程数（网络共享盘可适当调大）
+    SCAN_BATCH_SIZE: int = 1000  # 扫描结果批量写入数据库的每批行数
+    SCAN_FINGERPRINT_ENABLED: bool = True  # 扫描时计算文档内容指纹，用于识别重复文件
+    SCAN_MIME_CHECK_ENABLED: bool = True  # 扫描时嗅探文件头，内容与扩展名不符的文档不进入解析队列
+    SCAN_CHECKPOINT_DIR: str = "./data/scan_checkpoints"  # 扫描检查点目录（中断后可从检查点继续）
+    SCAN_CHECKPOINT_INTERVAL: float = 30.0  # 保存检查点的间隔（秒）
+    # 扫描过滤规则（gitignore 语法，被排除的文件夹整棵子树都不会遍历）
+    SCAN_EXCLUDE_PATTERNS: List[str] = [".*", "~$*", "node_modules/", "__pycache__/"]
+    SCAN_INCLUDE_PATTERNS: List[str] = []  # 非空时只记录命中的文件
+    SCAN_IGNORE_FILE: str = ".scanignore"  # 扫描根目录下的额外排除规则文件
+    SCAN_MAX_DEPTH: int = 20  # 最大遍历深度
+    SCAN_MIN_FILE_SIZE: int = 0  # 小于该大小的文件不记录
+    SCAN_MAX_FILE_SIZE: int = 0  # 大于该大小的文件不记录（0 表示不限制）
+    SCAN_MAX_FILES_PER_DIR: int = 0  # 每个目录最多记录的文件数（0 表示不限制）
+    
+    # 文档解析引擎配置
+    PARSE_PROCESS_POOL_ENABLED: bool = True  # 在进程池中提取文档内容（Celery prefork 工作进程内自动退回线程内执行）
+    PARSE_WORKERS: int = 0  # 解析工作进程数（0 表示按 CPU 核数）
+    PARSE_TIMEOUT_SECONDS: float = 300.0  # 单个文档的内容提取超时（0 表示不限制）
+    PARSE_LIGHT_MAX_BYTES: int = 2 * 1024 * 1024  # 纯文本类文档在调用线程内提取的大小上限，更大的文件交给进程池（0 表示不限制）
+    PARSE_ANALYSIS_CHARS: int = 4000  # 送入 DeepSeek 分析的文本长度
+    PARSE_STORAGE_CHARS: int = 10000  # 入库保存的全文长度
+    PARSE_BLOB_CODEC: str = "zstd"  # 全文和原始响应的压缩算法：zstd（未安装 zstandard 时回退）/ zlib
+    PARSE_FULL_EXTRACTION: bool = False  # 提取全文（默认文本满足分析和入库长度后即停止）
+    PARSE_ANALYSIS_CHUNKED: bool = False  # 分块分析全文（默认只分析开头 PARSE_ANALYSIS_CHARS 个字符）
+    PARSE_ANALYSIS_CHUNK_TOKENS: int = 3000  # 分块分析时每块的 token 预算
+    PARSE_ANALYSIS_MAX_CHUNKS: int = 8  # 每个文档最多分析的块数（超出时在全文范围内均匀抽取）
+    PARSE_ANALYSIS_CONCURRENCY: int = 4  # 单个文档分块分析的并发请求数
+    PARSE_DEFAULT_PROFILE: str = "standard"  # 默认解析档位：fast（仅文本）/ standard（保留结构）/ full（含表格和版面，读取全文）
+    PARSE_PROFILE_BY_EXTENSION: Dict[str, str] = {}  # 按扩展名指定解析档位，如 {".txt": "fast"}
+    PARSE_PDF_BACKENDS: List[str] = ["pypdfium2", "pymupdf", "pypdf2", "pdfplumber"]  # PDF 文本后端尝试顺序（未安装的自动跳过；需要表格/版面时 pdfplumber 优先）
+    PARSE_PDF_PROBE_PAGES: int = 3  # 检查前几页判断是否为纯图片 PDF（0 表示不检查）
+    
+    # 文件监听配置（start_watcher.py）
+    WATCH_DEBOUNCE_SECONDS: float = 2.0  # 最后一个事件后等待的静默时间
+    WATCH_MAX_DELAY_SECONDS: float = 30.0  # 持续有事件时最长等待时间
+    WATCH_FORCE_POLLING: bool = False  # 强制轮询（网络共享盘等不支持 inotify 的场景）
+    WATCH_POLL_INTERVAL: float = 30.0  # 轮询模式的比对间隔（秒）
     
-    # 支持的文档格式
-    SUPPORTED_EXTENSIONS: List[str] = [".pdf", ".docx", ".txt", ".md"]
+    # 支持的文档格式（.doc/.xls 需要安装可选依赖 olefile/xlrd）
+    SUPPORTED_EXTENSIONS: List[str] = [".pdf", ".docx", ".doc", ".txt", ".md", ".pptx", ".xlsx", ".xls"]
     
     # CORS配置
     BACKEND_CORS_ORIGINS: List[str] = [
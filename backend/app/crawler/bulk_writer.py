@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描节点批量写入器 - 以 executemany 批量写入 data_overview / data_book_detail
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+
+logger = logging.getLogger(__name__)
+
+
+class BulkNodeWriter:
+    """
+    扫描节点批量写入器
+
+    节点按批缓存，满 batch_size 条时一次性 executemany 写入并取回ID
+    （数据库支持时使用 INSERT ... RETURNING，否则按路径回查）。
+    子节点写入前若父节点仍在缓冲区中，会先刷新缓冲区以获得父节点ID；
+    配合广度优先遍历，每层目录只需一次额外刷新。
+
+    模型类由调用方传入，因此 app.models 与 minimal_server 中的
+    同名模型都可以使用。
+    """
+
+    def __init__(
+        self,
+        db_session,
+        overview_model,
+        detail_model=None,
+        batch_size: int = 1000,
+        on_inserted: Optional[Callable[[str, int], None]] = None
+    ):
+        """
+        Args:
+            db_session: 数据库会话
+            overview_model: data_overview 表模型
+            detail_model: data_book_detail 表模型（需要同时创建解析记录时传入）
+            batch_size: 每批写入的行数
+            on_inserted: 新节点获得ID后的回调 (file_path, id)
+        """
+        self.db_session = db_session
+        self.overview_model = overview_model
+        self.detail_model = detail_model
+        self.batch_size = max(1, batch_size)
+        self.on_inserted = on_inserted
+
+        # 路径 -> 数据库ID（已写入或预加载的节点）
+        self.path_to_id: Dict[str, int] = {}
+
+        self._pending_inserts: List[Dict] = []
+        self._pending_paths: set = set()
+        self._pending_updates: List[Dict] = []
+        self._detail_paths: Dict[str, Dict] = {}
+
+        self.stats = {
+            "inserted": 0,
+            "updated": 0,
+            "deleted": 0,
+            "details_inserted": 0,
+            "round_trips": 0
+        }
+
+        dialect = db_session.get_bind().dialect
+        self._use_returning = bool(getattr(dialect, "insert_executemany_returning", False))
+
+    def __contains__(self, file_path: str) -> bool:
+        """节点是否已写入、已预加载或在缓冲区中"""
+        return file_path in self.path_to_id or file_path in self._pending_paths
+
+    def preload(self, path_to_id: Dict[str, int]):
+        """登记数据库中已存在的节点ID"""
+        self.path_to_id.update(path_to_id)
+
+    def insert(self, row: Dict, parent_path: Optional[str] = None, with_detail: bool = False,
+               detail: Optional[Dict] = None):
+        """
+        缓存一条待插入的节点
+
+        Args:
+            row: 列值字典（必须包含 file_path）
+            parent_path: 父节点路径，写入时解析为 parent_id
+            with_detail: 是否同时创建 pending 状态的解析记录
+            detail: 覆盖解析记录的 parse_status / parse_error（如 rejected 状态及原因）
+        """
+        self._resolve_parent(row, parent_path)
+        self._pending_inserts.append(row)
+        self._pending_paths.add(row["file_path"])
+        if with_detail:
+            self._detail_paths[row["file_path"]] = detail or {}
+
+        if len(self._pending_inserts) >= self.batch_size:
+            self.flush()
+
+    def update(self, row: Dict, parent_path: Optional[str] = None):
+        """
+        缓存一条按主键更新的节点（row 必须包含 id）
+
+        未传 parent_path 时不修改 parent_id，可用于只更新部分列。
+        """
+        if parent_path is not None:
+            self._resolve_parent(row, parent_path)
+        if hasattr(self.overview_model, "updated_at"):
+            row.setdefault("updated_at", datetime.utcnow())
+        self._pending_updates.append(row)
+
+        if len(self._pending_updates) >= self.batch_size:
+            self._flush_updates()
+
+    def mark_deleted(self, ids: Iterable[int]):
+        """分批软删除节点"""
+        ids = list(ids)
+        model = self.overview_model
+        for start in range(0, len(ids), self.batch_size):
+            chunk = ids[start:start + self.batch_size]
+            self.db_session.execute(
+                update(model).where(model.id.in_(chunk)).values(is_deleted=True)
+            )
+            self.stats["round_trips"] += 1
+        self.stats["deleted"] += len(ids)
+
+    def flush(self):
+        """写入所有缓冲的节点"""
+        self._flush_inserts()
+        self._flush_updates()
+
+    def _resolve_parent(self, row: Dict, parent_path: Optional[str]):
+        """解析父节点ID，父节点尚在缓冲区时先刷新"""
+        if parent_path is None:
+            row.setdefault("parent_id", None)
+            return
+        if parent_path in self._pending_paths:
+            self._flush_inserts()
+        row["parent_id"] = self.path_to_id.get(parent_path)
+
+    def _flush_inserts(self):
+        """批量插入缓冲区中的节点并取回ID"""
+        if not self._pending_inserts:
+            return
+
+        rows = self._pending_inserts
+        self._pending_inserts = []
+        self._pending_paths = set()
+
+        model = self.overview_model
+        if self._use_returning:
+            result = self.db_session.execute(
+                insert(model).returning(model.id, model.file_path),
+                rows
+            )
+            inserted = [(r.file_path, r.id) for r in result]
+            self.stats["round_trips"] += 1
+        else:
+            self.db_session.execute(insert(model), rows)
+            self.stats["round_trips"] += 1
+            inserted = self._select_ids([row["file_path"] for row in rows])
+
+        for file_path, node_id in inserted:
+            self.path_to_id[file_path] = node_id
+            if self.on_inserted:
+                self.on_inserted(file_path, node_id)
+        self.stats["inserted"] += len(rows)
+
+        self._flush_details(inserted)
+
+    def _select_ids(self, paths: List[str]) -> List[Tuple[str, int]]:
+        """按路径回查新插入节点的ID（数据库不支持批量 RETURNING 时使用）"""
+        model = self.overview_model
+        result = self.db_session.execute(
+            select(model.file_path, model.id).where(model.file_path.in_(paths))
+        )
+        self.stats["round_trips"] += 1
+        return [(r.file_path, r.id) for r in result]
+
+    def _flush_details(self, inserted: List[Tuple[str, int]]):
+        """为需要的节点批量创建解析记录（默认 pending 状态）"""
+        if self.detail_model is None or not self._detail_paths:
+            return
+
+        detail_rows = []
+        for file_path, node_id in inserted:
+            if file_path in self._detail_paths:
+                extra = self._detail_paths.pop(file_path)
+                detail_rows.append({"file_id": node_id, "parse_status": "pending", "parse_error": None, **extra})
+
+        if detail_rows:
+            self.db_session.execute(insert(self.detail_model), detail_rows)
+            self.stats["round_trips"] += 1
+            self.stats["details_inserted"] += len(detail_rows)
+
+    def _flush_updates(self):
+        """按主键批量更新节点"""
+        if not self._pending_updates:
+            return
+
+        # 先写入插入缓冲，保证更新引用的父节点已存在
+        self._flush_inserts()
+
+        rows = self._pending_updates
+        self._pending_updates = []
+
+        # executemany 要求每批参数的键一致，按键集合分组
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        for group_rows in groups.values():
+            self.db_session.execute(update(self.overview_model), group_rows)
+            self.stats["round_trips"] += 1
+        self.stats["updated"] += len(rows)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行目录遍历器 - 基于 os.scandir 与有界线程池
+"""
+
+import os
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from app.crawler.scan_filter import ScanFilter
+
+logger = logging.getLogger(__name__)
+
+# 每个工作线程最多预先提交的目录列举数（限制已列举未消费的结果占用的内存）
+LISTINGS_PER_WORKER = 4
+
+
+class ScanEntry(NamedTuple):
+    """遍历得到的单个文件/文件夹条目（stat 信息只获取一次）"""
+    path: str
+    name: str
+    parent_path: Optional[str]
+    depth: int
+    is_dir: bool
+    size: Optional[int]
+    mtime: float
+    inode: int
+
+
+class ParallelDirWalker:
+    """
+    并行目录遍历器
+
+    目录列举（scandir + stat）在线程池中并发执行，结果按广度优先顺序
+    依次产出：父节点总是先于子节点产出，同一目录下的子项按
+    （文件夹优先, 名称）排序，因此输出顺序与线程调度无关。
+    同时提交的列举任务不超过 max_workers * LISTINGS_PER_WORKER 个，
+    其余目录以 (路径, 深度) 排队，有空位时再提交。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_depth: int = 20,
+        skip_name: Optional[Callable[[str], bool]] = None,
+        follow_symlinks: bool = True,
+        scan_filter: Optional["ScanFilter"] = None
+    ):
+        """
+        Args:
+            max_workers: 并发列举目录的线程数
+            max_depth: 最大遍历深度（根目录深度为0）
+            skip_name: 判断是否跳过某个名称的回调
+            follow_symlinks: 是否跟随符号链接
+            scan_filter: 包含/排除规则，被排除的文件夹不会再被列举
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_depth = max_depth
+        self.skip_name = skip_name or (lambda name: False)
+        self.follow_symlinks = follow_symlinks
+        self.scan_filter = scan_filter
+        self.max_outstanding = self.max_workers * LISTINGS_PER_WORKER
+        # 已提交的列举任务 (路径, 深度, future) 与尚未提交的目录 (路径, 深度)，
+        # 两者依次拼接即为广度优先顺序的遍历前沿
+        self._listing: deque = deque()
+        self._queued: deque = deque()
+
+    def walk(
+        self,
+        root: str,
+        frontier: Optional[List[Tuple[str, int]]] = None,
+        on_dir_done: Optional[Callable[[str, List[ScanEntry]], None]] = None
+    ) -> Iterator[ScanEntry]:
+        """
+        从根目录开始遍历，按确定性的广度优先顺序产出条目
+
+        Args:
+            root: 根目录
+            frontier: 从检查点恢复时待列举的目录 [(路径, 深度)]；
+                传入时不再产出根目录，直接从这些目录继续
+            on_dir_done: 某个目录的子项全部产出（并已被调用方处理）后的回调
+                (目录路径, 子项列表)；目录列举失败时不会回调
+        """
+        self._listing = deque()
+        self._queued = deque()
+
+        if frontier is None:
+            root_stat = os.stat(root)
+            root_is_dir = os.path.isdir(root)
+            yield ScanEntry(
+                path=root,
+                name=os.path.basename(root.rstrip("\\/")) or root,
+                parent_path=None,
+                depth=0,
+                is_dir=root_is_dir,
+                size=None if root_is_dir else root_stat.st_size,
+                mtime=root_stat.st_mtime,
+                inode=root_stat.st_ino
+            )
+
+            if not root_is_dir or self.max_depth <= 0:
+                return
+            frontier = [(root, 1)]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dir-walker") as pool:
+            # 按提交顺序（即广度优先顺序）消费结果，保证输出确定
+            listing, queued = self._listing, self._queued
+            queued.extend((dir_path, depth) for dir_path, depth in frontier)
+            self._submit_queued(pool)
+
+            while listing:
+                dir_path, _, future = listing[0]
+                children = future.result()
+                listing.popleft()
+
+                # 先补充子目录的列举任务，再产出当前结果，让线程池保持忙碌
+                for child in children or []:
+                    if child.is_dir and child.depth < self.max_depth:
+                        queued.append((child.path, child.depth + 1))
+                self._submit_queued(pool)
+
+                for child in children or []:
+                    yield child
+
+                if children is not None and on_dir_done is not None:
+                    on_dir_done(dir_path, children)
+
+    def _submit_queued(self, pool: ThreadPoolExecutor):
+        """按顺序提交排队的目录，直到在途列举数达到上限"""
+        while self._queued and len(self._listing) < self.max_outstanding:
+            dir_path, depth = self._queued.popleft()
+            self._listing.append((dir_path, depth, pool.submit(self._list_dir, dir_path, depth)))
+
+    def pending_dirs(self) -> List[Tuple[str, int]]:
+        """
+        尚未列举完成的目录 [(路径, 子项深度)]（遍历前沿，用于检查点）
+
+        在 on_dir_done 回调中调用时，前沿之外的目录都已处理完毕。
+        """
+        return [(dir_path, depth) for dir_path, depth, _ in self._listing] + list(self._queued)
+
+    def pending_count(self) -> int:
+        """遍历前沿中尚未列举的目录数（用于估算进度）"""
+        return len(self._listing) + len(self._queued)
+
+    def _list_dir(self, dir_path: str, depth: int) -> Optional[List[ScanEntry]]:
+        """列举单个目录（在工作线程中执行），失败时返回 None"""
+        entries = []
+        scan_filter = self.scan_filter
+        try:
+            with os.scandir(dir_path) as it:
+                for dir_entry in it:
+                    if self.skip_name(dir_entry.name):
+                        continue
+                    try:
+                        is_dir = dir_entry.is_dir(follow_symlinks=self.follow_symlinks)
+                        # 先按名称过滤，被排除的条目不再获取 stat
+                        if scan_filter is not None and (
+                            scan_filter.is_excluded(dir_entry.path, is_dir) or
+                            (not is_dir and not scan_filter.accepts_file(dir_entry.path))
+                        ):
+                            continue
+                        entry_stat = dir_entry.stat(follow_symlinks=self.follow_symlinks)
+                    except OSError as e:
+                        logger.warning(f"读取文件信息失败，跳过: {dir_entry.path}: {e}")
+                        continue
+                    if scan_filter is not None and not is_dir and not scan_filter.accepts_size(entry_stat.st_size):
+                        continue
+
+                    entries.append(ScanEntry(
+                        path=dir_entry.path,
+                        name=dir_entry.name,
+                        parent_path=dir_path,
+                        depth=depth,
+                        is_dir=is_dir,
+                        size=None if is_dir else entry_stat.st_size,
+                        mtime=entry_stat.st_mtime,
+                        inode=entry_stat.st_ino
+                    ))
+        except PermissionError:
+            logger.warning(f"权限不足，跳过目录: {dir_path}")
+            return None
+        except OSError as e:
+            logger.warning(f"访问目录出错 {dir_path}: {e}")
+            return None
+
+        # 文件夹优先，再按名称排序
+        entries.sort(key=lambda e: (not e.is_dir, e.name))
+        if scan_filter is not None and scan_filter.max_files_per_dir:
+            dir_count = sum(1 for e in entries if e.is_dir)
+            keep = scan_filter.cap_files(dir_path, len(entries) - dir_count)
+            del entries[dir_count + keep:]
+        return entries
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重复文件查询 - 按内容指纹对文件分组
+
+采样指纹（s: 前缀）只覆盖文件头尾，同组文件再按全量哈希拆分确认；
+全量哈希只对候选分组内的文件计算。
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import func
+
+from app.crawler.fingerprint import compute_full_hash, is_full_fingerprint
+
+
+def find_duplicate_groups(db_session, overview_model, min_count: int = 2,
+                          limit: int = 100, verify: bool = True) -> List[Dict]:
+    """
+    查询内容指纹相同的文件分组
+
+    模型类由调用方传入，app.models 与 minimal_server 中的同名模型都可以使用。
+
+    Args:
+        db_session: 数据库会话
+        overview_model: data_overview 表模型
+        min_count: 分组内最少文件数
+        limit: 返回的最大分组数（按可节省空间降序）
+        verify: 采样指纹相同的分组是否读取全部内容确认（无法读取的文件不计入分组）
+
+    Returns:
+        分组列表，每组包含 content_hash、count、file_size、wasted_bytes、verified、files
+    """
+    model = overview_model
+    count = func.count(model.id)
+    file_size = func.max(model.file_size)
+
+    groups = db_session.query(
+        model.content_hash,
+        count.label("count"),
+        file_size.label("file_size")
+    ).filter(
+        model.file_type == "file",
+        model.is_deleted == False,
+        model.content_hash.isnot(None)
+    ).group_by(model.content_hash).having(
+        count >= min_count
+    ).order_by(
+        ((count - 1) * func.coalesce(file_size, 0)).desc()
+    ).limit(limit).all()
+
+    if not groups:
+        return []
+
+    members: Dict[str, List[Dict]] = {}
+    rows = db_session.query(
+        model.id, model.file_name, model.file_path, model.content_hash
+    ).filter(
+        model.content_hash.in_([g.content_hash for g in groups]),
+        model.file_type == "file",
+        model.is_deleted == False
+    ).order_by(model.file_path)
+    for row in rows:
+        members.setdefault(row.content_hash, []).append({
+            "id": row.id,
+            "name": row.file_name,
+            "path": row.file_path
+        })
+
+    result = []
+    for g in groups:
+        files = members.get(g.content_hash, [])
+        if verify and not is_full_fingerprint(g.content_hash):
+            subgroups = _split_by_full_hash(files)
+        else:
+            subgroups = [files]
+        for group_files in subgroups:
+            if len(group_files) < min_count:
+                continue
+            result.append({
+                "content_hash": g.content_hash,
+                "count": len(group_files),
+                "file_size": g.file_size,
+                "wasted_bytes": (g.file_size or 0) * (len(group_files) - 1),
+                "verified": verify or is_full_fingerprint(g.content_hash),
+                "files": group_files
+            })
+
+    # 拆分后可节省空间可能变小，重新排序
+    result.sort(key=lambda group: group["wasted_bytes"], reverse=True)
+    return result
+
+
+def _split_by_full_hash(files: List[Dict]) -> List[List[Dict]]:
+    """按全量哈希把采样指纹相同的文件拆分为内容确实一致的子分组"""
+    by_hash: Dict[str, List[Dict]] = {}
+    for file in files:
+        full_hash = compute_full_hash(file["path"])
+        if full_hash is not None:
+            by_hash.setdefault(full_hash, []).append(file)
+    return list(by_hash.values())
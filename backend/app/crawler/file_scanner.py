@@ -6,16 +6,88 @@
 
 import os
 import hashlib
+import logging
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Optional, Tuple, NamedTuple
+from dataclasses import dataclass, field
 from datetime import datetime
-import magic
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
+from sqlalchemy import update
+
 from app.core.config import settings
-from app.models.data_overview import DataOverview
+from app.models.data_overview import DataOverview, DataBookDetail
 from app.core.database import get_db
+from app.crawler.dir_walker import ParallelDirWalker, ScanEntry
+from app.crawler.bulk_writer import BulkNodeWriter
+from app.crawler.fingerprint import compute_fingerprint
+from app.crawler.mime_sniffer import get_mime_sniffer
+from app.crawler.scan_filter import ScanFilter
+from app.crawler.scan_checkpoint import ScanCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestEntry(NamedTuple):
+    """数据库中已存储节点的快照（用于增量比对）"""
+    id: int
+    file_type: str
+    file_size: Optional[int]
+    modified_time: Optional[datetime]
+    is_deleted: bool
+    content_hash: Optional[str] = None
+    mime_type: Optional[str] = None
+
+
+@dataclass
+class ScanChangeSet:
+    """增量扫描变更集"""
+    added: int = 0
+    modified: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    added_file_ids: List[int] = field(default_factory=list)
+    modified_file_ids: List[int] = field(default_factory=list)
+    removed_file_ids: List[int] = field(default_factory=list)
+    # 新增或修改、需要重新解析的文档ID（仅支持的文档格式）
+    document_ids: List[int] = field(default_factory=list)
+    # 内容与扩展名不符、不进入解析队列的文档ID
+    rejected_file_ids: List[int] = field(default_factory=list)
+    # 是否从检查点恢复（恢复时 ID 列表只包含本次运行的部分，计数包含全部）
+    resumed: bool = False
+    
+    @property
+    def changed_file_ids(self) -> List[int]:
+        """需要重新解析的文件ID（新增 + 修改）"""
+        return self.added_file_ids + self.modified_file_ids
+    
+    def to_dict(self) -> Dict:
+        return {
+            "added": self.added,
+            "modified": self.modified,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+            "added_file_ids": self.added_file_ids,
+            "modified_file_ids": self.modified_file_ids,
+            "removed_file_ids": self.removed_file_ids,
+            "document_ids": self.document_ids,
+            "rejected_file_ids": self.rejected_file_ids,
+            "resumed": self.resumed
+        }
+
+
+@dataclass
+class _SyncBatch:
+    """一次扫描/同步过程中的写入状态"""
+    writer: BulkNodeWriter
+    changes: ScanChangeSet
+    seen_paths: set = field(default_factory=set)
+    added_file_paths: List[str] = field(default_factory=list)
+    document_paths: List[str] = field(default_factory=list)
+    # 路径 -> 文件检查任务（指纹、MIME 嗅探，在线程池中与遍历并行执行）
+    inspect_jobs: Dict = field(default_factory=dict)
+
 
 class FileScanner:
     """文件系统扫描器"""
@@ -24,11 +96,32 @@ class FileScanner:
         self.scan_path = Path(settings.SCAN_PATH)
         self.supported_extensions = settings.SUPPORTED_EXTENSIONS
         self.max_file_size = settings.MAX_FILE_SIZE
+        self.scan_workers = settings.SCAN_WORKERS
+        self.batch_size = settings.SCAN_BATCH_SIZE
+        self.fingerprint_enabled = settings.SCAN_FINGERPRINT_ENABLED
+        self.mime_check_enabled = settings.SCAN_MIME_CHECK_ENABLED
+        self.checkpoint_dir = settings.SCAN_CHECKPOINT_DIR
+        self.checkpoint_interval = settings.SCAN_CHECKPOINT_INTERVAL
+        self.exclude_patterns = list(settings.SCAN_EXCLUDE_PATTERNS)
+        self.include_patterns = list(settings.SCAN_INCLUDE_PATTERNS)
+        self.ignore_file = settings.SCAN_IGNORE_FILE
+        self.max_depth = settings.SCAN_MAX_DEPTH
+        self.min_scan_file_size = settings.SCAN_MIN_FILE_SIZE
+        self.max_scan_file_size = settings.SCAN_MAX_FILE_SIZE
+        self.max_files_per_dir = settings.SCAN_MAX_FILES_PER_DIR
         self.executor = ThreadPoolExecutor(max_workers=4)
         
-    def scan_filesystem(self, db_session) -> Dict:
-        """扫描文件系统并构建知识树"""
-        print(f"开始扫描文件系统: {self.scan_path}")
+    def scan_filesystem(self, db_session, incremental: bool = True, resume: bool = True) -> Dict:
+        """
+        扫描文件系统并构建知识树
+        
+        Args:
+            db_session: 数据库会话
+            incremental: 是否增量扫描（按 mtime/size 与已存储记录比对，
+                只写入新增、修改和删除的节点）
+            resume: 存在上次中断留下的检查点时是否从检查点继续
+        """
+        print(f"开始扫描文件系统: {self.scan_path} (增量: {incremental})")
         
         if not self.scan_path.exists():
             raise FileNotFoundError(f"扫描路径不存在: {self.scan_path}")
@@ -37,118 +130,540 @@ class FileScanner:
         # self._clear_existing_data(db_session)
         
         # 构建文件树
-        file_tree = self._build_file_tree(db_session)
+        changes = ScanChangeSet()
+        file_tree = self._build_file_tree(db_session, changes, incremental, resume)
         
-        print(f"扫描完成，共发现 {len(file_tree)} 个节点")
+        print(
+            f"扫描完成，共发现 {len(file_tree)} 个节点，"
+            f"新增 {changes.added} / 修改 {changes.modified} / 删除 {changes.removed}"
+        )
         return {
             "status": "success",
             "scanned_path": str(self.scan_path),
             "total_nodes": len(file_tree),
+            "changes": changes.to_dict(),
             "tree": file_tree
         }
     
-    def _build_file_tree(self, db_session) -> List[Dict]:
-        """构建文件树结构"""
+    def _load_manifest(self, db_session, root: Optional[str] = None) -> Dict[str, ManifestEntry]:
+        """加载目录（默认扫描根目录）下已存储节点的 mtime/size 清单"""
+        root = root if root is not None else str(self.scan_path)
+        rows = self._manifest_query(db_session).filter(
+            (DataOverview.file_path == root) |
+            DataOverview.file_path.startswith(os.path.join(root, ""), autoescape=True)
+        ).all()
+        return self._rows_to_manifest(rows)
+    
+    def _load_manifest_for_paths(self, db_session, paths: List[str]) -> Dict[str, ManifestEntry]:
+        """按精确路径加载已存储节点清单（分批 IN 查询）"""
+        manifest = {}
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            rows = self._manifest_query(db_session).filter(
+                DataOverview.file_path.in_(chunk)
+            ).all()
+            manifest.update(self._rows_to_manifest(rows))
+        return manifest
+    
+    @staticmethod
+    def _manifest_query(db_session):
+        return db_session.query(
+            DataOverview.file_path,
+            DataOverview.id,
+            DataOverview.file_type,
+            DataOverview.file_size,
+            DataOverview.modified_time,
+            DataOverview.is_deleted,
+            DataOverview.content_hash,
+            DataOverview.mime_type
+        )
+    
+    @staticmethod
+    def _rows_to_manifest(rows) -> Dict[str, ManifestEntry]:
+        return {
+            row.file_path: ManifestEntry(
+                id=row.id,
+                file_type=row.file_type,
+                file_size=row.file_size,
+                modified_time=row.modified_time,
+                is_deleted=bool(row.is_deleted),
+                content_hash=row.content_hash,
+                mime_type=row.mime_type
+            )
+            for row in rows
+        }
+    
+    @staticmethod
+    def _is_entry_changed(entry: ManifestEntry, file_type: str,
+                          file_size: Optional[int], modified_time: datetime) -> bool:
+        """判断节点相对已存储记录是否发生变化"""
+        if entry.is_deleted or entry.file_type != file_type:
+            return True
+        if entry.file_size != file_size:
+            return True
+        if entry.modified_time is None:
+            return True
+        # 数据库可能截断微秒，按毫秒级容差比较
+        return abs((entry.modified_time - modified_time).total_seconds()) >= 0.001
+    
+    def _mark_removed(self, writer: BulkNodeWriter, manifest: Dict[str, ManifestEntry],
+                      seen_paths: set, changes: ScanChangeSet):
+        """将本次扫描未再出现的节点软删除（is_deleted=True）"""
+        self._mark_removed_entries(writer, [
+            entry for path, entry in manifest.items() if path not in seen_paths
+        ], changes)
+    
+    def _mark_removed_children(self, writer: BulkNodeWriter, manifest: Dict[str, ManifestEntry],
+                               children_by_parent: Dict[str, List[str]], dir_path: str,
+                               children: List[ScanEntry], changes: ScanChangeSet):
+        """目录列举完成后，软删除该目录下已不存在的子节点及其整棵子树"""
+        listed = {child.path for child in children}
+        stack = [path for path in children_by_parent.get(dir_path, ()) if path not in listed]
+        # 文件夹变成了同名文件时，原文件夹下的子树也已不存在
+        for child in children:
+            if not child.is_dir:
+                stack.extend(children_by_parent.get(child.path, ()))
+        removed = []
+        while stack:
+            path = stack.pop()
+            removed.append(manifest[path])
+            stack.extend(children_by_parent.get(path, ()))
+        self._mark_removed_entries(writer, removed, changes)
+    
+    @staticmethod
+    def _mark_removed_entries(writer: BulkNodeWriter, entries: List[ManifestEntry],
+                              changes: ScanChangeSet):
+        removed = [entry for entry in entries if not entry.is_deleted]
+        if not removed:
+            return
+        
+        writer.mark_deleted(entry.id for entry in removed)
+        
+        changes.removed += len(removed)
+        changes.removed_file_ids.extend(
+            entry.id for entry in removed if entry.file_type == "file"
+        )
+    
+    def _entry_row(self, entry: ScanEntry) -> Dict:
+        """由遍历条目生成 data_overview 列值（stat 信息由遍历器一次性获取）"""
+        is_file = not entry.is_dir
+        file_extension = Path(entry.path).suffix.lower() if is_file else None
+        
+        # 提取书名（如果是支持的文档文件）
+        bookname = None
+        if is_file and file_extension in self.supported_extensions:
+            bookname = self._extract_book_name(Path(entry.path))
+        
+        return {
+            "file_name": entry.name,
+            "file_path": entry.path,
+            "file_type": "file" if is_file else "folder",
+            "file_size": entry.size,
+            "modified_time": datetime.fromtimestamp(entry.mtime),
+            "file_extension": file_extension,
+            "bookname": bookname,
+            "is_deleted": False
+        }
+    
+    def _apply_entry(self, batch: "_SyncBatch", entry: ScanEntry, row: Dict,
+                     existing: Optional[ManifestEntry]) -> str:
+        """
+        把单个条目与已存储记录比对，缓存需要的插入/更新
+        
+        Returns:
+            "added" / "modified" / "unchanged"
+        """
+        path_str = row["file_path"]
+        is_file = row["file_type"] == "file"
+        is_supported_doc = is_file and row["file_extension"] in self.supported_extensions
+        changes = batch.changes
+        batch.seen_paths.add(path_str)
+        
+        if existing is None:
+            # 新节点：缓存到批量写入器，ID 在刷新时取回
+            batch.writer.insert(dict(row), parent_path=entry.parent_path)
+            status = "added"
+            changes.added += 1
+            if is_file:
+                batch.added_file_paths.append(path_str)
+        elif self._is_entry_changed(existing, row["file_type"], row["file_size"], row["modified_time"]):
+            # 已存在但发生变化（或曾被软删除）：批量按主键更新
+            update_row = {key: value for key, value in row.items() if key not in ("file_name", "file_path")}
+            update_row["id"] = existing.id
+            update_row["content_hash"] = None  # 内容可能已变，指纹在下方重新计算
+            batch.writer.update(update_row, parent_path=entry.parent_path)
+            
+            if existing.is_deleted:
+                status = "added"
+                changes.added += 1
+                if is_file:
+                    changes.added_file_ids.append(existing.id)
+            else:
+                status = "modified"
+                changes.modified += 1
+                if is_file:
+                    changes.modified_file_ids.append(existing.id)
+        else:
+            # 未变化：沿用已有ID，不产生写入
+            status = "unchanged"
+            changes.unchanged += 1
+        
+        if is_supported_doc and status != "unchanged":
+            batch.document_paths.append(path_str)
+        
+        # 新增/修改的文档（以及尚未检查过的旧记录）计算内容指纹、校验 MIME 类型
+        if is_supported_doc:
+            need_hash = self.fingerprint_enabled and (status != "unchanged" or existing.content_hash is None)
+            need_mime = self.mime_check_enabled and (status != "unchanged" or existing.mime_type is None)
+            if need_hash or need_mime:
+                batch.inspect_jobs[path_str] = self.executor.submit(
+                    self._inspect_file, entry, row["file_extension"], need_hash, need_mime
+                )
+        
+        return status
+    
+    @staticmethod
+    def _inspect_file(entry: ScanEntry, extension: str, need_hash: bool, need_mime: bool) -> Dict:
+        """在线程池中检查单个文件，只读取文件头尾若干 KB"""
+        result = {}
+        if need_hash:
+            result["content_hash"] = compute_fingerprint(entry.path, entry.size)
+        if need_mime:
+            check = get_mime_sniffer().check(entry.path, extension, entry.inode, entry.mtime, entry.size)
+            if check is not None:
+                result["mime_type"] = check.mime_type[:100]
+                result["mime_valid"] = check.valid
+        return result
+    
+    def _finish_batch(self, batch: "_SyncBatch"):
+        """写入剩余缓冲、补写指纹并回填新增文件的ID"""
+        writer = batch.writer
+        writer.flush()
+        rejected = self._store_inspections(writer, batch.inspect_jobs)
+        
+        batch.changes.added_file_ids.extend(
+            writer.path_to_id[path] for path in batch.added_file_paths if path in writer.path_to_id
+        )
+        batch.changes.document_ids.extend(
+            writer.path_to_id[path] for path in batch.document_paths
+            if path in writer.path_to_id and writer.path_to_id[path] not in rejected
+        )
+        batch.changes.rejected_file_ids.extend(rejected)
+        
+        # 已处理的部分清空，允许在检查点处多次调用
+        batch.inspect_jobs = {}
+        batch.added_file_paths = []
+        batch.document_paths = []
+    
+    def _build_file_tree(self, db_session, changes: Optional[ScanChangeSet] = None,
+                         incremental: bool = True, resume: bool = True) -> List[Dict]:
+        """
+        构建文件树结构
+        
+        每个目录列举完成后即比对删除；每隔 checkpoint_interval 秒提交一次
+        事务并保存遍历前沿，中断后从检查点继续（恢复时返回的节点只包含本次运行的部分）。
+        """
         nodes = []
-        node_id_map = {}  # 路径到ID的映射
-        
-        def traverse_directory(current_path: Path, parent_id: Optional[int] = None, depth: int = 0) -> int:
-            """递归遍历目录"""
-            if depth > 20:  # 防止无限递归
-                return None
-                
-            # 跳过隐藏文件和系统文件
-            if current_path.name.startswith('.') or current_path.name.startswith('~$'):
-                return None
+        node_by_path = {}  # 路径到节点信息的映射（用于挂接子节点）
+        changes = changes if changes is not None else ScanChangeSet()
+        root = str(self.scan_path)
+        
+        checkpoint = ScanCheckpoint(self.checkpoint_dir, root, self.checkpoint_interval, scope="file_scanner")
+        state = checkpoint.load() if resume else None
+        frontier = None
+        completed_dirs = 0
+        if state is not None:
+            frontier = state["frontier"]
+            completed_dirs = state["completed_dirs"]
+            for key in ("added", "modified", "removed", "unchanged"):
+                setattr(changes, key, state["stats"].get(key, 0))
+            changes.resumed = True
+            print(f"从检查点继续扫描: 已完成 {completed_dirs} 个目录，待列举 {len(frontier)} 个目录")
+        
+        # 恢复时之前写入的节点已在库中，需要按增量方式比对
+        manifest = self._load_manifest(db_session) if incremental or state is not None else {}
+        children_by_parent: Dict[str, List[str]] = {}
+        if incremental:
+            for path in manifest:
+                children_by_parent.setdefault(os.path.dirname(path), []).append(path)
+        
+        writer = BulkNodeWriter(db_session, DataOverview, batch_size=self.batch_size)
+        writer.preload({path: entry.id for path, entry in manifest.items()})
+        batch = _SyncBatch(writer, changes)
+        
+        scan_filter = self.build_scan_filter()
+        walker = ParallelDirWalker(
+            max_workers=self.scan_workers,
+            max_depth=self.max_depth,  # 防止无限递归
+            scan_filter=scan_filter
+        )
+        
+        def on_dir_done(dir_path: str, children: List[ScanEntry]):
+            nonlocal completed_dirs
+            completed_dirs += 1
+            if incremental:
+                self._mark_removed_children(writer, manifest, children_by_parent, dir_path, children, changes)
+            if checkpoint.due():
+                self._finish_batch(batch)
+                db_session.commit()
+                checkpoint.save(walker.pending_dirs(), completed_dirs, {
+                    "added": changes.added,
+                    "modified": changes.modified,
+                    "removed": changes.removed,
+                    "unchanged": changes.unchanged
+                })
+        
+        # 按广度优先顺序处理，父节点总是先于子节点写入
+        for entry in walker.walk(root, frontier=frontier, on_dir_done=on_dir_done):
+            row = self._entry_row(entry)
+            self._apply_entry(batch, entry, row, manifest.get(entry.path))
             
             # 生成唯一ID（使用路径的hash）
-            path_hash = hashlib.md5(str(current_path).encode()).hexdigest()[:8]
-            unique_id = f"{depth}_{path_hash}"
-            
-            # 判断是文件还是文件夹
-            is_file = current_path.is_file()
-            file_type = "file" if is_file else "folder"
-            
-            # 获取文件信息
-            file_stat = current_path.stat()
-            file_size = file_stat.st_size if is_file else None
-            modified_time = datetime.fromtimestamp(file_stat.st_mtime)
-            
-            # 获取文件扩展名
-            file_extension = current_path.suffix.lower() if is_file else None
+            path_hash = hashlib.md5(entry.path.encode()).hexdigest()[:8]
+            unique_id = f"{entry.depth}_{path_hash}"
+            is_file = not entry.is_dir
             
-            # 检查是否为支持的文档类型
-            is_supported_doc = is_file and file_extension in self.supported_extensions
-            
-            # 提取书名（如果是文档文件）
-            bookname = None
-            if is_supported_doc:
-                bookname = self._extract_book_name(current_path)
-            
-            # 创建数据库记录
-            file_info = DataOverview(
-                file_name=current_path.name,
-                file_path=str(current_path),
-                file_type=file_type,
-                parent_id=parent_id,
-                file_size=file_size,
-                modified_time=modified_time,
-                file_extension=file_extension,
-                bookname=bookname,
-                is_deleted=False
-            )
-            
-            db_session.add(file_info)
-            db_session.flush()  # 获取ID但不提交
-            
-            # 构建节点信息
+            # 构建节点信息（新节点的ID在写入器刷新后回填）
             node_info = {
-                "id": file_info.id,
+                "id": None,
                 "unique_id": unique_id,
-                "name": current_path.name,
-                "path": str(current_path),
-                "type": file_type,
-                "size": file_size,
-                "extension": file_extension,
-                "modified_time": modified_time.isoformat(),
-                "bookname": bookname,
-                "is_supported_doc": is_supported_doc,
+                "name": entry.name,
+                "path": entry.path,
+                "type": row["file_type"],
+                "size": row["file_size"],
+                "extension": row["file_extension"],
+                "modified_time": row["modified_time"].isoformat(),
+                "bookname": row["bookname"],
+                "is_supported_doc": is_file and row["file_extension"] in self.supported_extensions,
                 "children": [] if not is_file else None,
-                "depth": depth
+                "depth": entry.depth,
+                "parent_path": entry.parent_path
             }
             
-            node_id_map[str(current_path)] = file_info.id
+            node_by_path[entry.path] = node_info
             nodes.append(node_info)
-            
-            # 如果是文件夹，递归处理子项
-            if not is_file:
-                try:
-                    children = []
-                    for child_path in current_path.iterdir():
-                        child_id = traverse_directory(child_path, file_info.id, depth + 1)
-                        if child_id:
-                            children.append(child_id)
-                    
-                    if children:
-                        # 按名称和类型排序
-                        children.sort(key=lambda x: (nodes[x-1]["type"] == "file", nodes[x-1]["name"]))
-                        node_info["children"] = children
-                        
-                except PermissionError:
-                    print(f"权限不足，跳过目录: {current_path}")
-                except OSError as e:
-                    print(f"访问目录出错 {current_path}: {e}")
-            
-            return file_info.id
         
-        # 开始遍历
-        traverse_directory(self.scan_path)
+        # 写入剩余缓冲并回填ID
+        self._finish_batch(batch)
+        for node_info in nodes:
+            node_info["id"] = writer.path_to_id.get(node_info["path"])
+        
+        # 挂到父节点的子节点列表（遍历器已按文件夹优先、名称排序）
+        for node_info in nodes:
+            parent_info = node_by_path.get(node_info.pop("parent_path"))
+            if parent_info is not None and node_info["id"] is not None:
+                parent_info["children"].append(node_info["id"])
         
-        # 提交数据库事务
+        # 提交数据库事务，扫描完整结束后不再需要检查点
         db_session.commit()
+        checkpoint.clear()
+        logger.info(f"扫描写入统计: {writer.stats}，过滤统计: {scan_filter.stats}")
         
         return nodes
     
+    def sync_paths(self, db_session, paths: Iterable[str]) -> ScanChangeSet:
+        """
+        只同步指定路径（文件监听使用），不遍历整个扫描目录
+        
+        存在的路径按需插入/更新（文件夹连同其子树），缺失的父目录一并补齐；
+        已不存在的路径连同其子节点软删除。
+        
+        Args:
+            db_session: 数据库会话
+            paths: 发生变化的文件/文件夹路径
+        """
+        changes = ScanChangeSet()
+        scan_filter = self.build_scan_filter()
+        targets = self._collapse_paths(paths, scan_filter)
+        if not targets:
+            return changes
+        
+        root = str(self.scan_path)
+        # 不满足过滤规则的文件按已删除处理
+        existing_targets = [
+            path for path in targets
+            if os.path.exists(path) and self._accepts_target(scan_filter, path)
+        ]
+        
+        # 扫描根目录与目标之间的父目录（需在子节点之前写入，其 mtime 也随之变化）
+        ancestors = set()
+        for path in targets:
+            parent = os.path.dirname(path)
+            while parent and self._is_within_scan_path(parent):
+                ancestors.add(parent)
+                if parent == root:
+                    break
+                parent = os.path.dirname(parent)
+        ancestors = sorted(ancestors - set(targets), key=lambda p: (p.count(os.sep), p))
+        
+        manifest = self._load_manifest_for_paths(db_session, ancestors + targets)
+        # 文件夹（现在或以前）需要整棵子树的清单，用于识别子树内的删除
+        for path in targets:
+            known = manifest.get(path)
+            if os.path.isdir(path) or (known is not None and known.file_type == "folder"):
+                manifest.update(self._load_manifest(db_session, root=path))
+        
+        writer = BulkNodeWriter(db_session, DataOverview, batch_size=self.batch_size)
+        writer.preload({path: entry.id for path, entry in manifest.items()})
+        batch = _SyncBatch(writer, changes)
+        
+        for path in ancestors:
+            entry = self._stat_entry(path)
+            if entry is not None:
+                self._apply_entry(batch, entry, self._entry_row(entry), manifest.get(path))
+        
+        for path in existing_targets:
+            parent_path = os.path.dirname(path) if path != root else None
+            # 深度限制相对扫描根目录计算
+            depth = len(Path(os.path.relpath(path, root)).parts) if path != root else 0
+            walker = ParallelDirWalker(
+                max_workers=self.scan_workers,
+                max_depth=self.max_depth - depth,
+                scan_filter=scan_filter
+            )
+            for entry in walker.walk(path):
+                if entry.parent_path is None:
+                    entry = entry._replace(parent_path=parent_path)
+                self._apply_entry(batch, entry, self._entry_row(entry), manifest.get(entry.path))
+        
+        self._finish_batch(batch)
+        
+        # 目标路径下未再出现的节点软删除（父目录不参与删除判断）
+        target_manifest = {
+            path: entry for path, entry in manifest.items()
+            if any(path == t or path.startswith(os.path.join(t, "")) for t in targets)
+        }
+        self._mark_removed(writer, target_manifest, batch.seen_paths, changes)
+        
+        db_session.commit()
+        logger.info(f"路径同步写入统计: {writer.stats}")
+        return changes
+    
+    def build_scan_filter(self) -> ScanFilter:
+        """按当前配置构建扫描根目录的过滤规则（含根目录下的忽略规则文件）"""
+        scan_filter = ScanFilter(
+            str(self.scan_path),
+            exclude=self.exclude_patterns,
+            include=self.include_patterns,
+            min_file_size=self.min_scan_file_size,
+            max_file_size=self.max_scan_file_size,
+            max_files_per_dir=self.max_files_per_dir
+        )
+        if self.ignore_file:
+            scan_filter.load_ignore_file(self.ignore_file)
+        return scan_filter
+    
+    @staticmethod
+    def _accepts_target(scan_filter: ScanFilter, path: str) -> bool:
+        """同步单个文件时按包含规则与大小过滤（文件夹始终保留）"""
+        if os.path.isdir(path):
+            return True
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        return scan_filter.accepts_file(path, size)
+    
+    def _collapse_paths(self, paths: Iterable[str], scan_filter: ScanFilter) -> List[str]:
+        """规范化路径，去掉扫描目录外、被排除的路径以及已被祖先路径覆盖的路径"""
+        normalized = set()
+        for path in paths:
+            path = os.path.normpath(path)
+            if not self._is_within_scan_path(path) or scan_filter.is_excluded_path(path):
+                continue
+            normalized.add(path)
+        
+        collapsed = []
+        for path in sorted(normalized, key=lambda p: (p.count(os.sep), p)):
+            if not any(path.startswith(os.path.join(kept, "")) for kept in collapsed):
+                collapsed.append(path)
+        return collapsed
+    
+    def _is_within_scan_path(self, path: str) -> bool:
+        root = str(self.scan_path)
+        return path == root or path.startswith(os.path.join(root, ""))
+    
+    @staticmethod
+    def _stat_entry(path: str) -> Optional[ScanEntry]:
+        """为单个路径构造遍历条目"""
+        try:
+            path_stat = os.stat(path)
+        except OSError:
+            return None
+        is_dir = os.path.isdir(path)
+        return ScanEntry(
+            path=path,
+            name=os.path.basename(path) or path,
+            parent_path=os.path.dirname(path),
+            depth=0,
+            is_dir=is_dir,
+            size=None if is_dir else path_stat.st_size,
+            mtime=path_stat.st_mtime,
+            inode=path_stat.st_ino
+        )
+    
+    def _store_inspections(self, writer: BulkNodeWriter, inspect_jobs: Dict) -> Dict[int, str]:
+        """
+        等待文件检查完成，按主键批量写入 content_hash / mime_type
+        
+        内容与扩展名不符的文档记为 rejected，不会进入解析队列；
+        之前被拒绝、修改后校验通过的文档恢复为 pending。
+        
+        Returns:
+            被拒绝的文档 {文件ID: 实际 MIME 类型}
+        """
+        rejected = {}
+        accepted = []
+        for path, job in inspect_jobs.items():
+            node_id = writer.path_to_id.get(path)
+            result = job.result()
+            if node_id is None:
+                continue
+            
+            columns = {key: result[key] for key in ("content_hash", "mime_type") if result.get(key) is not None}
+            if columns:
+                writer.update({"id": node_id, **columns})
+            if result.get("mime_valid") is False:
+                rejected[node_id] = result["mime_type"]
+            elif result.get("mime_valid") is True:
+                accepted.append(node_id)
+        writer.flush()
+        
+        db_session = writer.db_session
+        if rejected:
+            self._reject_documents(db_session, rejected)
+        for start in range(0, len(accepted), 500):
+            db_session.execute(
+                update(DataBookDetail).where(
+                    DataBookDetail.file_id.in_(accepted[start:start + 500]),
+                    DataBookDetail.parse_status == "rejected"
+                ).values(parse_status="pending", parse_error=None)
+            )
+        return rejected
+    
+    @staticmethod
+    def _reject_documents(db_session, rejected: Dict[int, str]):
+        """为内容与扩展名不符的文档写入 rejected 解析状态"""
+        file_ids = list(rejected)
+        existing = {}
+        for start in range(0, len(file_ids), 500):
+            for detail in db_session.query(DataBookDetail).filter(
+                DataBookDetail.file_id.in_(file_ids[start:start + 500])
+            ):
+                existing[detail.file_id] = detail
+        
+        now = datetime.utcnow()
+        for file_id, mime_type in rejected.items():
+            detail = existing.get(file_id)
+            if detail is None:
+                detail = DataBookDetail(file_id=file_id)
+                db_session.add(detail)
+            detail.parse_status = "rejected"
+            detail.parse_error = f"文件内容与扩展名不符（实际类型: {mime_type}），已跳过解析"
+            detail.parse_time = now
+        db_session.flush()
+        logger.warning(f"{len(rejected)} 个文档内容与扩展名不符，已跳过解析")
+    
     def _extract_book_name(self, file_path: Path) -> Optional[str]:
         """从文件路径提取书名"""
         name = file_path.stem  # 不含扩展名的文件名
@@ -169,14 +684,6 @@ class FileScanner:
         
         return name if len(name) > 2 else None
     
-    def _get_file_mime_type(self, file_path: Path) -> str:
-        """获取文件MIME类型"""
-        try:
-            mime = magic.from_file(str(file_path), mime=True)
-            return mime
-        except:
-            return "application/octet-stream"
-    
     def _clear_existing_data(self, db_session):
         """清空现有数据（谨慎使用）"""
         print("清空现有文件数据...")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件内容指纹 - 用于识别不同路径下内容相同的文件
+"""
+
+import os
+import hashlib
+import logging
+from typing import Optional
+
+# xxhash 为可选依赖，未安装时回退到 hashlib.blake2b
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 快速指纹读取的头/尾块大小
+SAMPLE_BLOCK_SIZE = 64 * 1024
+# 全量哈希的读取块大小
+FULL_HASH_CHUNK_SIZE = 1024 * 1024
+
+# 指纹前缀：s = 头尾采样，f = 全文件内容
+SAMPLED_PREFIX = "s"
+FULL_PREFIX = "f"
+
+
+def _new_hasher():
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def compute_fingerprint(file_path: str, file_size: Optional[int] = None,
+                        block_size: int = SAMPLE_BLOCK_SIZE) -> Optional[str]:
+    """
+    计算文件的快速内容指纹
+
+    小文件（不超过两个块）直接哈希全部内容；大文件只读取头尾各一块，
+    与文件大小一起哈希。格式为 "<前缀>:<大小>:<摘要>"。
+
+    Args:
+        file_path: 文件路径
+        file_size: 已知的文件大小（省去一次 stat）
+        block_size: 头/尾块大小
+
+    Returns:
+        指纹字符串；文件无法读取时返回 None
+    """
+    try:
+        if file_size is None:
+            file_size = os.path.getsize(file_path)
+
+        hasher = _new_hasher()
+        with open(file_path, 'rb') as f:
+            if file_size <= block_size * 2:
+                hasher.update(f.read())
+                prefix = FULL_PREFIX
+            else:
+                hasher.update(f.read(block_size))
+                f.seek(file_size - block_size)
+                hasher.update(f.read(block_size))
+                prefix = SAMPLED_PREFIX
+        return f"{prefix}:{file_size}:{hasher.hexdigest()}"
+    except OSError as e:
+        logger.warning(f"计算文件指纹失败 {file_path}: {e}")
+        return None
+
+
+def compute_full_hash(file_path: str, chunk_size: int = FULL_HASH_CHUNK_SIZE) -> Optional[str]:
+    """流式计算文件全部内容的哈希"""
+    try:
+        hasher = _new_hasher()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+    except OSError as e:
+        logger.warning(f"计算文件哈希失败 {file_path}: {e}")
+        return None
+
+
+def is_full_fingerprint(fingerprint: Optional[str]) -> bool:
+    """指纹是否覆盖了文件全部内容"""
+    return bool(fingerprint) and fingerprint.startswith(FULL_PREFIX + ":")
+
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件系统监听 - 监听扫描目录的变化并按批回调变化的路径
+
+优先使用 watchdog（Linux 下基于 inotify），未安装时回退到定时轮询比对。
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.crawler.dir_walker import ParallelDirWalker
+from app.crawler.scan_filter import ScanFilter
+
+# watchdog 为可选依赖
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+
+class PathDebouncer:
+    """
+    路径事件去抖
+
+    同一批内重复的路径合并为一条；最后一个事件后静默 quiet_period 秒
+    才交付，持续有事件时最多延迟 max_delay 秒（避免大批量拷贝时一直不交付）。
+    """
+
+    def __init__(self, quiet_period: float = 2.0, max_delay: float = 30.0):
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self._paths: set = set()
+        self._first_event: Optional[float] = None
+        self._last_event: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, *paths: str, now: Optional[float] = None):
+        """记录发生变化的路径"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for path in paths:
+                if path:
+                    self._paths.add(path)
+            if self._first_event is None:
+                self._first_event = now
+            self._last_event = now
+
+    def pop_ready(self, now: Optional[float] = None) -> List[str]:
+        """取出已满足交付条件的一批路径（未满足时返回空列表）"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._paths:
+                return []
+            quiet = now - self._last_event >= self.quiet_period
+            overdue = now - self._first_event >= self.max_delay
+            if not (quiet or overdue):
+                return []
+            paths = sorted(self._paths)
+            self._paths = set()
+            self._first_event = None
+            self._last_event = None
+            return paths
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._paths)
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    """把 watchdog 事件转换为变化路径"""
+
+    def __init__(self, debouncer: PathDebouncer):
+        super().__init__()
+        self.debouncer = debouncer
+
+    def on_any_event(self, event):
+        # 打开/关闭等只读事件不影响目录结构
+        if event.event_type not in ("created", "modified", "moved", "deleted", "closed"):
+            return
+        # 目录的 modified 事件只表示其子项变化，子项自身会有事件
+        if event.is_directory and event.event_type == "modified":
+            return
+        self.debouncer.add(event.src_path, getattr(event, "dest_path", None))
+
+
+class _PollingSource:
+    """轮询比对目录快照（watchdog 不可用时使用）"""
+
+    def __init__(self, root: str, debouncer: PathDebouncer, interval: float,
+                 walker: ParallelDirWalker):
+        self.root = root
+        self.debouncer = debouncer
+        self.interval = interval
+        self.walker = walker
+        self._snapshot: Dict[str, Tuple[bool, Optional[int], float]] = {}
+
+    def take_snapshot(self) -> Dict[str, Tuple[bool, Optional[int], float]]:
+        """目录快照：路径 -> (是否文件夹, 大小, 修改时间)"""
+        snapshot = {}
+        try:
+            for entry in self.walker.walk(self.root):
+                snapshot[entry.path] = (entry.is_dir, entry.size, entry.mtime)
+        except OSError as e:
+            logger.warning(f"轮询扫描目录失败 {self.root}: {e}")
+            return self._snapshot
+        return snapshot
+
+    def prime(self):
+        self._snapshot = self.take_snapshot()
+
+    def poll(self):
+        """比对前后快照，把变化的路径交给去抖器"""
+        current = self.take_snapshot()
+        previous = self._snapshot
+        changed = [path for path, state in current.items() if previous.get(path) != state]
+        # 文件夹的 mtime 随子项变化，子项自身已计入
+        changed = [path for path in changed if not (current[path][0] and path in previous)]
+        removed = [path for path in previous if path not in current]
+        self._snapshot = current
+        if changed or removed:
+            self.debouncer.add(*changed, *removed)
+
+    def run(self, stop_event: threading.Event):
+        while not stop_event.wait(self.interval):
+            self.poll()
+
+
+class FileSystemWatcher:
+    """
+    扫描目录监听器
+
+    文件系统事件经去抖后按批回调 on_changes(paths)，回调在监听器
+    自己的线程中执行；回调异常只记录日志，不会中断监听。
+    """
+
+    def __init__(
+        self,
+        root: str,
+        on_changes: Callable[[List[str]], None],
+        debounce_seconds: float = 2.0,
+        max_delay: float = 30.0,
+        poll_interval: float = 30.0,
+        use_polling: bool = False,
+        skip_name: Optional[Callable[[str], bool]] = None,
+        scan_workers: int = 4,
+        scan_filter: Optional[ScanFilter] = None
+    ):
+        """
+        Args:
+            root: 监听的根目录
+            on_changes: 批量变化回调，参数为去重后的路径列表
+            debounce_seconds: 最后一个事件后等待的静默时间
+            max_delay: 持续有事件时的最长等待时间
+            poll_interval: 轮询模式的比对间隔
+            use_polling: 强制使用轮询（如网络共享盘不支持 inotify）
+            skip_name: 判断是否忽略某个名称的回调（隐藏文件、临时文件等）
+            scan_workers: 轮询模式下列举目录的线程数
+            scan_filter: 扫描过滤规则，被排除的路径不会回调
+        """
+        self.root = root
+        self.on_changes = on_changes
+        self.skip_name = skip_name or (lambda name: False)
+        self.scan_filter = scan_filter
+        self.debouncer = PathDebouncer(debounce_seconds, max_delay)
+        self.use_polling = use_polling or not WATCHDOG_AVAILABLE
+        self.poll_interval = poll_interval
+        self.scan_workers = scan_workers
+
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._observer = None
+
+    @property
+    def mode(self) -> str:
+        return "polling" if self.use_polling else "watchdog"
+
+    def start(self):
+        """开始监听"""
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(f"监听路径不存在: {self.root}")
+
+        self._stop_event.clear()
+        if self.use_polling:
+            walker = ParallelDirWalker(
+                max_workers=self.scan_workers,
+                skip_name=self.skip_name,
+                scan_filter=self.scan_filter
+            )
+            source = _PollingSource(self.root, self.debouncer, self.poll_interval, walker)
+            source.prime()
+            self._start_thread(lambda: source.run(self._stop_event), "fs-watch-poll")
+        else:
+            self._observer = Observer()
+            self._observer.schedule(_WatchdogHandler(self.debouncer), self.root, recursive=True)
+            self._observer.start()
+
+        self._start_thread(self._dispatch_loop, "fs-watch-dispatch")
+        logger.info(f"文件监听已启动: {self.root} (模式: {self.mode})")
+
+    def stop(self):
+        """停止监听（交付剩余事件后返回）"""
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._dispatch(self.debouncer.pop_ready(now=float("inf")))
+        logger.info("文件监听已停止")
+
+    def run_forever(self):
+        """启动并阻塞运行，直到 KeyboardInterrupt"""
+        self.start()
+        try:
+            while not self._stop_event.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _start_thread(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _dispatch_loop(self):
+        tick = min(0.5, self.debouncer.quiet_period)
+        while not self._stop_event.wait(tick):
+            self._dispatch(self.debouncer.pop_ready())
+
+    def _dispatch(self, paths: List[str]):
+        paths = [path for path in paths if not self._is_skipped(path)]
+        if not paths:
+            return
+        try:
+            self.on_changes(paths)
+        except Exception as e:
+            logger.error(f"处理文件变化失败（{len(paths)} 个路径）: {e}")
+
+    def _is_skipped(self, path: str) -> bool:
+        if self.scan_filter is not None and self.scan_filter.is_excluded_path(path):
+            return True
+        rel = os.path.relpath(path, self.root)
+        return any(self.skip_name(part) for part in rel.split(os.sep) if part not in (".", ".."))
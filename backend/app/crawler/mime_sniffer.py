@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MIME 类型嗅探 - 只读取文件开头几 KB 校验内容与扩展名是否相符
+
+优先使用 libmagic（python-magic），不可用时回退到内置的文件头签名表。
+结果按 (inode, mtime, size) 缓存，未变化的文件不会重复读取。
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# python-magic 依赖系统 libmagic，为可选依赖
+try:
+    import magic
+    MAGIC_AVAILABLE = True
+except ImportError:
+    MAGIC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 默认读取的文件头字节数
+SNIFF_BYTES = 8192
+
+_ZIP_TYPES = {"application/zip", "application/x-zip-compressed"}
+_OLE_TYPES = {"application/x-ole-storage", "application/cdfv2", "application/vnd.ms-office"}
+
+# 各扩展名可接受的 MIME 类型（以 "/" 结尾表示前缀匹配）
+EXPECTED_MIME_TYPES: Dict[str, set] = {
+    ".pdf": {"application/pdf", "application/x-pdf"},
+    ".docx": {"application/vnd.openxmlformats-officedocument.wordprocessingml.document"} | _ZIP_TYPES,
+    ".pptx": {"application/vnd.openxmlformats-officedocument.presentationml.presentation"} | _ZIP_TYPES,
+    ".xlsx": {"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"} | _ZIP_TYPES,
+    ".doc": {"application/msword"} | _OLE_TYPES,
+    ".xls": {"application/vnd.ms-excel"} | _OLE_TYPES,
+    ".txt": {"text/", "application/json"},
+    ".md": {"text/"},
+}
+
+# 文本类文件中明显属于其他格式的类型（如下载失败保存下来的网页）
+_TEXT_REJECT_TYPES = {"text/html", "text/xml"}
+
+# libmagic 不可用时使用的文件头签名
+_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"Rar!", "application/x-rar"),
+    (b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+)
+
+
+class MimeCheck(NamedTuple):
+    """MIME 校验结果"""
+    mime_type: str
+    valid: bool
+
+
+def sniff_buffer(head: bytes) -> str:
+    """根据文件头判断 MIME 类型"""
+    if not head:
+        return "application/x-empty"
+
+    if MAGIC_AVAILABLE:
+        try:
+            mime_type = magic.from_buffer(head, mime=True)
+            # 部分版本的 libmagic 对 OOXML 等格式只返回 octet-stream，再用签名表细分
+            if mime_type != "application/octet-stream":
+                return mime_type
+        except Exception as e:
+            logger.debug(f"libmagic 识别失败，使用内置签名: {e}")
+
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+
+    stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if stripped.startswith((b"<!doctype html", b"<html")):
+        return "text/html"
+    if stripped.startswith(b"<?xml"):
+        return "text/xml"
+    if b"\x00" in head and not head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "application/octet-stream"
+    return "text/plain"
+
+
+def is_expected_mime(extension: str, mime_type: str) -> bool:
+    """判断 MIME 类型与扩展名是否相符（未登记的扩展名不做限制）"""
+    expected = EXPECTED_MIME_TYPES.get(extension)
+    if expected is None:
+        return True
+
+    mime_type = (mime_type or "").lower()
+    if mime_type == "application/x-empty":
+        return False
+    if "text/" in expected and mime_type in _TEXT_REJECT_TYPES:
+        return False
+    return any(
+        mime_type.startswith(item) if item.endswith("/") else mime_type == item
+        for item in expected
+    )
+
+
+class MimeSniffer:
+    """带 (inode, mtime, size) 缓存的 MIME 嗅探器（线程安全）"""
+
+    def __init__(self, sniff_bytes: int = SNIFF_BYTES, max_entries: int = 100000):
+        """
+        Args:
+            sniff_bytes: 读取的文件头字节数
+            max_entries: 缓存的最大条目数（超出后淘汰最久未使用的）
+        """
+        self.sniff_bytes = sniff_bytes
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[int, float, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "sniffed": 0, "errors": 0}
+
+    def sniff(self, file_path: str, inode: int, mtime: float, size: int) -> Optional[str]:
+        """返回文件的 MIME 类型；文件无法读取时返回 None"""
+        key = (inode, mtime, size)
+        with self._lock:
+            mime_type = self._cache.get(key)
+            if mime_type is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return mime_type
+
+        try:
+            with open(file_path, "rb") as f:
+                head = f.read(self.sniff_bytes)
+        except OSError as e:
+            logger.warning(f"读取文件头失败 {file_path}: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return None
+
+        mime_type = sniff_buffer(head)
+        with self._lock:
+            self.stats["sniffed"] += 1
+            self._cache[key] = mime_type
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return mime_type
+
+    def check(self, file_path: str, extension: str, inode: int, mtime: float, size: int) -> Optional[MimeCheck]:
+        """嗅探并校验 MIME 类型与扩展名是否相符；无法读取时返回 None"""
+        mime_type = self.sniff(file_path, inode, mtime, size)
+        if mime_type is None:
+            return None
+        return MimeCheck(mime_type, is_expected_mime(extension, mime_type))
+
+
+# 进程内共享的嗅探器（缓存在多次扫描之间复用）
+_sniffer_instance: Optional[MimeSniffer] = None
+_sniffer_lock = threading.Lock()
+
+
+def get_mime_sniffer() -> MimeSniffer:
+    """获取进程内共享的 MIME 嗅探器"""
+    global _sniffer_instance
+    if _sniffer_instance is None:
+        with _sniffer_lock:
+            if _sniffer_instance is None:
+                _sniffer_instance = MimeSniffer()
+    return _sniffer_instance
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描检查点 - 定期保存遍历前沿，扫描中断后从检查点继续
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+class ScanCheckpoint:
+    """
+    单个扫描根目录的检查点文件
+
+    广度优先遍历中，前沿（已排队但尚未列举的目录）之外的目录都已处理完毕，
+    因此检查点只需保存前沿和若干计数。调用方应先提交数据库事务再保存检查点：
+    两者之间崩溃时，恢复后会重新列举少量已写入的目录，结果仍然正确（按未变化处理）。
+    """
+
+    def __init__(self, checkpoint_dir: str, root: str, interval: float = 30.0, scope: str = "scan"):
+        """
+        Args:
+            checkpoint_dir: 检查点文件目录
+            root: 扫描根目录
+            interval: 两次保存之间的最小间隔（秒）
+            scope: 区分不同扫描入口（如 celery / minimal_server）
+        """
+        self.root = root
+        self.interval = interval
+        self.scope = scope
+        key = hashlib.md5(f"{scope}:{root}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(checkpoint_dir, f"{scope}_{key}.json")
+        self._last_saved = time.monotonic()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """读取检查点；不存在或与当前根目录不符时返回 None"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取扫描检查点失败，将重新扫描 {self.path}: {e}")
+            return None
+
+        if data.get("version") != CHECKPOINT_VERSION or data.get("root") != self.root:
+            return None
+        data["frontier"] = [tuple(item) for item in data.get("frontier", [])]
+        return data
+
+    def due(self) -> bool:
+        """距上次保存是否已超过间隔"""
+        return time.monotonic() - self._last_saved >= self.interval
+
+    def save(self, frontier: List[Tuple[str, int]], completed_dirs: int,
+             stats: Optional[Dict[str, Any]] = None):
+        """
+        原子写入检查点（先写临时文件再替换）
+
+        Args:
+            frontier: 待列举的目录 [(路径, 深度)]
+            completed_dirs: 已处理完的目录数
+            stats: 需要在恢复后延续的计数
+        """
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "root": self.root,
+            "scope": self.scope,
+            "saved_at": datetime.now().isoformat(),
+            "frontier": [list(item) for item in frontier],
+            "completed_dirs": completed_dirs,
+            "stats": stats or {}
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._last_saved = time.monotonic()
+
+    def clear(self):
+        """扫描完成后删除检查点"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
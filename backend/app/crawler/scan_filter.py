@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描过滤规则 - gitignore 风格的包含/排除模式、文件大小过滤与每目录文件数上限
+
+规则在列举目录时逐项判断：被排除的文件夹不会再被列举，
+被排除的文件也不会再获取 stat 信息。
+"""
+
+import os
+import re
+import logging
+import threading
+from typing import Iterable, List, NamedTuple, Optional, Pattern
+
+logger = logging.getLogger(__name__)
+
+
+class IgnoreRule(NamedTuple):
+    """单条 gitignore 风格规则"""
+    pattern: str
+    regex: Pattern
+    negate: bool
+    dir_only: bool
+
+
+def _translate(pattern: str) -> str:
+    """把 gitignore 通配符转换为正则（* 不跨目录，** 可匹配任意层目录）"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 2] == "**":
+                if pattern[i + 2:i + 3] == "/":
+                    out.append("(?:.*/)?")
+                    i += 3
+                else:
+                    out.append(".*")
+                    i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def compile_rule(line: str) -> Optional[IgnoreRule]:
+    """编译一行规则；空行和注释返回 None"""
+    pattern = line.rstrip("\r\n").rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    body = pattern.rstrip("/")
+    if not body:
+        return None
+
+    # 含有 / 的规则相对扫描根目录匹配，否则匹配任意层级的名称
+    anchored = "/" in body
+    body = body.lstrip("/")
+    prefix = "^" if anchored else "^(?:.*/)?"
+    regex = re.compile(prefix + _translate(body) + "$")
+    return IgnoreRule(line.strip(), regex, negate, dir_only)
+
+
+def compile_rules(lines: Iterable[str]) -> List[IgnoreRule]:
+    return [rule for rule in (compile_rule(line) for line in lines) if rule is not None]
+
+
+def _match(rules: List[IgnoreRule], rel_path: str, is_dir: Optional[bool]) -> bool:
+    """按 gitignore 语义判断是否命中（后出现的规则优先，! 表示取消）"""
+    matched = False
+    for rule in rules:
+        if rule.dir_only and is_dir is False:
+            continue
+        if rule.regex.match(rel_path):
+            matched = not rule.negate
+    return matched
+
+
+class ScanFilter:
+    """
+    单个扫描根目录的过滤规则
+
+    - exclude: 排除规则，命中的文件夹整棵子树都不会被遍历
+    - include: 包含规则，非空时只保留命中的文件（文件夹不受影响）
+    - extensions: 只保留这些扩展名的文件（按名称判断，无需 stat）
+    - min_file_size / max_file_size: 文件大小范围（0 表示不限制）
+    - max_files_per_dir: 每个目录最多保留的文件数（按名称排序，0 表示不限制）
+    """
+
+    def __init__(
+        self,
+        root: str,
+        exclude: Iterable[str] = (),
+        include: Iterable[str] = (),
+        extensions: Optional[Iterable[str]] = None,
+        min_file_size: int = 0,
+        max_file_size: int = 0,
+        max_files_per_dir: int = 0
+    ):
+        self.root = os.path.normpath(root)
+        self.exclude_rules = compile_rules(exclude)
+        self.include_rules = compile_rules(include)
+        self.extensions = {ext.lower() for ext in extensions} if extensions is not None else None
+        self.min_file_size = min_file_size
+        self.max_file_size = max_file_size
+        self.max_files_per_dir = max_files_per_dir
+        self.stats = {"excluded_dirs": 0, "excluded_files": 0, "capped_files": 0}
+        self._lock = threading.Lock()
+
+    def load_ignore_file(self, file_name: str) -> int:
+        """追加扫描根目录下忽略文件（如 .scanignore）中的排除规则，返回规则数"""
+        path = os.path.join(self.root, file_name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rules = compile_rules(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"读取忽略规则文件失败 {path}: {e}")
+            return 0
+        self.exclude_rules.extend(rules)
+        return len(rules)
+
+    def relpath(self, path: str) -> str:
+        """相对扫描根目录的路径（统一使用 /，根目录为空字符串）"""
+        path = os.path.normpath(path)
+        if path == self.root:
+            return ""
+        rel = os.path.relpath(path, self.root)
+        return rel.replace(os.sep, "/")
+
+    def is_excluded(self, path: str, is_dir: Optional[bool]) -> bool:
+        """按排除规则判断单个条目（父目录已由遍历时的剪枝保证未被排除）"""
+        rel = self.relpath(path)
+        if not rel or not self.exclude_rules:
+            return False
+        excluded = _match(self.exclude_rules, rel, is_dir)
+        if excluded:
+            self._count("excluded_dirs" if is_dir else "excluded_files")
+        return excluded
+
+    def is_excluded_path(self, path: str) -> bool:
+        """
+        判断任意路径是否被排除（含祖先目录）
+
+        用于文件监听等不经过遍历剪枝的场景；路径可能已被删除，
+        末级条目类型未知时按文件夹规则一并判断。
+        """
+        rel = self.relpath(path)
+        if not rel or rel.startswith(".."):
+            return False
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            if _match(self.exclude_rules, "/".join(parts[:i]), True):
+                return True
+        return _match(self.exclude_rules, rel, None)
+
+    def accepts_file(self, path: str, size: Optional[int] = None) -> bool:
+        """判断文件是否保留；size 为 None 时只按名称判断（获取 stat 之前）"""
+        if self.extensions is not None and os.path.splitext(path)[1].lower() not in self.extensions:
+            return False
+        if self.include_rules and not _match(self.include_rules, self.relpath(path), False):
+            self._count("excluded_files")
+            return False
+        if size is not None and not self.accepts_size(size):
+            return False
+        return True
+
+    def accepts_size(self, size: int) -> bool:
+        if size < self.min_file_size or (self.max_file_size and size > self.max_file_size):
+            self._count("excluded_files")
+            return False
+        return True
+
+    def cap_files(self, dir_path: str, file_count: int) -> int:
+        """返回该目录应保留的文件数（超出上限时记录日志）"""
+        if not self.max_files_per_dir or file_count <= self.max_files_per_dir:
+            return file_count
+        dropped = file_count - self.max_files_per_dir
+        self._count("capped_files", dropped)
+        logger.warning(f"目录文件数超过上限 {self.max_files_per_dir}，跳过 {dropped} 个文件: {dir_path}")
+        return self.max_files_per_dir
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
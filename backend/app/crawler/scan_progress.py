@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描进度跟踪 - 每个扫描任务独立的状态与增量事件流
+"""
+
+import json
+import uuid
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+class ScanProgress:
+    """
+    单次扫描的进度状态
+
+    状态快照只包含计数和当前路径（O(1) 大小）；新发现的节点按批
+    追加到带序号的事件缓冲区，客户端通过游标只获取增量。
+    """
+
+    def __init__(
+        self,
+        scan_id: str,
+        folder_path: str,
+        node_batch_size: int = 200,
+        max_events: int = 1000
+    ):
+        """
+        Args:
+            scan_id: 扫描任务ID
+            folder_path: 扫描根目录
+            node_batch_size: 新节点事件的批大小
+            max_events: 事件缓冲区保留的最大事件数
+        """
+        self.scan_id = scan_id
+        self.folder_path = folder_path
+        self.node_batch_size = node_batch_size
+
+        self.status = "processing"
+        self.progress = 0
+        self.current_file = ""
+        self.current_path = folder_path
+        self.total_files = 0
+        self.scanned_files = 0
+        self.total_folders = 0
+        self.start_time = datetime.now().isoformat()
+        self.end_time: Optional[str] = None
+        self.errors: List[str] = []
+
+        # 完整结果（仅供扫描结束后构建树使用，不随状态返回）
+        self.files: List[Dict[str, Any]] = []
+        self.folders: List[Dict[str, Any]] = []
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._version = 0
+        self._events: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=max_events)
+        self._node_buffer: List[Dict[str, Any]] = []
+
+    @property
+    def version(self) -> int:
+        """状态版本号，每次状态变化递增"""
+        return self._version
+
+    @property
+    def last_seq(self) -> int:
+        """最新事件序号"""
+        return self._seq
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "error")
+
+    def update(self, **fields):
+        """更新计数、当前文件等状态字段"""
+        with self._lock:
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self._version += 1
+
+    def add_error(self, message: str):
+        """记录错误"""
+        with self._lock:
+            self.errors.append(message)
+            self._version += 1
+            self._append_event("error", {"message": message})
+
+    def add_node(self, node: Dict[str, Any]):
+        """记录新发现的节点，满一批时生成 nodes 事件"""
+        with self._lock:
+            if node.get("type") == "folder":
+                self.folders.append(node)
+            else:
+                self.files.append(node)
+            self._node_buffer.append(node)
+            if len(self._node_buffer) >= self.node_batch_size:
+                self._flush_nodes()
+
+    def flush_nodes(self):
+        """把缓冲中的新节点作为事件发出"""
+        with self._lock:
+            self._flush_nodes()
+
+    def finish(self, status: str = "completed"):
+        """标记扫描结束"""
+        with self._lock:
+            self._flush_nodes()
+            self.status = status
+            if status == "completed":
+                self.progress = 100
+            self.current_file = ""
+            self.end_time = datetime.now().isoformat()
+            self._version += 1
+            self._append_event("finished", self._snapshot())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """状态快照（不含文件/文件夹列表）"""
+        with self._lock:
+            return self._snapshot()
+
+    def events_since(self, cursor: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """返回序号大于 cursor 的事件"""
+        with self._lock:
+            return [(seq, event) for seq, event in self._events if seq > cursor]
+
+    def nodes_since(self, cursor: int) -> Tuple[List[Dict[str, Any]], int]:
+        """返回游标之后新发现的节点以及新游标"""
+        nodes = []
+        last = cursor
+        for seq, event in self.events_since(cursor):
+            if event["event"] == "nodes":
+                nodes.extend(event["data"]["nodes"])
+            last = seq
+        return nodes, last
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "scan_id": self.scan_id,
+            "status": self.status,
+            "progress": self.progress,
+            "current_file": self.current_file,
+            "current_path": self.current_path,
+            "total_files": self.total_files,
+            "scanned_files": self.scanned_files,
+            "total_folders": self.total_folders,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "errors": self.errors[-20:],
+            "error_count": len(self.errors),
+            "cursor": self._seq
+        }
+
+    def _flush_nodes(self):
+        if self._node_buffer:
+            self._append_event("nodes", {"nodes": self._node_buffer})
+            self._node_buffer = []
+
+    def _append_event(self, event: str, data: Dict[str, Any]):
+        self._seq += 1
+        self._events.append((self._seq, {"event": event, "data": data}))
+
+
+def estimate_total_files(scanned_files: int, completed_dirs: int, pending_dirs: int,
+                         previous_total: int = 0) -> int:
+    """
+    单遍扫描时估算文件总数（用于进度条）
+
+    有上次扫描的计数且尚未被超过时直接沿用；否则按已完成目录的
+    平均文件数，外推到遍历前沿中待列举的目录。
+
+    Args:
+        scanned_files: 已扫描的文件数
+        completed_dirs: 已列举完的目录数
+        pending_dirs: 遍历前沿中待列举的目录数
+        previous_total: 上次扫描得到的文件数（没有时为 0）
+    """
+    if previous_total > scanned_files:
+        return previous_total
+    if completed_dirs <= 0:
+        return scanned_files
+    average = scanned_files / completed_dirs
+    return max(scanned_files, int(scanned_files + average * pending_dirs))
+
+
+class ScanProgressRegistry:
+    """扫描进度注册表，按 scan_id 隔离并发扫描的状态"""
+
+    def __init__(self, max_finished: int = 20):
+        self.max_finished = max_finished
+        self._scans: "OrderedDict[str, ScanProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, folder_path: str, **kwargs) -> ScanProgress:
+        """登记一个新的扫描任务"""
+        scan = ScanProgress(uuid.uuid4().hex, folder_path, **kwargs)
+        with self._lock:
+            self._scans[scan.scan_id] = scan
+            self._prune()
+        return scan
+
+    def get(self, scan_id: Optional[str] = None) -> Optional[ScanProgress]:
+        """按ID获取扫描任务；未指定ID时返回最近一次扫描"""
+        with self._lock:
+            if scan_id is None:
+                return next(reversed(self._scans.values()), None)
+            return self._scans.get(scan_id)
+
+    def _prune(self):
+        """只保留最近若干个已结束的扫描"""
+        finished = [sid for sid, scan in self._scans.items() if scan.finished]
+        for sid in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._scans[sid]
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """格式化一条 Server-Sent Events 消息"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
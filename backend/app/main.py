@@ -7,6 +7,7 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional
 
 # 添加项目根目录到路径
@@ -20,6 +21,7 @@ from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.data_overview import DataOverview, DataBookDetail
 from app.utils.document_parser import DocumentParser
+from app.utils.blob_store import load_deepseek_response
 
 # 创建 FastAPI 应用
 app = FastAPI(
@@ -47,6 +49,8 @@ class DocumentParseRequest(BaseModel):
     """文档解析请求"""
     file_path: str
     file_id: int
+    full_extraction: Optional[bool] = None  # 提取全文（未传时按 PARSE_FULL_EXTRACTION 配置）
+    profile: Optional[str] = None  # 解析档位 fast/standard/full（默认按扩展名配置或 PARSE_DEFAULT_PROFILE）
 
 
 class DocumentResponse(BaseModel):
@@ -119,6 +123,8 @@ async def parse_document(request: DocumentParseRequest, background_tasks: Backgr
     
     - **file_path**: 文档的完整路径
     - **file_id**: 文件 ID（用于数据库关联）
+    - **full_extraction**: 是否提取全文
+    - **profile**: 解析档位（fast/standard/full）
     """
     try:
         file_path = Path(request.file_path)
@@ -126,7 +132,10 @@ async def parse_document(request: DocumentParseRequest, background_tasks: Backgr
             raise HTTPException(status_code=404, detail=f"文件不存在: {request.file_path}")
         
         # 同步解析（快速返回）
-        result = parser.parse_document(str(file_path), request.file_id)
+        result = parser.parse_document(
+            str(file_path), request.file_id,
+            full_extraction=request.full_extraction, profile=request.profile
+        )
         
         return {
             "status": "success",
@@ -137,7 +146,7 @@ async def parse_document(request: DocumentParseRequest, background_tasks: Backgr
 
 
 @app.post("/api/v1/folders/scan", response_model=ScanResult)
-async def scan_folder(request: FolderScanRequest, background_tasks: BackgroundTasks):
+def scan_folder(request: FolderScanRequest, background_tasks: BackgroundTasks):
     """
     扫描文件夹并解析所有文档
     
@@ -165,8 +174,9 @@ async def scan_folder(request: FolderScanRequest, background_tasks: BackgroundTa
             
             results.total_files = len(document_files)
             
-            # 解析每个文件
-            for idx, file_path in enumerate(document_files):
+            # 先登记文件记录
+            records = []
+            for file_path in document_files:
                 try:
                     # 创建或更新文件记录
                     existing = db.query(DataOverview).filter(
@@ -187,15 +197,26 @@ async def scan_folder(request: FolderScanRequest, background_tasks: BackgroundTa
                         db.commit()
                         db.refresh(file_record)
                     
-                    # 解析文档
-                    parser.parse_document(str(file_path), file_record.id)
-                    
+                    records.append((file_path, file_record.id))
                     results.scanned_files += 1
-                    results.parsed_files += 1
                     
                 except Exception as e:
                     results.errors.append(f"{file_path.name}: {str(e)}")
             
+            # 并发解析：内容提取在解析进程池中执行，线程数与工作进程数一致
+            def parse_one(item):
+                file_path, file_id = item
+                parser.parse_document(str(file_path), file_id)
+            
+            with ThreadPoolExecutor(max_workers=parser.engine.max_workers) as pool:
+                futures = {pool.submit(parse_one, item): item[0] for item in records}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        results.parsed_files += 1
+                    except Exception as e:
+                        results.errors.append(f"{futures[future].name}: {str(e)}")
+            
             return results
             
         finally:
@@ -265,10 +286,10 @@ async def get_document_detail(document_id: int):
         if not detail:
             raise HTTPException(status_code=404, detail="文档详情不存在")
         
-        # 提取置信度
-        confidence_score = None
-        if detail.deepseek_response:
-            confidence_score = detail.deepseek_response.get('confidence_score')
+        # 提取置信度（旧数据未保存该列时从原始响应读取）
+        confidence_score = detail.confidence_score
+        if confidence_score is None:
+            confidence_score = (load_deepseek_response(db, document_id) or {}).get('confidence_score')
         
         return DocumentDetailResponse(
             id=detail.id,
@@ -287,6 +308,26 @@ async def get_document_detail(document_id: int):
         db.close()
 
 
+@app.get("/api/v1/documents/{document_id}/tables")
+def get_document_tables(document_id: int):
+    """
+    获取文档中的表格（首次访问时提取并缓存）
+    
+    - **document_id**: 文档 ID
+    """
+    try:
+        tables = parser.get_tables(document_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"提取表格失败: {str(e)}")
+    if tables is None:
+        raise HTTPException(status_code=404, detail="文档不存在")
+    return {
+        "document_id": document_id,
+        "table_count": len(tables),
+        "tables": tables
+    }
+
+
 @app.get("/api/v1/search")
 async def search_documents(
     q: str = Query(..., min_length=1),
@@ -356,6 +397,18 @@ async def get_system_stats():
         db.close()
 
 
+@app.get("/api/v1/system/llm-limits")
+async def get_llm_limits():
+    """
+    获取 DeepSeek 调用的当前限额（本机各进程共享的令牌桶余量和自适应并发上限）
+    """
+    from app.utils.rate_limiter import get_rate_limiter
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **limiter.get_stats()}
+
+
 # ==================== 三维度图谱API ====================
 
 @app.get("/api/v1/graph/dimension/{dimension}")
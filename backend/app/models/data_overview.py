@@ -4,8 +4,8 @@
 data_overview 表模型 - 文件和文件夹信息
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey, Float, LargeBinary
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.models.base import BaseModel
 
@@ -27,6 +27,8 @@ class DataOverview(BaseModel):
     modified_time = Column(DateTime, nullable=True, comment="文件修改时间")
     is_deleted = Column(Boolean, default=False, comment="是否删除")
     doc_metadata = Column(JSON, nullable=True, comment="额外元数据")
+    content_hash = Column(String(64), nullable=True, index=True, comment="内容指纹（识别重复文件）")
+    mime_type = Column(String(100), nullable=True, comment="嗅探得到的MIME类型")
     
     # 索引
     __table_args__ = (
@@ -54,7 +56,8 @@ class DataBookDetail(BaseModel):
     experiment_flow = Column(Text, nullable=True, comment="实验流程概述")
     statistical_methods = Column(JSON, nullable=True, comment="使用的统计方法")
     conclusion = Column(Text, nullable=True, comment="研究结论")
-    full_text = Column(Text, nullable=True, comment="全文存储（可选）")
+    # 旧数据的全文（新的解析结果压缩存储在 data_book_blob，见 app.utils.blob_store）
+    full_text = deferred(Column(Text, nullable=True, comment="全文存储（旧数据，新数据见 data_book_blob）"))
     
     # 三维度图谱字段（新增）
     authors = Column(JSON, nullable=True, comment="文档作者列表（支持多作者）")
@@ -63,10 +66,13 @@ class DataBookDetail(BaseModel):
     entity_relations = Column(JSON, nullable=True, comment="实体间关系（如共现、引用）")
     
     # 解析状态
-    parse_status = Column(String(20), default="pending", comment="解析状态：pending/processing/completed/failed")
+    parse_status = Column(String(20), default="pending", comment="解析状态：pending/processing/completed/failed/rejected")
     parse_time = Column(DateTime, nullable=True, comment="解析时间")
     parse_error = Column(Text, nullable=True, comment="解析错误信息")
-    deepseek_response = Column(JSON, nullable=True, comment="DeepSeek API原始响应")
+    deepseek_response = deferred(Column(JSON, nullable=True, comment="DeepSeek API原始响应（旧数据，新数据见 data_book_blob）"))
+    confidence_score = Column(Float, nullable=True, comment="DeepSeek 分析置信度")
+    parse_profile = Column(String(20), nullable=True, comment="解析档位：fast/standard/full")
+    tables = deferred(Column(JSON, nullable=True, comment="提取的表格（按需提取后缓存，NULL 表示尚未提取）"))
     
     # 索引
     __table_args__ = (
@@ -74,4 +80,19 @@ class DataBookDetail(BaseModel):
     )
     
     # 关系
-    file_info = relationship("DataOverview", back_populates="book_detail")
\ No newline at end of file
+    file_info = relationship("DataOverview", back_populates="book_detail")
+
+
+class DataBookBlob(BaseModel):
+    """解析大字段表（压缩存储全文和 DeepSeek 原始响应，按需读取）"""
+    __tablename__ = "data_book_blob"
+    
+    file_id = Column(Integer, ForeignKey("data_overview.id", ondelete="CASCADE"), nullable=False, unique=True, index=True, comment="关联data_overview表")
+    codec = Column(String(10), nullable=False, comment="压缩算法：zstd/zlib")
+    full_text = Column(LargeBinary, nullable=True, comment="压缩后的全文")
+    deepseek_response = Column(LargeBinary, nullable=True, comment="压缩后的DeepSeek原始响应（JSON）")
+    raw_size = Column(Integer, nullable=True, comment="压缩前字节数")
+    
+    __table_args__ = (
+        {"comment": "解析大字段表"},
+    )
@@ -58,10 +58,9 @@ celery_app.conf.update(
     task_soft_time_limit=1800,  # 30分钟
     task_time_limit=3600,  # 1小时
     
-    # 错误处理
+    # 错误处理（DeepSeek 调用由 app.utils.rate_limiter 按实际额度限流，任务本身不再限速）
     task_annotations={
         "*": {
-            "rate_limit": "10/m",  # 每分钟最多10个任务
             "max_retries": 3,
         }
     },
@@ -8,7 +8,6 @@ import logging
 from celery import shared_task
 from celery.exceptions import Retry
 from datetime import datetime, timedelta
-import time
 
 from app.utils.document_parser import DocumentParser
 from app.crawler.file_scanner import FileScanner
@@ -203,9 +202,9 @@ def batch_process_documents(self, file_ids: list = None, limit: int = 10):
             supported_extensions = settings.SUPPORTED_EXTENSIONS
             query = query.filter(DataOverview.file_extension.in_(supported_extensions))
             
-            # 排除已解析的文档
+            # 排除已解析的文档，以及扫描时判定内容与扩展名不符的文档
             subquery = db_session.query(DataBookDetail.file_id).filter(
-                DataBookDetail.parse_status == "completed"
+                DataBookDetail.parse_status.in_(["completed", "rejected"])
             ).subquery()
             query = query.filter(~DataOverview.id.in_(subquery))
             
@@ -231,9 +230,6 @@ def batch_process_documents(self, file_ids: list = None, limit: int = 10):
                     process_document.delay(file_info.id)
                     processed_count += 1
                     
-                    # 避免并发过多，添加小延迟
-                    time.sleep(0.5)
-                    
                 except Exception as e:
                     logger.error(f"排队处理文件失败 {file_info.id}: {e}")
                     failed_count += 1
@@ -256,18 +252,22 @@ def batch_process_documents(self, file_ids: list = None, limit: int = 10):
         raise
 
 @shared_task(bind=True, name="scan_filesystem", queue="document_processing")
-def scan_filesystem_task(self):
+def scan_filesystem_task(self, incremental: bool = True, resume: bool = True):
     """
     文件系统扫描的异步任务
+    
+    增量模式下返回的 scan_result["changes"] 包含新增/修改/删除的文件ID，
+    可用于只对变化部分重新解析。扫描定期保存检查点，任务中断或重试时
+    从检查点继续，而不是从根目录重新遍历
     """
     task_id = self.request.id
-    logger.info(f"开始文件系统扫描任务 {task_id}")
+    logger.info(f"开始文件系统扫描任务 {task_id}, 增量: {incremental}")
     
     try:
         scanner = FileScanner()
         
         with get_db() as db_session:
-            result = scanner.scan_filesystem(db_session)
+            result = scanner.scan_filesystem(db_session, incremental=incremental, resume=resume)
             
             # 获取扫描统计信息
             stats = scanner.get_scan_statistics(db_session)
@@ -284,4 +284,5 @@ def scan_filesystem_task(self):
     except Exception as e:
         error_msg = f"文件系统扫描失败: {str(e)}"
         logger.error(f"{error_msg}, 任务: {task_id}")
-        raise self.retry(exc=e, countdown=300)  # 5分钟后重试
\ No newline at end of file
+        # 已完成的部分保存在检查点中，重试时直接继续
+        raise self.retry(exc=e, countdown=30)
\ No newline at end of file
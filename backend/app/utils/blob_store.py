@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析大字段存储 - 压缩保存全文和 DeepSeek 原始响应
+
+大字段单独存放在 data_book_blob 表中，只在需要时按 file_id 读取，
+列表和图谱查询读取 data_book_detail 时不会加载它们。
+未迁移的旧记录仍从 data_book_detail 的原列读取。
+"""
+
+import json
+import zlib
+import logging
+from typing import Dict, Optional, Tuple
+
+from app.models.data_overview import DataBookBlob, DataBookDetail
+
+# zstandard 为可选依赖，未安装时回退到 zlib
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+
+def default_codec() -> str:
+    """按配置选择压缩算法（配置为 zstd 但未安装时使用 zlib）"""
+    from app.core.config import settings
+    if settings.PARSE_BLOB_CODEC == "zstd" and ZSTD_AVAILABLE:
+        return "zstd"
+    return "zlib"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    raise ValueError(f"不支持的压缩算法: {codec}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("读取 zstd 压缩的数据需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"不支持的压缩算法: {codec}")
+
+
+def encode_blobs(full_text: Optional[str], deepseek_response: Optional[Dict], codec: str) -> Tuple[Optional[bytes], Optional[bytes], int]:
+    """压缩全文和响应，返回 (全文, 响应, 压缩前总字节数)"""
+    raw_size = 0
+    text_blob = response_blob = None
+    if full_text is not None:
+        data = full_text.encode("utf-8")
+        raw_size += len(data)
+        text_blob = compress(data, codec)
+    if deepseek_response is not None:
+        data = json.dumps(deepseek_response, ensure_ascii=False).encode("utf-8")
+        raw_size += len(data)
+        response_blob = compress(data, codec)
+    return text_blob, response_blob, raw_size
+
+
+def save_parse_blobs(db_session, file_id: int, full_text: Optional[str], deepseek_response: Optional[Dict]) -> DataBookBlob:
+    """写入（或覆盖）文件的大字段，由调用方提交事务"""
+    codec = default_codec()
+    text_blob, response_blob, raw_size = encode_blobs(full_text, deepseek_response, codec)
+
+    blob = db_session.query(DataBookBlob).filter(DataBookBlob.file_id == file_id).first()
+    if blob is None:
+        blob = DataBookBlob(file_id=file_id)
+        db_session.add(blob)
+    blob.codec = codec
+    blob.full_text = text_blob
+    blob.deepseek_response = response_blob
+    blob.raw_size = raw_size
+    return blob
+
+
+def copy_parse_blobs(db_session, source_file_id: int, file_id: int):
+    """复制来源文件的大字段（已压缩的数据直接复制，不重新压缩）"""
+    source = db_session.query(DataBookBlob).filter(DataBookBlob.file_id == source_file_id).first()
+    if source is None:
+        save_parse_blobs(
+            db_session, file_id,
+            load_full_text(db_session, source_file_id),
+            load_deepseek_response(db_session, source_file_id)
+        )
+        return
+
+    blob = db_session.query(DataBookBlob).filter(DataBookBlob.file_id == file_id).first()
+    if blob is None:
+        blob = DataBookBlob(file_id=file_id)
+        db_session.add(blob)
+    blob.codec = source.codec
+    blob.full_text = source.full_text
+    blob.deepseek_response = source.deepseek_response
+    blob.raw_size = source.raw_size
+
+
+def _load(db_session, file_id: int, column: str) -> Tuple[bool, Optional[bytes]]:
+    row = db_session.query(DataBookBlob.codec, getattr(DataBookBlob, column)).filter(
+        DataBookBlob.file_id == file_id
+    ).first()
+    if row is None:
+        return False, None
+    codec, data = row
+    return True, decompress(data, codec) if data is not None else None
+
+
+def load_full_text(db_session, file_id: int) -> Optional[str]:
+    """读取全文（无压缩记录时读取旧列）"""
+    found, data = _load(db_session, file_id, "full_text")
+    if found:
+        return data.decode("utf-8") if data is not None else None
+    return db_session.query(DataBookDetail.full_text).filter(DataBookDetail.file_id == file_id).scalar()
+
+
+def load_deepseek_response(db_session, file_id: int) -> Optional[Dict]:
+    """读取 DeepSeek 原始响应（无压缩记录时读取旧列）"""
+    found, data = _load(db_session, file_id, "deepseek_response")
+    if found:
+        return json.loads(data) if data is not None else None
+    return db_session.query(DataBookDetail.deepseek_response).filter(DataBookDetail.file_id == file_id).scalar()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块分析 - 把长文档切成按 token 预算的文本块，合并各块的 DeepSeek 分析结果
+
+切块和合并都不访问网络，由 DocumentParser 负责并发调用 API 和缓存。
+"""
+
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+# 段落 -> 行 -> 句子，依次作为切分边界
+_SENTENCE_END = re.compile(r"(?<=[。！？；.!?;])\s*")
+
+# 合并后列表字段保留的最大条数
+MERGE_LIMITS = {
+    "keywords": 20,
+    "theories": 20,
+    "statistical_methods": 20,
+    "theories_used": 20,
+    "entities": 50,
+    "entity_relations": 50,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符每字约 1 个，其他字符约 4 个一个"""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def split_chunks(text: str, max_tokens: int, max_chunks: int = 0) -> List[str]:
+    """
+    按 token 预算切分文本，尽量在段落、行、句子边界处切开
+
+    Args:
+        text: 全文
+        max_tokens: 每块的 token 上限
+        max_chunks: 最多分析的块数（0 表示不限制）；超出时在全文范围内均匀抽取，
+            保证开头、中间和结尾都被覆盖
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current_tokens
+        if current:
+            chunk = "".join(current).strip()
+            if chunk:
+                chunks.append(chunk)
+        current.clear()
+        current_tokens = 0
+
+    for piece in _pieces(text, max_tokens):
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            flush()
+        current.append(piece)
+        current_tokens += tokens
+    flush()
+
+    if max_chunks and len(chunks) > max_chunks:
+        if max_chunks == 1:
+            return chunks[:1]
+        step = (len(chunks) - 1) / (max_chunks - 1)
+        chunks = [chunks[round(i * step)] for i in range(max_chunks)]
+    return chunks
+
+
+def _pieces(text: str, max_tokens: int) -> Iterable[str]:
+    """把文本拆成不超过预算的片段（保留分隔符，拼接后与原文一致）"""
+    for paragraph in re.split(r"(?<=\n\n)", text):
+        if estimate_tokens(paragraph) <= max_tokens:
+            yield paragraph
+            continue
+        for line in paragraph.splitlines(keepends=True):
+            if estimate_tokens(line) <= max_tokens:
+                yield line
+                continue
+            for sentence in _SENTENCE_END.split(line):
+                # 没有标点的超长句子按字符硬切
+                while estimate_tokens(sentence) > max_tokens:
+                    cut = _cut_position(sentence, max_tokens)
+                    yield sentence[:cut]
+                    sentence = sentence[cut:]
+                if sentence:
+                    yield sentence
+
+
+def _cut_position(text: str, max_tokens: int) -> int:
+    low, high = 1, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _merge_counted(
+    groups: Iterable[Iterable],
+    key: Callable[[object], Optional[Hashable]],
+    weight: Callable[[object], int] = lambda item: 1,
+    combine: Optional[Callable[[object, object], object]] = None
+) -> List:
+    """
+    按 key 去重并累计出现次数，按次数降序（相同时保持首次出现的顺序）
+
+    combine(已保留的条目, 新条目) 返回合并后的条目
+    """
+    merged: "OrderedDict[Hashable, list]" = OrderedDict()
+    for items in groups:
+        for item in items or []:
+            k = key(item)
+            if k is None:
+                continue
+            if k in merged:
+                entry = merged[k]
+                entry[1] += weight(item)
+                if combine is not None:
+                    entry[0] = combine(entry[0], item)
+            else:
+                merged[k] = [item, weight(item)]
+    ordered = sorted(enumerate(merged.values()), key=lambda pair: (-pair[1][1], pair[0]))
+    return [(entry[0], entry[1]) for _, entry in ordered]
+
+
+def _text_key(value) -> Optional[str]:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip().lower()
+
+
+def _name_key(item) -> Optional[str]:
+    return _text_key(item.get("name")) if isinstance(item, dict) else None
+
+
+def merge_analyses(results: List[Dict]) -> Dict:
+    """
+    合并各块的分析结果
+
+    - keywords/theories/statistical_methods: 按出现的块数去重排序
+    - entities: 按 (名称, 类型) 去重，frequency 累加
+    - theories_used: 按名称去重，保留较长的描述
+    - entity_relations: 按 (源, 目标, 关系) 去重
+    - authors: 按首次出现顺序合并（通常来自第一块）
+    - abstract/experiment_flow: 取第一个非空值；conclusion: 取最后一个非空值
+    """
+    if not results:
+        return {}
+    if len(results) == 1:
+        return dict(results[0])
+
+    def first(field):
+        return next((r.get(field) for r in results if r.get(field)), "")
+
+    def last(field):
+        return next((r.get(field) for r in reversed(results) if r.get(field)), "")
+
+    merged = {
+        "abstract": first("abstract"),
+        "experiment_flow": first("experiment_flow"),
+        "conclusion": last("conclusion"),
+    }
+
+    for field in ("keywords", "theories", "statistical_methods"):
+        counted = _merge_counted((r.get(field) for r in results), key=_text_key)
+        merged[field] = [item.strip() for item, _ in counted[:MERGE_LIMITS[field]]]
+
+    authors: "OrderedDict[str, str]" = OrderedDict()
+    for result in results:
+        for author in result.get("authors") or []:
+            key = _text_key(author)
+            if key is not None and key not in authors:
+                authors[key] = author.strip()
+    merged["authors"] = list(authors.values())
+
+    def longer_description(kept, new):
+        if len(str(new.get("description") or "")) > len(str(kept.get("description") or "")):
+            return {**kept, "description": new.get("description")}
+        return kept
+
+    merged["theories_used"] = [
+        item for item, _ in _merge_counted(
+            (r.get("theories_used") for r in results), key=_name_key, combine=longer_description
+        )[:MERGE_LIMITS["theories_used"]]
+    ]
+
+    def entity_key(item):
+        name = _name_key(item)
+        return (name, str(item.get("type") or "")) if name is not None else None
+
+    merged["entities"] = [
+        {**item, "frequency": count} for item, count in _merge_counted(
+            (r.get("entities") for r in results), key=entity_key, weight=_frequency
+        )[:MERGE_LIMITS["entities"]]
+    ]
+
+    def relation_key(item):
+        if not isinstance(item, dict) or not item.get("source") or not item.get("target"):
+            return None
+        return (str(item["source"]).lower(), str(item["target"]).lower(), str(item.get("relation") or ""))
+
+    merged["entity_relations"] = [
+        item for item, _ in _merge_counted(
+            (r.get("entity_relations") for r in results), key=relation_key
+        )[:MERGE_LIMITS["entity_relations"]]
+    ]
+
+    scores = [r["confidence_score"] for r in results if isinstance(r.get("confidence_score"), (int, float))]
+    merged["confidence_score"] = round(sum(scores) / len(scores), 4) if scores else 0.0
+    return merged
+
+
+def _frequency(item) -> int:
+    try:
+        return max(int(item.get("frequency") or 1), 1)
+    except (TypeError, ValueError):
+        return 1
+
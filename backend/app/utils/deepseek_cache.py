@@ -3,20 +3,47 @@
 """
 DeepSeek API 响应缓存模块
 支持基于内容哈希的本地缓存和可选的 Redis 缓存
+
+磁盘缓存保存在缓存目录下的单个 SQLite（WAL）文件中：
+- 响应以 JSON 存储，每条记录带有字节数、写入时间和最近访问时间；
+- 总条数和总字节数由触发器维护在 cache_totals 表中，检查缓存大小不再扫描目录；
+- 过期清理走 cached_at 索引，命中时的访问时间先在内存中累积，再批量写回。
+内存缓存和磁盘缓存都按字节数限制大小、按最近最少使用（LRU）淘汰：
+超过上限时一次淘汰到上限的 90%，而不是每次写入都淘汰一条。
+旧版本每条一个 .cache 文件（pickle）的缓存在初始化时导入数据库并删除。
+
+同一台机器上的所有进程共用缓存目录中的数据库，get_or_compute 提供单飞（single-flight）：
+同一内容同时只有一个调用方计算（请求 API），进程内的其他线程等待该线程，
+其他进程通过 cache_leases 表中的租约得知正在计算，轮询等待结果写入。
 """
 
 import os
 import json
+import time
+import sqlite3
 import hashlib
 import logging
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, Optional, Any, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import threading
 import pickle
 
 logger = logging.getLogger(__name__)
 
+# 缓存数据库文件名
+CACHE_DB_NAME = "cache.db"
+# 访问时间批量写回：累积条数或距上次写回的秒数达到任一阈值时写入
+TOUCH_BATCH_SIZE = 64
+TOUCH_FLUSH_SECONDS = 5.0
+# 导入旧版缓存文件时每个事务写入的条数
+LEGACY_IMPORT_BATCH = 500
+# 超过大小上限时淘汰到上限的该比例，下一次淘汰前可以再写入约 10% 的数据
+EVICT_TARGET_RATIO = 0.9
+# 等待其他进程计算结果时的轮询间隔（秒）
+SINGLE_FLIGHT_POLL_SECONDS = 0.2
+
 
 class DeepSeekCache:
     """DeepSeek API 响应缓存管理器"""
@@ -26,7 +53,9 @@ class DeepSeekCache:
         cache_dir: str = None,
         max_cache_size_mb: int = 500,
         cache_ttl_hours: int = 168,  # 默认7天
-        enable_cache: bool = True
+        enable_cache: bool = True,
+        max_memory_cache_mb: float = 32,
+        lease_seconds: float = 600
     ):
         """
         初始化缓存管理器
@@ -36,9 +65,13 @@ class DeepSeekCache:
             max_cache_size_mb: 最大缓存大小（MB）
             cache_ttl_hours: 缓存有效期（小时）
             enable_cache: 是否启用缓存
+            max_memory_cache_mb: 内存缓存的最大大小（MB）
+            lease_seconds: 单飞计算租约的有效期（秒），持有租约的进程崩溃后最多阻塞其他进程这么久
         """
         self.enable_cache = enable_cache
         self.max_cache_size_mb = max_cache_size_mb
+        self.max_memory_cache_mb = max_memory_cache_mb
+        self.lease_seconds = lease_seconds
         self.cache_ttl = timedelta(hours=cache_ttl_hours)
         
         # 设置缓存目录
@@ -50,23 +83,131 @@ class DeepSeekCache:
         
         # 确保缓存目录存在
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / CACHE_DB_NAME
         
-        # 内存缓存（用于快速访问最近使用的缓存）
-        self._memory_cache: Dict[str, Dict] = {}
+        # 内存缓存（用于快速访问最近使用的缓存），按访问顺序排列，最近使用的在末尾
+        self._memory_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._memory_sizes: Dict[str, int] = {}
+        self._memory_bytes = 0
         self._memory_cache_lock = threading.Lock()
-        self._max_memory_cache_items = 100
+        
+        # 每个线程一个数据库连接；待写回的访问时间
+        self._local = threading.local()
+        self._pending_touches: Dict[str, float] = {}
+        self._touch_lock = threading.Lock()
+        self._last_touch_flush = time.monotonic()
+        
+        # 进程内正在计算的缓存键（同键的其他线程等待该事件）
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
         
         # 统计信息
         self._stats = {
             "hits": 0,
             "misses": 0,
-            "evictions": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "expired_removed": 0,
+            "single_flight_computed": 0,
+            "single_flight_waited": 0,
             "total_requests": 0
         }
         self._stats_lock = threading.Lock()
         
+        self._init_db()
+        self._import_legacy_files()
+        
         logger.info(f"DeepSeek缓存初始化完成，缓存目录: {self.cache_dir}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接（fork 后的子进程重新连接）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+    
+    def _init_db(self):
+        """创建缓存表、索引和维护总量的触发器"""
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                cached_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_cached_at ON cache_entries (cached_at);
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed_at ON cache_entries (accessed_at);
+
+            CREATE TABLE IF NOT EXISTS cache_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                entries INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO cache_totals (id, entries, bytes) VALUES (1, 0, 0);
+
+            CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries BEGIN
+                UPDATE cache_totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries BEGIN
+                UPDATE cache_totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS cache_entries_update AFTER UPDATE OF size ON cache_entries BEGIN
+                UPDATE cache_totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 1;
+            END;
+
+            CREATE TABLE IF NOT EXISTS cache_leases (
+                cache_key TEXT PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                expires REAL NOT NULL
+            );
+        """)
+    
+    def _import_legacy_files(self):
+        """把旧版每条一个 .cache 文件的缓存导入数据库（已存在的键保留数据库中的记录）"""
+        legacy_files = list(self.cache_dir.glob("*.cache"))
+        if not legacy_files:
+            return
+        
+        conn = self._connect()
+        imported = 0
+        for start in range(0, len(legacy_files), LEGACY_IMPORT_BATCH):
+            rows = []
+            for cache_file in legacy_files[start:start + LEGACY_IMPORT_BATCH]:
+                try:
+                    with open(cache_file, 'rb') as f:
+                        cached_data = pickle.load(f)
+                    cached_at = datetime.fromisoformat(cached_data["cached_at"]).timestamp()
+                    value = self._encode(cached_data.get("response"), cached_data.get("metadata"))
+                    rows.append((cache_file.stem, cached_data.get("model"), value, len(value), cached_at, cached_at))
+                except FileNotFoundError:
+                    # 其他进程已经导入
+                    continue
+                except Exception as e:
+                    logger.warning(f"旧版缓存文件无法导入，已丢弃: {cache_file.name}: {e}")
+            
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO cache_entries (cache_key, model, value, size, cached_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(cache_key) DO NOTHING",
+                    rows
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            imported += len(rows)
+            
+            for cache_file in legacy_files[start:start + LEGACY_IMPORT_BATCH]:
+                cache_file.unlink(missing_ok=True)
+        
+        logger.info(f"已将 {imported} 个旧版缓存文件导入 {self.db_path.name}")
+    
     def _generate_cache_key(self, content: str, model: str = "deepseek-chat") -> str:
         """
         生成缓存键（基于内容哈希）
@@ -74,7 +215,7 @@ class DeepSeekCache:
         Args:
             content: 文档内容
             model: 使用的模型名称
-            
+        
         Returns:
             缓存键字符串
         """
@@ -83,9 +224,26 @@ class DeepSeekCache:
         # 组合模型名称生成唯一键
         return f"deepseek_{model}_{content_hash}"
     
-    def _get_cache_file_path(self, cache_key: str) -> Path:
-        """获取缓存文件路径"""
-        return self.cache_dir / f"{cache_key}.cache"
+    @staticmethod
+    def _encode(response: Any, metadata: Optional[Dict]) -> bytes:
+        """序列化缓存值（JSON）"""
+        return json.dumps(
+            {"response": response, "metadata": metadata or {}},
+            ensure_ascii=False,
+            default=str
+        ).encode("utf-8")
+    
+    @staticmethod
+    def _decode(cache_key: str, model: str, value: bytes, cached_at: float) -> Dict:
+        """还原为与内存缓存相同结构的缓存数据"""
+        payload = json.loads(value)
+        return {
+            "cache_key": cache_key,
+            "cached_at": datetime.fromtimestamp(cached_at).isoformat(),
+            "model": model,
+            "response": payload.get("response"),
+            "metadata": payload.get("metadata") or {}
+        }
     
     def _is_cache_valid(self, cache_data: Dict) -> bool:
         """
@@ -93,7 +251,7 @@ class DeepSeekCache:
         
         Args:
             cache_data: 缓存数据
-            
+        
         Returns:
             是否有效
         """
@@ -115,7 +273,7 @@ class DeepSeekCache:
         Args:
             content: 文档内容
             model: 使用的模型名称
-            
+        
         Returns:
             缓存的响应数据，如果不存在或已过期则返回 None
         """
@@ -125,36 +283,44 @@ class DeepSeekCache:
         self._update_stats("total_requests")
         cache_key = self._generate_cache_key(content, model)
         
+        response = self._lookup(cache_key)
+        self._update_stats("hits" if response is not None else "misses")
+        return response
+    
+    def _lookup(self, cache_key: str) -> Optional[Dict]:
+        """按缓存键依次查找内存缓存和磁盘缓存（不计入命中统计）"""
         # 1. 先检查内存缓存
         with self._memory_cache_lock:
             if cache_key in self._memory_cache:
                 cached_data = self._memory_cache[cache_key]
                 if self._is_cache_valid(cached_data):
-                    self._update_stats("hits")
+                    self._memory_cache.move_to_end(cache_key)
+                    self._touch(cache_key)
                     logger.debug(f"内存缓存命中: {cache_key[:20]}...")
                     return cached_data.get("response")
         
         # 2. 检查磁盘缓存
-        cache_file = self._get_cache_file_path(cache_key)
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT model, value, cached_at FROM cache_entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is not None:
+                cached_data = self._decode(cache_key, *row)
                 
                 if self._is_cache_valid(cached_data):
-                    self._update_stats("hits")
                     # 加载到内存缓存
-                    self._add_to_memory_cache(cache_key, cached_data)
+                    self._add_to_memory_cache(cache_key, cached_data, len(row[1]))
+                    self._touch(cache_key)
                     logger.debug(f"磁盘缓存命中: {cache_key[:20]}...")
                     return cached_data.get("response")
                 else:
-                    # 缓存过期，删除文件
-                    cache_file.unlink()
+                    # 缓存过期，删除记录
+                    conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (cache_key,))
                     logger.debug(f"缓存已过期，已删除: {cache_key[:20]}...")
-            except Exception as e:
-                logger.warning(f"读取缓存文件失败: {e}")
+        except Exception as e:
+            logger.warning(f"读取磁盘缓存失败: {e}")
         
-        self._update_stats("misses")
         return None
     
     def set(
@@ -172,7 +338,7 @@ class DeepSeekCache:
             response: API 响应数据
             model: 使用的模型名称
             metadata: 额外的元数据
-            
+        
         Returns:
             是否保存成功
         """
@@ -180,23 +346,29 @@ class DeepSeekCache:
             return False
         
         cache_key = self._generate_cache_key(content, model)
+        now = time.time()
         
         cache_data = {
             "cache_key": cache_key,
-            "cached_at": datetime.now().isoformat(),
+            "cached_at": datetime.fromtimestamp(now).isoformat(),
             "model": model,
             "response": response,
             "metadata": metadata or {}
         }
         
         try:
-            # 1. 保存到磁盘
-            cache_file = self._get_cache_file_path(cache_key)
-            with open(cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
+            # 1. 保存到磁盘（覆盖同键记录，触发器同步更新总字节数）
+            value = self._encode(response, metadata)
+            self._connect().execute(
+                "INSERT INTO cache_entries (cache_key, model, value, size, cached_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET model = excluded.model, value = excluded.value, "
+                "size = excluded.size, cached_at = excluded.cached_at, accessed_at = excluded.accessed_at",
+                (cache_key, model, value, len(value), now, now)
+            )
             
             # 2. 保存到内存缓存
-            self._add_to_memory_cache(cache_key, cache_data)
+            self._add_to_memory_cache(cache_key, cache_data, len(value))
             
             logger.debug(f"缓存已保存: {cache_key[:20]}...")
             
@@ -204,80 +376,252 @@ class DeepSeekCache:
             self._check_and_clean_cache()
             
             return True
-            
+        
         except Exception as e:
             logger.error(f"保存缓存失败: {e}")
             return False
     
-    def _add_to_memory_cache(self, cache_key: str, cache_data: Dict):
-        """添加到内存缓存"""
+    def get_or_compute(
+        self,
+        content: str,
+        compute: Callable[[], Dict],
+        model: str = "deepseek-chat",
+        metadata: Dict = None
+    ) -> Tuple[Dict, bool]:
+        """
+        读取缓存，未命中时计算并写入缓存（同一内容在所有进程中同时只计算一次）
+        
+        Args:
+            content: 文档内容
+            compute: 计算响应的函数（抛出异常时不写入缓存，等待的调用方接着自行计算）
+            model: 使用的模型名称
+            metadata: 额外的元数据
+            
+        Returns:
+            (响应数据, 是否来自缓存或其他调用方的计算结果)
+        """
+        if not self.enable_cache:
+            return compute(), False
+        
+        response = self.get(content, model)
+        if response is not None:
+            return response, True
+        
+        cache_key = self._generate_cache_key(content, model)
+        while True:
+            # 进程内：同键只有一个线程去竞争跨进程租约，其他线程等待
+            with self._inflight_lock:
+                event = self._inflight.get(cache_key)
+                leader = event is None
+                if leader:
+                    event = self._inflight[cache_key] = threading.Event()
+            
+            if not leader:
+                event.wait(timeout=self.lease_seconds)
+                response = self._lookup(cache_key)
+                if response is not None:
+                    self._update_stats("single_flight_waited")
+                    return response, True
+                # 计算失败，由下一个调用方重新计算
+                continue
+            
+            try:
+                return self._compute_with_lease(cache_key, content, compute, model, metadata)
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[cache_key]
+                event.set()
+    
+    def _compute_with_lease(
+        self,
+        cache_key: str,
+        content: str,
+        compute: Callable[[], Dict],
+        model: str,
+        metadata: Optional[Dict]
+    ) -> Tuple[Dict, bool]:
+        """取得跨进程租约后计算；其他进程持有租约时轮询等待其结果"""
+        while not self._acquire_lease(cache_key):
+            time.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+            response = self._lookup(cache_key)
+            if response is not None:
+                self._update_stats("single_flight_waited")
+                return response, True
+        
+        try:
+            # 取得租约前其他进程可能刚写入结果
+            response = self._lookup(cache_key)
+            if response is not None:
+                self._update_stats("single_flight_waited")
+                return response, True
+            
+            response = compute()
+            self.set(content, response, model, metadata)
+            self._update_stats("single_flight_computed")
+            return response, False
+        finally:
+            self._release_lease(cache_key)
+    
+    def _acquire_lease(self, cache_key: str) -> bool:
+        """取得缓存键的计算租约（已过期或持有进程已退出的租约可以接管）"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT pid, expires FROM cache_leases WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is not None and row[1] > now and row[0] != os.getpid() and _pid_alive(row[0]):
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_leases (cache_key, pid, expires) VALUES (?, ?, ?)",
+                (cache_key, os.getpid(), now + self.lease_seconds)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _release_lease(self, cache_key: str):
+        try:
+            self._connect().execute(
+                "DELETE FROM cache_leases WHERE cache_key = ? AND pid = ?", (cache_key, os.getpid())
+            )
+        except Exception as e:
+            logger.warning(f"释放缓存计算租约失败: {e}")
+    
+    def _add_to_memory_cache(self, cache_key: str, cache_data: Dict, size: int):
+        """添加到内存缓存（size 为序列化后的字节数，用于限制内存缓存大小）"""
+        limit = self.max_memory_cache_mb * 1024 * 1024
         with self._memory_cache_lock:
-            # 如果超过最大数量，删除最旧的
-            if len(self._memory_cache) >= self._max_memory_cache_items:
-                # 简单策略：删除第一个
-                first_key = next(iter(self._memory_cache))
-                del self._memory_cache[first_key]
+            if cache_key in self._memory_cache:
+                self._memory_bytes -= self._memory_sizes.pop(cache_key)
+                del self._memory_cache[cache_key]
+            # 单条超过整个内存缓存上限时只保存在磁盘
+            if size > limit:
+                return
             
             self._memory_cache[cache_key] = cache_data
+            self._memory_sizes[cache_key] = size
+            self._memory_bytes += size
+            
+            # 超过上限时从最久未使用的一端淘汰到上限的 90%
+            if self._memory_bytes > limit:
+                evicted = 0
+                while self._memory_bytes > limit * EVICT_TARGET_RATIO:
+                    oldest_key, _ = self._memory_cache.popitem(last=False)
+                    self._memory_bytes -= self._memory_sizes.pop(oldest_key)
+                    evicted += 1
+                self._update_stats("memory_evictions", evicted)
+    
+    def _touch(self, cache_key: str):
+        """记录访问时间（累积到批量阈值后一次写回）"""
+        with self._touch_lock:
+            self._pending_touches[cache_key] = time.time()
+            due = (
+                len(self._pending_touches) >= TOUCH_BATCH_SIZE
+                or time.monotonic() - self._last_touch_flush >= TOUCH_FLUSH_SECONDS
+            )
+        if due:
+            self.flush()
+    
+    def flush(self):
+        """把累积的访问时间写回数据库"""
+        with self._touch_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+            self._last_touch_flush = time.monotonic()
+        if not touches:
+            return
+        
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "UPDATE cache_entries SET accessed_at = MAX(accessed_at, ?) WHERE cache_key = ?",
+                [(accessed_at, cache_key) for cache_key, accessed_at in touches.items()]
+            )
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning(f"写回缓存访问时间失败: {e}")
     
-    def _update_stats(self, stat_type: str):
+    def _update_stats(self, stat_type: str, count: int = 1):
         """更新统计信息"""
         with self._stats_lock:
             if stat_type in self._stats:
-                self._stats[stat_type] += 1
+                self._stats[stat_type] += count
+    
+    def _totals(self) -> Dict:
+        """磁盘缓存的总条数和总字节数（读取触发器维护的计数，不扫描数据）"""
+        entries, size = self._connect().execute(
+            "SELECT entries, bytes FROM cache_totals WHERE id = 1"
+        ).fetchone()
+        return {"entries": entries, "bytes": size}
     
     def _check_and_clean_cache(self):
-        """检查缓存大小并清理过期缓存"""
+        """检查缓存大小，超过上限时先清理过期缓存，再按最近访问时间淘汰"""
         try:
-            total_size = 0
-            cache_files = list(self.cache_dir.glob("*.cache"))
-            
-            for cache_file in cache_files:
-                total_size += cache_file.stat().st_size
-            
-            total_size_mb = total_size / (1024 * 1024)
+            total_size_mb = self._totals()["bytes"] / (1024 * 1024)
             
-            # 如果超过最大大小，清理过期缓存
             if total_size_mb > self.max_cache_size_mb:
                 logger.info(f"缓存大小 {total_size_mb:.2f}MB 超过限制，开始清理...")
-                self._clean_expired_cache()
-                
+                self._evict_disk_cache()
+        
         except Exception as e:
             logger.error(f"检查缓存大小失败: {e}")
     
-    def _clean_expired_cache(self):
-        """清理过期的缓存"""
-        cleaned = 0
-        cache_files = list(self.cache_dir.glob("*.cache"))
+    def _evict_disk_cache(self):
+        """清理过期缓存，仍超过上限时淘汰最久未访问的记录，直到降到上限的 90%"""
+        # 先写回累积的访问时间，淘汰顺序才是准确的
+        self.flush()
+        target = self.max_cache_size_mb * 1024 * 1024 * EVICT_TARGET_RATIO
+        expired_before = time.time() - self.cache_ttl.total_seconds()
         
-        for cache_file in cache_files:
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                
-                if not self._is_cache_valid(cached_data):
-                    cache_file.unlink()
-                    cleaned += 1
-                    
-            except Exception:
-                # 如果读取失败，也删除
-                cache_file.unlink()
-                cleaned += 1
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "DELETE FROM cache_entries WHERE cached_at < ?", (expired_before,)
+            ).rowcount
+            evicted = 0
+            # 在事务内重新读取总量：其他进程可能刚完成淘汰
+            totals = self._totals()
+            while totals["bytes"] > target and totals["entries"] > 0:
+                # 按平均条目大小估算需要淘汰的条数，走 accessed_at 索引
+                average = totals["bytes"] / totals["entries"]
+                batch = max(1, int((totals["bytes"] - target) / average) + 1)
+                evicted += conn.execute(
+                    "DELETE FROM cache_entries WHERE cache_key IN "
+                    "(SELECT cache_key FROM cache_entries ORDER BY accessed_at LIMIT ?)", (batch,)
+                ).rowcount
+                totals = self._totals()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
         
-        if cleaned > 0:
-            self._update_stats("evictions")
-            logger.info(f"已清理 {cleaned} 个过期缓存文件")
+        if expired > 0:
+            self._update_stats("expired_removed", expired)
+            logger.info(f"已清理 {expired} 条过期缓存")
+        if evicted > 0:
+            self._update_stats("disk_evictions", evicted)
+            logger.info(f"已淘汰 {evicted} 条最久未访问的缓存")
     
     def clear_all(self):
         """清空所有缓存"""
         # 清空内存缓存
         with self._memory_cache_lock:
             self._memory_cache.clear()
+            self._memory_sizes.clear()
+            self._memory_bytes = 0
+        with self._touch_lock:
+            self._pending_touches.clear()
         
         # 清空磁盘缓存
-        cache_files = list(self.cache_dir.glob("*.cache"))
-        for cache_file in cache_files:
-            cache_file.unlink()
+        self._connect().execute("DELETE FROM cache_entries")
         
         logger.info("已清空所有缓存")
     
@@ -292,13 +636,18 @@ class DeepSeekCache:
         else:
             stats["hit_rate"] = 0.0
         
-        # 添加缓存文件数量
-        cache_files = list(self.cache_dir.glob("*.cache"))
-        stats["cache_files_count"] = len(cache_files)
+        # 两级缓存因容量淘汰的总条数
+        stats["evictions"] = stats["memory_evictions"] + stats["disk_evictions"]
+        
+        # 添加磁盘缓存条数（沿用原字段名）和总字节数
+        totals = self._totals()
+        stats["cache_files_count"] = totals["entries"]
+        stats["disk_size_bytes"] = totals["bytes"]
         
         # 添加内存缓存数量
         with self._memory_cache_lock:
             stats["memory_cache_count"] = len(self._memory_cache)
+            stats["memory_size_bytes"] = self._memory_bytes
         
         return stats
     
@@ -309,12 +658,11 @@ class DeepSeekCache:
         Args:
             content: 文档内容
             model: 模型名称
-            
+        
         Returns:
             缓存信息字典
         """
         cache_key = self._generate_cache_key(content, model)
-        cache_file = self._get_cache_file_path(cache_key)
         
         info = {
             "cache_key": cache_key,
@@ -324,17 +672,14 @@ class DeepSeekCache:
             "size_bytes": 0
         }
         
-        if cache_file.exists():
+        row = self._connect().execute(
+            "SELECT size, cached_at FROM cache_entries WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row is not None:
             info["exists"] = True
-            info["size_bytes"] = cache_file.stat().st_size
-            
-            try:
-                with open(cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                info["cached_at"] = cached_data.get("cached_at")
-                info["valid"] = self._is_cache_valid(cached_data)
-            except Exception:
-                pass
+            info["size_bytes"] = row[0]
+            info["cached_at"] = datetime.fromtimestamp(row[1]).isoformat()
+            info["valid"] = self._is_cache_valid(info)
         
         return info
 
@@ -344,14 +689,33 @@ _cache_instance: Optional[DeepSeekCache] = None
 _cache_lock = threading.Lock()
 
 
+def _pid_alive(pid: int) -> bool:
+    """本机进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
 def get_cache_instance() -> DeepSeekCache:
-    """获取全局缓存实例"""
+    """获取全局缓存实例（按配置创建，进程内的所有 DocumentParser 共用同一个内存缓存）"""
     global _cache_instance
     
     if _cache_instance is None:
         with _cache_lock:
             if _cache_instance is None:
-                _cache_instance = DeepSeekCache()
+                from app.core.config import settings
+                _cache_instance = DeepSeekCache(
+                    cache_dir=settings.DEEPSEEK_CACHE_DIR,
+                    max_cache_size_mb=settings.DEEPSEEK_CACHE_MAX_SIZE_MB,
+                    cache_ttl_hours=settings.DEEPSEEK_CACHE_TTL_HOURS,
+                    enable_cache=settings.DEEPSEEK_CACHE_ENABLED,
+                    max_memory_cache_mb=settings.DEEPSEEK_CACHE_MEMORY_MB,
+                    lease_seconds=settings.DEEPSEEK_CACHE_LEASE_SECONDS
+                )
     
     return _cache_instance
 
@@ -6,6 +6,7 @@ DeepSeek API 重试机制模块
 """
 
 import time
+import asyncio
 import logging
 import random
 import threading
@@ -210,9 +211,9 @@ class DeepSeekRetry:
         exception_str = str(exception).lower()
         exception_type = type(exception).__name__
         
-        # 超时错误
+        # 超时错误（httpx 的超时异常如 ReadTimeout 消息可能为空，按类型名判断）
         if self.config.retry_on_timeout:
-            if 'timeout' in exception_str or exception_type == 'Timeout':
+            if 'timeout' in exception_str or 'timeout' in exception_type.lower():
                 return True
         
         # 速率限制
@@ -230,6 +231,9 @@ class DeepSeekRetry:
             network_errors = ['connection', 'network', 'dns', 'socket', 'refused']
             if any(err in exception_str for err in network_errors):
                 return True
+            # httpx 的连接/读写错误
+            if exception_type in ('ConnectError', 'ReadError', 'WriteError', 'RemoteProtocolError', 'NetworkError'):
+                return True
         
         return False
     
@@ -256,54 +260,102 @@ class DeepSeekRetry:
         last_exception = None
         
         for attempt in range(self.config.max_retries + 1):
-            # 检查断路器状态
-            if self.config.circuit_breaker_enabled:
-                if not self.circuit_breaker.is_allowed():
-                    self._update_stats_circuit_open()
-                    raise Exception(
-                        f"断路器已断开，拒绝请求。"
-                        f"连续失败: {self.stats.consecutive_failures}"
-                    )
+            self._check_circuit()
             
             try:
                 result = func(*args, **kwargs)
-                
-                # 成功
-                self.circuit_breaker.record_success()
-                self._update_stats_success()
-                
-                return result
-                
             except Exception as e:
                 last_exception = e
-                
-                # 记录失败
-                self.circuit_breaker.record_failure(str(e))
-                self._update_stats_failure(str(e))
-                
-                # 判断是否应该重试
-                if attempt < self.config.max_retries and self._should_retry(e):
-                    # 计算延迟
-                    delay = self._calculate_delay(attempt + 1)
-                    
-                    logger.warning(
-                        f"DeepSeek API 调用失败 (尝试 {attempt + 1}/{self.config.max_retries + 1}): "
-                        f"{type(e).__name__}: {e}. "
-                        f"将在 {delay:.2f} 秒后重试..."
-                    )
-                    
-                    self._update_stats_retry()
-                    time.sleep(delay)
-                else:
-                    # 不再重试
+                delay = self._record_attempt_failure(e, attempt)
+                if delay is None:
+                    break
+                time.sleep(delay)
+                continue
+            
+            self._record_attempt_success()
+            return result
+        
+        self._log_final_failure(last_exception)
+        raise last_exception
+    
+    async def execute_with_retry_async(
+        self,
+        func: Callable,
+        *args,
+        **kwargs
+    ) -> Any:
+        """
+        执行协程函数并自动重试（退避等待使用 asyncio.sleep，不阻塞事件循环）
+        
+        断路器、退避和统计与 execute_with_retry 相同，两者共享同一个断路器。
+        
+        Args:
+            func: 返回协程的函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+        """
+        last_exception = None
+        
+        for attempt in range(self.config.max_retries + 1):
+            self._check_circuit()
+            
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                last_exception = e
+                delay = self._record_attempt_failure(e, attempt)
+                if delay is None:
                     break
+                await asyncio.sleep(delay)
+                continue
+            
+            self._record_attempt_success()
+            return result
+        
+        self._log_final_failure(last_exception)
+        raise last_exception
+    
+    def _check_circuit(self):
+        """断路器断开时拒绝请求"""
+        if self.config.circuit_breaker_enabled:
+            if not self.circuit_breaker.is_allowed():
+                self._update_stats_circuit_open()
+                raise Exception(
+                    f"断路器已断开，拒绝请求。"
+                    f"连续失败: {self.stats.consecutive_failures}"
+                )
+    
+    def _record_attempt_success(self):
+        self.circuit_breaker.record_success()
+        self._update_stats_success()
+    
+    def _record_attempt_failure(self, e: Exception, attempt: int) -> Optional[float]:
+        """
+        记录一次失败
+        
+        Returns:
+            需要重试时返回等待的秒数，否则返回 None
+        """
+        self.circuit_breaker.record_failure(str(e))
+        self._update_stats_failure(str(e))
         
-        # 所有重试都失败
+        if attempt >= self.config.max_retries or not self._should_retry(e):
+            return None
+        
+        delay = self._calculate_delay(attempt + 1)
+        logger.warning(
+            f"DeepSeek API 调用失败 (尝试 {attempt + 1}/{self.config.max_retries + 1}): "
+            f"{type(e).__name__}: {e}. "
+            f"将在 {delay:.2f} 秒后重试..."
+        )
+        self._update_stats_retry()
+        return delay
+    
+    def _log_final_failure(self, last_exception: Exception):
         logger.error(
             f"DeepSeek API 调用最终失败，已重试 {self.config.max_retries} 次: "
             f"{type(last_exception).__name__}: {last_exception}"
         )
-        raise last_exception
     
     def get_stats(self) -> Dict:
         """获取统计信息"""
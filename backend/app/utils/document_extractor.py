@@ -0,0 +1,794 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档内容提取器 - 各格式的文本/结构提取（CPU 密集，不访问数据库和网络）
+
+提取结果只包含可序列化的基本类型，可以在解析进程池的工作进程中执行。
+"""
+
+import io
+import time
+import codecs
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# PDF解析
+import PyPDF2
+import pdfplumber
+
+# pypdfium2 / PyMuPDF 为可选的快速 PDF 文本后端，未安装时从后端链中跳过
+try:
+    import pypdfium2
+    PYPDFIUM2_AVAILABLE = True
+except ImportError:
+    PYPDFIUM2_AVAILABLE = False
+
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Word文档解析
+import zipfile
+from datetime import datetime
+from xml.etree import ElementTree
+from docx import Document
+
+# Markdown解析
+import markdown
+from app.utils.markdown_sections import parse_sections
+
+# PPTX/XLSX/XLS/DOC
+from app.utils.office_readers import (
+    OLEFILE_AVAILABLE, XLRD_AVAILABLE, open_xls, open_xlsx, pptx_slide_paths, read_doc, read_pptx_slide
+)
+from app.utils.format_registry import COST_HEAVY, COST_LIGHT, FORMAT_HANDLERS, FormatHandler, register_format
+
+# 文本处理
+import chardet
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractOptions(NamedTuple):
+    """提取选项（可序列化，随任务传给解析工作进程）"""
+    # 文本达到该长度后停止提取（None 表示提取全文；目前只对 PDF、PPTX 和 Excel 生效）
+    max_chars: Optional[int] = None
+    # 保留页面/段落样式等结构信息
+    structure: bool = True
+    # 提取表格（开销最大，默认在详情接口首次访问时再提取）
+    tables: bool = False
+    # 保留版面布局的文本（仅 PDF）
+    layout: bool = False
+    # 渲染 HTML（仅 Markdown）
+    html: bool = False
+    # 保留段落样式和文字片段格式（仅 DOCX，需要加载整个文档）
+    runs: bool = False
+
+
+# 解析档位：fast 只提取文本；standard 保留结构；full 另外提取表格、版面、HTML 和文字格式并读取全文
+PARSE_PROFILES: Dict[str, ExtractOptions] = {
+    "fast": ExtractOptions(structure=False),
+    "standard": ExtractOptions(),
+    "full": ExtractOptions(tables=True, layout=True, html=True, runs=True),
+}
+
+
+def profile_options(profile: str, max_chars: Optional[int] = None) -> ExtractOptions:
+    """按档位生成提取选项（full 档位始终提取全文）"""
+    if profile not in PARSE_PROFILES:
+        raise ValueError(f"未知的解析档位: {profile}（可选: {', '.join(PARSE_PROFILES)}）")
+    return PARSE_PROFILES[profile]._replace(max_chars=None if profile == "full" else max_chars)
+
+
+
+def profiles_covering(profile: str) -> List[str]:
+    """提取内容不少于给定档位的档位（含自身，档位按 PARSE_PROFILES 顺序由少到多）"""
+    names = list(PARSE_PROFILES)
+    return names[names.index(profile):]
+
+# 检测文本编码时读取的文件开头字节数
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# 字节顺序标记（UTF-32 需在 UTF-16 之前判断）
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# chardet 识别出的中文编码统一按超集解码，避免样本之外的字符解码失败
+_ENCODING_SUPERSETS = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'ascii': 'utf-8'}
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    根据文件开头的样本检测文本编码
+    
+    依次判断 BOM、能否按 UTF-8 解码（样本末尾截断的多字节字符不算错误），
+    都不满足时才用 chardet 检测。
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    encoding = (chardet.detect(sample)['encoding'] or 'utf-8').lower()
+    return _ENCODING_SUPERSETS.get(encoding, encoding)
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_BODY = _W + "body"
+_DOCX_PARAGRAPH = _W + "p"
+_DOCX_TEXT = {_W + "t": None, _W + "tab": "\t", _W + "br": "\n", _W + "cr": "\n"}
+_DOCX_CORE_PROPERTIES = {
+    "title": "{http://purl.org/dc/elements/1.1/}title",
+    "author": "{http://purl.org/dc/elements/1.1/}creator",
+    "subject": "{http://purl.org/dc/elements/1.1/}subject",
+    "created": "{http://purl.org/dc/terms/}created",
+    "modified": "{http://purl.org/dc/terms/}modified",
+}
+
+
+def iter_docx_paragraphs(file_path: Union[str, Path]) -> Iterator[str]:
+    """
+    流式读取 DOCX 正文段落的文本（不含表格内的段落）
+    
+    处理完的正文元素随即清空，内存占用不随文档长度增长。
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        stack = []
+        for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(elem.tag)
+                continue
+            stack.pop()
+            if not stack or stack[-1] != _DOCX_BODY:
+                continue
+            if elem.tag == _DOCX_PARAGRAPH:
+                yield "".join(
+                    node.text or "" if _DOCX_TEXT[node.tag] is None else _DOCX_TEXT[node.tag]
+                    for node in elem.iter() if node.tag in _DOCX_TEXT
+                )
+            elem.clear()
+
+
+def read_docx_core_properties(file_path: Union[str, Path]) -> Dict:
+    """读取 docProps/core.xml 中的文档属性（DOCX/PPTX/XLSX 通用）"""
+    properties = {"title": "", "author": "", "subject": "", "created": None, "modified": None}
+    with zipfile.ZipFile(file_path) as archive:
+        if "docProps/core.xml" not in archive.namelist():
+            return properties
+        root = ElementTree.fromstring(archive.read("docProps/core.xml"))
+    
+    for key, tag in _DOCX_CORE_PROPERTIES.items():
+        node = root.find(tag)
+        value = (node.text or "").strip() if node is not None else ""
+        if key in ("created", "modified"):
+            try:
+                properties[key] = datetime.fromisoformat(value.rstrip("Z")).isoformat() if value else None
+            except ValueError:
+                properties[key] = None
+        else:
+            properties[key] = value
+    return properties
+
+
+# 文本少于该字符数（不含空白）时认为后端未提取到可用文本，继续尝试下一个后端
+PDF_MIN_USABLE_CHARS = 20
+
+# 只有 pdfplumber 支持表格和版面提取
+PDF_LAYOUT_BACKEND = "pdfplumber"
+
+
+@contextmanager
+def _open_pypdfium2(file_path: Path, options: ExtractOptions):
+    pdf = pypdfium2.PdfDocument(str(file_path))
+    try:
+        metadata = pdf.get_metadata_dict()
+
+        def pages():
+            for i in range(len(pdf)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                yield i + 1, page_text, []
+
+        yield {
+            "page_count": len(pdf),
+            "title": metadata.get('Title', ''),
+            "author": metadata.get('Author', ''),
+            "subject": metadata.get('Subject', '')
+        }, pages()
+    finally:
+        pdf.close()
+
+
+@contextmanager
+def _open_pymupdf(file_path: Path, options: ExtractOptions):
+    doc = fitz.open(str(file_path))
+    try:
+        metadata = doc.metadata or {}
+
+        def pages():
+            for i, page in enumerate(doc):
+                yield i + 1, page.get_text() or "", []
+
+        yield {
+            "page_count": doc.page_count,
+            "title": metadata.get('title', ''),
+            "author": metadata.get('author', ''),
+            "subject": metadata.get('subject', '')
+        }, pages()
+    finally:
+        doc.close()
+
+
+@contextmanager
+def _open_pdfplumber(file_path: Path, options: ExtractOptions):
+    with pdfplumber.open(file_path) as pdf:
+        def pages():
+            for i, page in enumerate(pdf.pages):
+                page_text = page.extract_text(layout=options.layout) or ""
+                page_tables = page.extract_tables() if options.tables else []
+                # 释放页面的解析缓存，长文档的内存占用不随页数增长
+                page.close()
+                yield i + 1, page_text, page_tables
+
+        yield {
+            "page_count": len(pdf.pages),
+            "title": pdf.metadata.get('Title', ''),
+            "author": pdf.metadata.get('Author', ''),
+            "subject": pdf.metadata.get('Subject', '')
+        }, pages()
+
+
+@contextmanager
+def _open_pypdf2(file_path: Path, options: ExtractOptions):
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        metadata = pdf_reader.metadata or {}
+
+        def pages():
+            for i, page in enumerate(pdf_reader.pages):
+                yield i + 1, page.extract_text() or "", []
+
+        yield {
+            "page_count": len(pdf_reader.pages),
+            "title": str(metadata.get('/Title') or ''),
+            "author": str(metadata.get('/Author') or ''),
+            "subject": str(metadata.get('/Subject') or '')
+        }, pages()
+
+
+# PDF 后端：打开文档，返回 (元数据, 逐页 (页码, 文本, 表格) 迭代器)；按此顺序为默认的尝试顺序
+PDF_BACKENDS = {
+    "pypdfium2": _open_pypdfium2,
+    "pymupdf": _open_pymupdf,
+    "pypdf2": _open_pypdf2,
+    "pdfplumber": _open_pdfplumber,
+}
+
+
+def pdf_backend_available(name: str) -> bool:
+    """PDF 后端是否可用（可选依赖已安装）"""
+    if name == "pypdfium2":
+        return PYPDFIUM2_AVAILABLE
+    if name == "pymupdf":
+        return PYMUPDF_AVAILABLE
+    return name in PDF_BACKENDS
+
+
+class DocumentExtractor:
+    """文档内容提取器（无状态，每个解析工作进程持有一个实例）"""
+    
+    def __init__(self, pdf_backends: Optional[Sequence[str]] = None, pdf_probe_pages: Optional[int] = None):
+        """
+        Args:
+            pdf_backends: PDF 文本后端的尝试顺序（None 时按配置 PARSE_PDF_BACKENDS）
+            pdf_probe_pages: 判断纯图片 PDF 时检查的页数（None 时按配置，0 表示不检查）
+        """
+        if pdf_backends is None or pdf_probe_pages is None:
+            from app.core.config import settings
+            if pdf_backends is None:
+                pdf_backends = settings.PARSE_PDF_BACKENDS
+            if pdf_probe_pages is None:
+                pdf_probe_pages = settings.PARSE_PDF_PROBE_PAGES
+        
+        self.pdf_backends = [name for name in pdf_backends if pdf_backend_available(name)]
+        if not self.pdf_backends:
+            raise ValueError(f"没有可用的 PDF 后端: {list(pdf_backends)}（可选: {', '.join(PDF_BACKENDS)}）")
+        self.pdf_probe_pages = pdf_probe_pages
+    
+    @staticmethod
+    def _handler(file_path: Path) -> FormatHandler:
+        file_extension = file_path.suffix.lower()
+        handler = FORMAT_HANDLERS.get(file_extension)
+        if handler is None:
+            raise ValueError(f"不支持的文档格式: {file_extension}")
+        if not handler.available:
+            raise ValueError(f"不支持的文档格式: {file_extension}（需要安装 {handler.requires}）")
+        return handler
+    
+    def extract(self, file_path: Union[str, Path], options: Optional[ExtractOptions] = None) -> Dict:
+        """按扩展名查找注册的处理器提取文档内容"""
+        file_path = Path(file_path)
+        return self._handler(file_path).parse(self, file_path, options or ExtractOptions())
+    
+    def extract_tables(self, file_path: Union[str, Path]) -> List[Dict]:
+        """
+        单独提取文档中的表格（供详情接口按需调用）
+        
+        Returns:
+            表格列表，每项包含 page_number（PDF 页码、幻灯片序号或工作表序号，其他格式为 None）和 rows
+        """
+        file_path = Path(file_path)
+        handler = self._handler(file_path)
+        return handler.tables(self, file_path) if handler.tables is not None else []
+    
+    def _pdf_tables(self, file_path: Path) -> List[Dict]:
+        tables = []
+        with pdfplumber.open(file_path) as pdf:
+            for i, page in enumerate(pdf.pages):
+                tables.extend({"page_number": i + 1, "rows": rows} for rows in page.extract_tables())
+                page.close()
+        return tables
+    
+    def _parse_pdf(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """
+        解析PDF文档
+        
+        先检查是否为纯图片 PDF（扫描件无文本可提取，直接返回），再按后端链依次提取：
+        某个后端出错或提取不到可用文本时尝试下一个，都不理想时取文本最多的结果。
+        逐页提取，文本达到 options.max_chars 后停止，不再处理后面的页面。
+        
+        返回结果的 extraction 字段记录实际使用的后端和每次尝试的耗时。
+        """
+        extraction = {"backend": None, "attempts": [], "image_only": False, "probe_seconds": 0.0}
+        
+        start = time.perf_counter()
+        page_count = self._probe_image_only(file_path)
+        extraction["probe_seconds"] = time.perf_counter() - start
+        if page_count is not None:
+            extraction["image_only"] = True
+            content = self._empty_pdf_content()
+            content["metadata"]["page_count"] = page_count
+            content["extraction"] = extraction
+            return content
+        
+        best = None
+        last_error = None
+        for name in self._pdf_backend_chain(options):
+            start = time.perf_counter()
+            try:
+                content = self._extract_pdf_with(name, file_path, options)
+            except Exception as e:
+                logger.warning(f"PDF 后端 {name} 解析失败: {e}")
+                extraction["attempts"].append({"backend": name, "seconds": time.perf_counter() - start, "outcome": "error"})
+                last_error = e
+                continue
+            
+            chars = len("".join(content["text"].split()))
+            usable = chars >= PDF_MIN_USABLE_CHARS
+            extraction["attempts"].append({
+                "backend": name,
+                "seconds": time.perf_counter() - start,
+                "outcome": "ok" if usable else "empty"
+            })
+            if best is None or chars > best[0]:
+                best = (chars, name, content)
+            if usable:
+                break
+        
+        if best is None:
+            raise last_error
+        
+        _, extraction["backend"], content = best
+        content["extraction"] = extraction
+        return content
+    
+    @staticmethod
+    def _empty_pdf_content() -> Dict:
+        return {
+            "text": "",
+            "pages": [],
+            "metadata": {},
+            "tables": [],
+            "truncated": False
+        }
+    
+    def _pdf_backend_chain(self, options: ExtractOptions) -> List[str]:
+        """需要表格或版面时 pdfplumber 优先，其余后端作为后备"""
+        if (options.tables or options.layout) and PDF_LAYOUT_BACKEND in self.pdf_backends:
+            return [PDF_LAYOUT_BACKEND] + [name for name in self.pdf_backends if name != PDF_LAYOUT_BACKEND]
+        return list(self.pdf_backends)
+    
+    def _extract_pdf_with(self, backend: str, file_path: Path, options: ExtractOptions) -> Dict:
+        content = self._empty_pdf_content()
+        with PDF_BACKENDS[backend](file_path, options) as (metadata, pages):
+            content["metadata"] = metadata
+            self._collect_pages(content, pages, options)
+        return content
+    
+    def _probe_image_only(self, file_path: Path) -> Optional[int]:
+        """
+        快速判断是否为纯图片 PDF（如扫描件）
+        
+        只检查前几页的资源字典：没有字体、只有图片时判定为纯图片。
+        检查失败或判断不确定时按普通 PDF 处理。
+        
+        Returns:
+            纯图片 PDF 返回总页数，否则返回 None
+        """
+        if not self.pdf_probe_pages:
+            return None
+        try:
+            with open(file_path, 'rb') as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                page_count = len(pdf_reader.pages)
+                if page_count == 0:
+                    return None
+                for i in range(min(self.pdf_probe_pages, page_count)):
+                    resources = pdf_reader.pages[i].get("/Resources")
+                    resources = resources.get_object() if resources is not None else {}
+                    if "/Font" in resources:
+                        return None
+                    xobjects = resources.get("/XObject")
+                    xobjects = xobjects.get_object() if xobjects is not None else {}
+                    subtypes = {xobjects[key].get_object().get("/Subtype") for key in xobjects}
+                    # 表单对象中可能含有文字，无图片的空白页也无法判断
+                    if not subtypes or subtypes != {"/Image"}:
+                        return None
+                return page_count
+        except Exception as e:
+            logger.debug(f"纯图片 PDF 检查失败 {file_path}: {e}")
+            return None
+    
+    
+    @staticmethod
+    def _collect_pages(content: Dict, pages: Iterator[Tuple[int, str, List]], options: ExtractOptions):
+        """汇总逐页结果，文本长度达到 max_chars 后停止迭代"""
+        full_text = []
+        length = 0
+        for page_number, page_text, page_tables in pages:
+            if options.structure:
+                content["pages"].append({
+                    "page_number": page_number,
+                    "text": page_text,
+                    "table_count": len(page_tables)
+                })
+            content["tables"].extend({"page_number": page_number, "rows": rows} for rows in page_tables)
+            full_text.append(page_text)
+            
+            length += len(page_text) + 2
+            if options.max_chars is not None and length >= options.max_chars:
+                content["truncated"] = page_number < content["metadata"].get("page_count", page_number)
+                break
+        
+        content["text"] = "\n\n".join(full_text)
+    
+    def _parse_docx(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """
+        解析Word文档
+        
+        默认直接流式读取 document.xml 中正文段落的文本；options.runs 为真时才用
+        python-docx 加载整个文档，保留段落样式和每个文字片段的格式。
+        表格只在 options.tables 为真时提取。
+        """
+        content = {
+            "text": "",
+            "paragraphs": [],
+            "tables": [],
+            "metadata": {}
+        }
+        
+        # 提取段落
+        paragraphs = []
+        full_text_parts = []
+        doc = None
+        
+        if options.runs:
+            doc = Document(file_path)
+            for para in doc.paragraphs:
+                if para.text.strip():  # 跳过空段落
+                    paragraphs.append({
+                        "text": para.text,
+                        "style": para.style.name,
+                        "runs": [{"text": run.text, "bold": run.bold, "italic": run.italic} for run in para.runs]
+                    })
+                    full_text_parts.append(para.text)
+        else:
+            for text in iter_docx_paragraphs(file_path):
+                if text.strip():  # 跳过空段落
+                    if options.structure:
+                        paragraphs.append({"text": text})
+                    full_text_parts.append(text)
+        
+        content["paragraphs"] = paragraphs
+        content["text"] = "\n".join(full_text_parts)
+        
+        # 提取表格（默认按需在详情接口中提取）
+        if options.tables:
+            content["tables"] = self._docx_tables(doc or Document(file_path))
+        
+        # 提取文档属性
+        content["metadata"] = {
+            **read_docx_core_properties(file_path),
+            "word_count": len(content["text"].split())
+        }
+        
+        return content
+    
+    def _docx_file_tables(self, file_path: Path) -> List[Dict]:
+        return self._docx_tables(Document(file_path))
+    
+    @staticmethod
+    def _docx_tables(doc) -> List[Dict]:
+        tables = []
+        for table in doc.tables:
+            table_data = []
+            for row in table.rows:
+                row_data = [cell.text.strip() for cell in row.cells]
+                table_data.append(row_data)
+            tables.append({"page_number": None, "rows": table_data})
+        return tables
+    
+    def _parse_txt(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """
+        解析纯文本文件
+        
+        只用文件开头的样本检测编码，然后逐行读取一遍，同时统计段落、行数和词数。
+        文本流式写入 StringIO，最后只生成一次完整字符串；段落列表只在
+        options.structure 为真时构建。
+        """
+        with open(file_path, 'rb') as file:
+            encoding = detect_encoding(file.read(ENCODING_SAMPLE_BYTES))
+        
+        buffer = io.StringIO()
+        paragraphs = []
+        paragraph_count = 0
+        paragraph_lines = []
+        paragraph_has_text = False
+        line_count = 1
+        word_count = 0
+        
+        def flush_paragraph():
+            nonlocal paragraph_count, paragraph_has_text
+            if paragraph_has_text:
+                paragraph_count += 1
+                if options.structure:
+                    paragraph = "".join(paragraph_lines).strip()
+                    paragraphs.append({"text": paragraph, "line_count": paragraph.count('\n') + 1})
+            paragraph_lines.clear()
+            paragraph_has_text = False
+        
+        # 按段落分割（空行分隔）
+        with open(file_path, 'r', encoding=encoding, errors='ignore') as file:
+            for line in file:
+                buffer.write(line)
+                words = len(line.split())
+                word_count += words
+                if line.endswith('\n'):
+                    line_count += 1
+                if line == '\n':
+                    flush_paragraph()
+                    continue
+                # 有单词即说明该行含非空白字符
+                paragraph_has_text = paragraph_has_text or words > 0
+                if options.structure:
+                    paragraph_lines.append(line)
+        flush_paragraph()
+        
+        text = buffer.getvalue()
+        buffer.close()
+        content = {
+            "text": text,
+            "paragraphs": paragraphs,
+            "metadata": {
+                "encoding": encoding,
+                "character_count": len(text),
+                "word_count": word_count,
+                "line_count": line_count,
+                "paragraph_count": paragraph_count
+            }
+        }
+        
+        return content
+    
+    def _parse_markdown(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """
+        解析Markdown文档
+        
+        直接扫描 Markdown 源文本生成章节结构；只有 options.html 为真时才渲染 HTML。
+        """
+        # 读取原始内容
+        with open(file_path, 'r', encoding='utf-8') as file:
+            md_text = file.read()
+        
+        # 提取结构化内容
+        sections = parse_sections(md_text)
+        
+        content = {
+            "text": md_text,
+            "sections": sections if options.structure else [],
+            "metadata": {
+                "header_count": len([s for s in sections if s["title"]]),
+                "paragraph_count": len([c for s in sections for c in s["content"] if c["type"] == "p"]),
+                "list_count": len([c for s in sections for c in s["content"] if c["type"] == "list"])
+            }
+        }
+        
+        if options.html:
+            content["html"] = markdown.markdown(md_text, extensions=['extra'])
+        
+        return content
+    
+    def _parse_pptx(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """
+        解析PowerPoint演示文稿
+        
+        按放映顺序逐页读取幻灯片的文本框和表格，文本达到 options.max_chars 后停止。
+        表格文本按行计入幻灯片文本，表格结构只在 options.tables 为真时保留。
+        """
+        content = {
+            "text": "",
+            "slides": [],
+            "tables": [],
+            "metadata": {},
+            "truncated": False
+        }
+        
+        full_text = []
+        length = 0
+        with zipfile.ZipFile(file_path) as archive:
+            paths = pptx_slide_paths(archive)
+            for slide_number, path in enumerate(paths, 1):
+                slide = read_pptx_slide(archive, path)
+                lines = slide["paragraphs"] + [
+                    "\t".join(row) for rows in slide["tables"] for row in rows if any(row)
+                ]
+                slide_text = "\n".join(lines)
+                if options.structure:
+                    content["slides"].append({
+                        "slide_number": slide_number,
+                        "title": slide["title"],
+                        "text": slide_text,
+                        "table_count": len(slide["tables"])
+                    })
+                if options.tables:
+                    content["tables"].extend({"page_number": slide_number, "rows": rows} for rows in slide["tables"])
+                full_text.append(slide_text)
+                
+                length += len(slide_text) + 2
+                if options.max_chars is not None and length >= options.max_chars:
+                    content["truncated"] = slide_number < len(paths)
+                    break
+        
+        content["text"] = "\n\n".join(full_text)
+        content["metadata"] = {
+            **read_docx_core_properties(file_path),
+            "slide_count": len(paths),
+            "word_count": len(content["text"].split())
+        }
+        return content
+    
+    def _pptx_tables(self, file_path: Path) -> List[Dict]:
+        tables = []
+        with zipfile.ZipFile(file_path) as archive:
+            for slide_number, path in enumerate(pptx_slide_paths(archive), 1):
+                tables.extend(
+                    {"page_number": slide_number, "rows": rows} for rows in read_pptx_slide(archive, path)["tables"]
+                )
+        return tables
+    
+    def _parse_xlsx(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """解析Excel工作簿（.xlsx），逐行流式读取各工作表"""
+        content = self._parse_workbook(open_xlsx(file_path), options)
+        content["metadata"] = {**read_docx_core_properties(file_path), **content["metadata"]}
+        return content
+    
+    def _parse_xls(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """解析Excel 97-2003工作簿（.xls），逐个工作表读取"""
+        return self._parse_workbook(open_xls(file_path), options)
+    
+    @staticmethod
+    def _parse_workbook(workbook, options: ExtractOptions) -> Dict:
+        """
+        汇总工作簿的行
+        
+        每个工作表以 [表名] 开头，每行的单元格以制表符分隔，工作表之间空一行；
+        文本达到 options.max_chars 后停止读取。
+        """
+        content = {
+            "text": "",
+            "sheets": [],
+            "tables": [],
+            "metadata": {},
+            "truncated": False
+        }
+        
+        lines = []
+        length = 0
+        row_count = 0
+        with workbook as (sheet_names, rows):
+            sheets = [{"name": name, "row_count": 0, "column_count": 0} for name in sheet_names]
+            tables = [[] for _ in sheet_names]
+            current = None
+            for index, row in rows:
+                if index != current:
+                    current = index
+                    if lines:
+                        lines.append("")
+                    lines.append(f"[{sheet_names[index]}]")
+                line = "\t".join(row)
+                lines.append(line)
+                row_count += 1
+                sheets[index]["row_count"] += 1
+                sheets[index]["column_count"] = max(sheets[index]["column_count"], len(row))
+                if options.tables:
+                    tables[index].append(row)
+                
+                length += len(line) + 1
+                if options.max_chars is not None and length >= options.max_chars:
+                    content["truncated"] = next(rows, None) is not None
+                    break
+        
+        content["text"] = "\n".join(lines)
+        if options.structure:
+            content["sheets"] = sheets
+        if options.tables:
+            content["tables"] = [
+                {"page_number": i + 1, "sheet": sheet_names[i], "rows": sheet_rows}
+                for i, sheet_rows in enumerate(tables) if sheet_rows
+            ]
+        content["metadata"] = {
+            "sheet_count": len(sheet_names),
+            "row_count": row_count,
+            "word_count": len(content["text"].split())
+        }
+        return content
+    
+    def _xlsx_tables(self, file_path: Path) -> List[Dict]:
+        return self._parse_workbook(open_xlsx(file_path), ExtractOptions(structure=False, tables=True))["tables"]
+    
+    def _xls_tables(self, file_path: Path) -> List[Dict]:
+        return self._parse_workbook(open_xls(file_path), ExtractOptions(structure=False, tables=True))["tables"]
+    
+    def _parse_doc(self, file_path: Path, options: ExtractOptions) -> Dict:
+        """解析Word 97-2003文档（.doc），读取正文文本和文档属性"""
+        text, properties = read_doc(file_path)
+        paragraphs = [line.strip() for line in text.split("\n") if line.strip()]
+        content = {
+            "text": "\n".join(paragraphs),
+            "paragraphs": [{"text": paragraph} for paragraph in paragraphs] if options.structure else [],
+            "tables": [],
+            "metadata": {}
+        }
+        content["metadata"] = {**properties, "word_count": len(content["text"].split())}
+        return content
+
+
+# 内置格式：纯文本类在调用线程内解析（超过 PARSE_LIGHT_MAX_BYTES 的大文件除外），其余交给解析进程池
+for _format in (
+    FormatHandler("pdf", (".pdf",), DocumentExtractor._parse_pdf, COST_HEAVY, True, DocumentExtractor._pdf_tables),
+    FormatHandler("docx", (".docx",), DocumentExtractor._parse_docx, COST_HEAVY, True, DocumentExtractor._docx_file_tables),
+    FormatHandler("pptx", (".pptx",), DocumentExtractor._parse_pptx, COST_HEAVY, True, DocumentExtractor._pptx_tables),
+    FormatHandler("xlsx", (".xlsx",), DocumentExtractor._parse_xlsx, COST_HEAVY, True, DocumentExtractor._xlsx_tables),
+    FormatHandler("xls", (".xls",), DocumentExtractor._parse_xls, COST_HEAVY, False, DocumentExtractor._xls_tables,
+                  available=XLRD_AVAILABLE, requires="xlrd"),
+    FormatHandler("doc", (".doc",), DocumentExtractor._parse_doc, COST_HEAVY, False,
+                  available=OLEFILE_AVAILABLE, requires="olefile"),
+    FormatHandler("txt", (".txt",), DocumentExtractor._parse_txt, COST_LIGHT, True),
+    FormatHandler("markdown", (".md",), DocumentExtractor._parse_markdown, COST_LIGHT, False),
+):
+    register_format(_format)
@@ -7,31 +7,30 @@
 
 import os
 import io
+import json
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 import tempfile
 
-# PDF解析
-import PyPDF2
-import pdfplumber
-
-# Word文档解析
-from docx import Document
-from docx.shared import Inches
-
-# Markdown解析
-import markdown
-from bs4 import BeautifulSoup
-
 # 文本处理
-import chardet
 import re
 
+from sqlalchemy import null
+
 from app.core.config import settings
-from app.models.data_overview import DataBookDetail
+from app.models.data_overview import DataOverview, DataBookDetail
 from app.core.database import get_db
+from app.crawler.fingerprint import compute_fingerprint, compute_full_hash, is_full_fingerprint
+from app.utils.parse_engine import get_parse_engine
+from app.utils.document_extractor import ExtractOptions, profile_options, profiles_covering
+from app.utils.format_registry import supported_extensions
+from app.utils.chunked_analysis import estimate_tokens, merge_analyses, split_chunks
+from app.utils.blob_store import copy_parse_blobs, load_deepseek_response, load_full_text, save_parse_blobs
 
 # 导入缓存和重试模块
 from app.utils.deepseek_cache import DeepSeekCache, get_cache_instance
@@ -39,24 +38,22 @@ from app.utils.deepseek_retry import DeepSeekRetry, RetryConfig, get_retry_insta
 
 logger = logging.getLogger(__name__)
 
+
+class _ApiKeyNotConfigured(Exception):
+    """DeepSeek API Key 未配置（不写入缓存，改用模拟数据）"""
+
+
 class DocumentParser:
     """文档解析器"""
     
     def __init__(self):
-        self.supported_formats = {
-            '.pdf': self._parse_pdf,
-            '.docx': self._parse_docx,
-            '.txt': self._parse_txt,
-            '.md': self._parse_markdown
-        }
+        self.supported_formats = set(supported_extensions())
         
-        # 初始化缓存
-        self.cache = DeepSeekCache(
-            cache_dir=settings.DEEPSEEK_CACHE_DIR if hasattr(settings, 'DEEPSEEK_CACHE_DIR') else None,
-            max_cache_size_mb=settings.DEEPSEEK_CACHE_MAX_SIZE_MB if hasattr(settings, 'DEEPSEEK_CACHE_MAX_SIZE_MB') else 500,
-            cache_ttl_hours=settings.DEEPSEEK_CACHE_TTL_HOURS if hasattr(settings, 'DEEPSEEK_CACHE_TTL_HOURS') else 168,
-            enable_cache=settings.DEEPSEEK_CACHE_ENABLED if hasattr(settings, 'DEEPSEEK_CACHE_ENABLED') else True
-        )
+        # 内容提取在共享的解析引擎（进程池）中执行
+        self.engine = get_parse_engine()
+        
+        # 缓存为进程内共享实例：每个文档新建 DocumentParser 时内存缓存仍然保留
+        self.cache = get_cache_instance()
         
         # 初始化重试机制
         retry_config = RetryConfig(
@@ -72,31 +69,69 @@ class DocumentParser:
         )
         self.retry_handler = DeepSeekRetry(retry_config)
         
+        # 进程内共享的 LLM 客户端（首次调用 API 时获取）
+        self._llm_client = None
+        
+        # 按内容指纹复用已有解析结果的次数
+        self.dedup_reused = 0
+        
+        # DeepSeek 分析的累计用量
+        self._analysis_lock = threading.Lock()
+        self.analysis_stats = {
+            "documents": 0, "chunks": 0, "cached_chunks": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "api_seconds": 0.0
+        }
+        
         logger.info("DocumentParser 初始化完成，缓存和重试机制已启用")
     
-    def parse_document(self, file_path: str, file_id: int) -> Dict:
-        """解析文档并提取结构化信息"""
+    def parse_document(
+        self,
+        file_path: str,
+        file_id: int,
+        full_extraction: Optional[bool] = None,
+        profile: Optional[str] = None
+    ) -> Dict:
+        """
+        解析文档并提取结构化信息
+        
+        Args:
+            file_path: 文档路径
+            file_id: 文件ID
+            full_extraction: 是否提取全文（None 时按配置）；默认提取到
+                满足分析和入库所需的文本长度即停止
+            profile: 解析档位 fast/standard/full（None 时按扩展名配置或默认档位）；
+                非 full 档位不提取表格，表格在详情接口首次访问时再提取
+        """
         file_path = Path(file_path)
         file_extension = file_path.suffix.lower()
         
         if file_extension not in self.supported_formats:
             raise ValueError(f"不支持的文档格式: {file_extension}")
         
+        profile = self._resolve_profile(profile, file_extension)
+        options = self._extract_options(full_extraction, profile)
+        
         # 检查文件大小
         file_size = file_path.stat().st_size
         if file_size > settings.MAX_FILE_SIZE:
             raise ValueError(f"文件过大: {file_size} bytes")
         
+        # 内容相同的文件已按不低于本次的档位解析过时直接复用，跳过文本提取和 DeepSeek 调用；
+        # 显式要求全文时只复用 full 档位（只有该档位保证提取了全文）
+        required_profile = "full" if full_extraction else profile
+        reused = self._reuse_duplicate_result(file_path, file_id, file_size, required_profile)
+        if reused is not None:
+            return reused
+        
         try:
-            # 调用对应的解析方法
-            parser_func = self.supported_formats[file_extension]
-            parsed_content = parser_func(file_path)
+            # 在解析进程池中提取内容，结果回到当前进程做分析和入库
+            parsed_content = self.engine.extract(str(file_path), options)
             
             # 调用DeepSeek API进行智能分析
             ai_analysis = self._call_deepseek_api(parsed_content)
             
             # 保存解析结果到数据库
-            result = self._save_parse_result(file_id, parsed_content, ai_analysis)
+            result = self._save_parse_result(file_id, parsed_content, ai_analysis, profile, options.tables)
             
             return result
             
@@ -105,250 +140,264 @@ class DocumentParser:
             self._save_parse_error(file_id, str(e))
             raise
     
-    def _parse_pdf(self, file_path: Path) -> Dict:
-        """解析PDF文档"""
-        content = {
-            "text": "",
-            "pages": [],
-            "metadata": {},
-            "tables": []
-        }
+    @staticmethod
+    def _resolve_profile(profile: Optional[str], file_extension: str) -> str:
+        """解析档位优先级：请求参数 > 按扩展名配置 > 默认档位"""
+        return profile or settings.PARSE_PROFILE_BY_EXTENSION.get(file_extension) or settings.PARSE_DEFAULT_PROFILE
+    
+    @staticmethod
+    def _extract_options(full_extraction: Optional[bool], profile: str = "standard") -> ExtractOptions:
+        """分析和入库只用到文本开头部分，默认提取到两者所需的长度为止"""
+        if full_extraction is None:
+            full_extraction = settings.PARSE_FULL_EXTRACTION
+        # 分块分析需要全文
+        if full_extraction or settings.PARSE_ANALYSIS_CHUNKED:
+            max_chars = None
+        else:
+            max_chars = max(settings.PARSE_ANALYSIS_CHARS, settings.PARSE_STORAGE_CHARS)
+        return profile_options(profile, max_chars)
+    
+    def get_tables(self, file_id: int) -> Optional[List[Dict]]:
+        """
+        获取文档表格，首次访问时提取并缓存到详情记录
+        
+        Returns:
+            表格列表；文件记录不存在时返回 None
+        """
+        with get_db() as db_session:
+            node = db_session.query(DataOverview).filter(DataOverview.id == file_id).first()
+            if node is None:
+                return None
+            
+            detail = db_session.query(DataBookDetail).filter(
+                DataBookDetail.file_id == file_id
+            ).first()
+            if detail is not None and detail.tables is not None:
+                return detail.tables
+            
+            tables = self.engine.extract_tables(node.file_path)
+            if detail is None:
+                detail = DataBookDetail(file_id=file_id, parse_status="pending")
+                db_session.add(detail)
+            detail.tables = tables
+            db_session.commit()
+            return tables
+    
+    def _reuse_duplicate_result(self, file_path: Path, file_id: int, file_size: int,
+                                profile: str = "standard") -> Optional[Dict]:
+        """
+        查找内容指纹相同且已解析完成的文件，复制其解析结果
         
+        只复用解析档位相同或更完整的结果（未记录档位的旧结果不复用），
+        避免 full 请求拿到 fast 档位缺少结构和表格的结果。
+        采样指纹只覆盖头尾，相同时必须再比较全量哈希确认内容一致才复用；
+        当前文件的全量哈希在遇到第一个候选时计算一次。
+        
+        Returns:
+            复用时返回解析结果，否则返回 None
+        """
         try:
-            # 使用pdfplumber获得更好的表格提取
-            with pdfplumber.open(file_path) as pdf:
-                content["metadata"] = {
-                    "page_count": len(pdf.pages),
-                    "title": pdf.metadata.get('Title', ''),
-                    "author": pdf.metadata.get('Author', ''),
-                    "subject": pdf.metadata.get('Subject', '')
-                }
+            with get_db() as db_session:
+                node = db_session.query(DataOverview).filter(DataOverview.id == file_id).first()
+                if node is None:
+                    return None
                 
-                full_text = []
-                for i, page in enumerate(pdf.pages):
-                    page_text = page.extract_text() or ""
-                    page_tables = page.extract_tables()
-                    
-                    content["pages"].append({
-                        "page_number": i + 1,
-                        "text": page_text,
-                        "table_count": len(page_tables)
-                    })
-                    
-                    if page_tables:
-                        content["tables"].extend(page_tables)
-                    
-                    full_text.append(page_text)
+                # 扫描时未计算指纹的记录在此补算
+                if not node.content_hash:
+                    node.content_hash = compute_fingerprint(str(file_path), file_size)
+                    if not node.content_hash:
+                        return None
+                    db_session.commit()
                 
-                content["text"] = "\n\n".join(full_text)
+                candidates = db_session.query(DataOverview.file_path, DataBookDetail).join(
+                    DataBookDetail, DataBookDetail.file_id == DataOverview.id
+                ).filter(
+                    DataOverview.content_hash == node.content_hash,
+                    DataOverview.id != file_id,
+                    DataBookDetail.parse_status == "completed",
+                    DataBookDetail.parse_profile.in_(profiles_covering(profile))
+                ).order_by(DataBookDetail.parse_time.desc()).limit(5).all()
                 
+                full_hash = None
+                for source_path, source_detail in candidates:
+                    if not is_full_fingerprint(node.content_hash):
+                        if full_hash is None:
+                            full_hash = compute_full_hash(str(file_path))
+                            if full_hash is None:
+                                return None
+                        if compute_full_hash(source_path) != full_hash:
+                            continue
+                    
+                    result = self._copy_parse_result(db_session, file_id, source_detail)
+                    self.dedup_reused += 1
+                    logger.info(f"复用重复文件的解析结果: {file_path} <- {source_path}")
+                    return result
         except Exception as e:
-            logger.warning(f"pdfplumber解析失败，尝试PyPDF2: {e}")
-            # 备用方案：使用PyPDF2
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                content["metadata"]["page_count"] = len(pdf_reader.pages)
-                
-                full_text = []
-                for i, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text() or ""
-                    full_text.append(page_text)
-                    content["pages"].append({
-                        "page_number": i + 1,
-                        "text": page_text,
-                        "table_count": 0
-                    })
-                
-                content["text"] = "\n\n".join(full_text)
+            logger.warning(f"查找重复文件解析结果失败，继续正常解析 {file_path}: {e}")
         
-        return content
+        return None
     
-    def _parse_docx(self, file_path: Path) -> Dict:
-        """解析Word文档"""
-        content = {
-            "text": "",
-            "paragraphs": [],
-            "tables": [],
-            "metadata": {}
+    def _copy_parse_result(self, db_session, file_id: int, source: DataBookDetail) -> Dict:
+        """把来源文件的解析结果复制到当前文件"""
+        detail = db_session.query(DataBookDetail).filter(
+            DataBookDetail.file_id == file_id
+        ).first()
+        if detail is None:
+            detail = DataBookDetail(file_id=file_id)
+            db_session.add(detail)
+        
+        for column in (
+            "abstract", "keywords", "theories", "experiment_flow",
+            "statistical_methods", "conclusion", "confidence_score",
+            "authors", "theories_used", "entities", "entity_relations",
+            "tables", "parse_profile"
+        ):
+            setattr(detail, column, getattr(source, column))
+        detail.full_text = None
+        detail.deepseek_response = null()  # SQL NULL（JSON 列赋 None 会写入 JSON null）
+        copy_parse_blobs(db_session, source.file_id, file_id)
+        detail.parse_status = "completed"
+        detail.parse_error = None
+        detail.parse_time = datetime.utcnow()
+        
+        db_session.commit()
+        
+        ai_analysis = load_deepseek_response(db_session, file_id) or {}
+        return {
+            "status": "success",
+            "file_id": file_id,
+            "parse_time": detail.parse_time.isoformat(),
+            "word_count": len((load_full_text(db_session, file_id) or "").split()),
+            "confidence_score": ai_analysis.get("confidence_score", 0),
+            "deepseek_response": ai_analysis,
+            "reused_from": source.file_id
         }
+    
+    def _call_deepseek_api(self, parsed_content: Dict) -> Dict:
+        """
+        调用DeepSeek API进行智能分析（增强版：支持缓存+重试机制+三维度图谱数据提取）
         
-        doc = Document(file_path)
-        
-        # 提取段落
-        paragraphs = []
-        full_text_parts = []
+        开启分块分析且全文超过一块的 token 预算时，切块并发分析后合并各块结果；
+        否则只分析文本开头的 PARSE_ANALYSIS_CHARS 个字符。
+        结果中的 analysis_usage 记录本文档的 token 用量和耗时。
+        """
+        text = parsed_content.get("text", "")
+        if settings.PARSE_ANALYSIS_CHUNKED and estimate_tokens(text) > settings.PARSE_ANALYSIS_CHUNK_TOKENS:
+            return self._analyze_chunked(text)
         
-        for para in doc.paragraphs:
-            if para.text.strip():  # 跳过空段落
-                paragraphs.append({
-                    "text": para.text,
-                    "style": para.style.name,
-                    "runs": [{"text": run.text, "bold": run.bold, "italic": run.italic} for run in para.runs]
-                })
-                full_text_parts.append(para.text)
-        
-        content["paragraphs"] = paragraphs
-        content["text"] = "\n".join(full_text_parts)
-        
-        # 提取表格
-        tables = []
-        for table in doc.tables:
-            table_data = []
-            for row in table.rows:
-                row_data = [cell.text.strip() for cell in row.cells]
-                table_data.append(row_data)
-            tables.append(table_data)
-        
-        content["tables"] = tables
-        
-        # 提取文档属性
-        core_props = doc.core_properties
-        content["metadata"] = {
-            "title": core_props.title or "",
-            "author": core_props.author or "",
-            "subject": core_props.subject or "",
-            "created": core_props.created.isoformat() if core_props.created else None,
-            "modified": core_props.modified.isoformat() if core_props.modified else None,
-            "word_count": len(content["text"].split())
-        }
+        text_sample = text[:settings.PARSE_ANALYSIS_CHARS]  # 限制长度
+        if not text_sample.strip():
+            return self._empty_analysis()
         
-        return content
+        start = time.perf_counter()
+        result, usage = self._analyze_text(text_sample)
+        result["analysis_usage"] = self._record_usage([usage], time.perf_counter() - start)
+        return result
     
-    def _parse_txt(self, file_path: Path) -> Dict:
-        """解析纯文本文件"""
-        # 检测编码
-        with open(file_path, 'rb') as file:
-            raw_data = file.read()
-            encoding = chardet.detect(raw_data)['encoding'] or 'utf-8'
-        
-        # 读取内容
-        with open(file_path, 'r', encoding=encoding, errors='ignore') as file:
-            text = file.read()
-        
-        # 按段落分割（空行分隔）
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-        
-        content = {
-            "text": text,
-            "paragraphs": [{"text": p, "line_count": len(p.split('\n'))} for p in paragraphs],
-            "metadata": {
-                "encoding": encoding,
-                "character_count": len(text),
-                "word_count": len(text.split()),
-                "line_count": len(text.split('\n')),
-                "paragraph_count": len(paragraphs)
-            }
+    def _analyze_chunked(self, text: str) -> Dict:
+        """切块后并发分析（并发数 PARSE_ANALYSIS_CONCURRENCY），每块单独缓存，再合并结果"""
+        chunks = split_chunks(text, settings.PARSE_ANALYSIS_CHUNK_TOKENS, settings.PARSE_ANALYSIS_MAX_CHUNKS)
+        if not chunks:
+            return self._empty_analysis()
+        
+        start = time.perf_counter()
+        workers = max(1, min(settings.PARSE_ANALYSIS_CONCURRENCY, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(self._analyze_text, chunks))
+        
+        result = merge_analyses([chunk_result for chunk_result, _ in outcomes])
+        result["analysis_usage"] = self._record_usage([usage for _, usage in outcomes], time.perf_counter() - start)
+        logger.info(f"分块分析完成: {len(chunks)} 块, {result['analysis_usage']}")
+        return result
+    
+    @staticmethod
+    def _empty_analysis() -> Dict:
+        return {
+            "abstract": "",
+            "keywords": [],
+            "theories": [],
+            "experiment_flow": "",
+            "statistical_methods": [],
+            "conclusion": "",
+            "confidence_score": 0.0,
+            # 三维度图谱新增字段
+            "authors": [],
+            "theories_used": [],
+            "entities": [],
+            "entity_relations": []
         }
-        
-        return content
     
-    def _parse_markdown(self, file_path: Path) -> Dict:
-        """解析Markdown文档"""
-        # 读取原始内容
-        with open(file_path, 'r', encoding='utf-8') as file:
-            md_text = file.read()
-        
-        # 转换为HTML
-        html = markdown.markdown(md_text, extensions=['extra', 'codehilite'])
-        
-        # 解析HTML结构
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # 提取结构化内容
-        sections = []
-        current_section = {"level": 0, "title": "", "content": []}
-        
-        for element in soup.children:
-            if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                level = int(element.name[1])
-                
-                # 保存前一个section
-                if current_section["content"]:
-                    sections.append(current_section.copy())
-                
-                # 开始新section
-                current_section = {
-                    "level": level,
-                    "title": element.get_text().strip(),
-                    "content": [],
-                    "id": element.get('id', '')
-                }
-            elif element.name in ['p', 'div', 'blockquote']:
-                text = element.get_text().strip()
-                if text:
-                    current_section["content"].append({
-                        "type": element.name,
-                        "text": text
-                    })
-            elif element.name == 'ul':
-                items = [li.get_text().strip() for li in element.find_all('li')]
-                if items:
-                    current_section["content"].append({
-                        "type": "list",
-                        "items": items
-                    })
-        
-        # 添加最后一个section
-        if current_section["content"]:
-            sections.append(current_section)
-        
-        content = {
-            "text": md_text,
-            "html": html,
-            "sections": sections,
-            "metadata": {
-                "header_count": len([s for s in sections if s["title"]]),
-                "paragraph_count": len([c for s in sections for c in s["content"] if c["type"] == "p"]),
-                "list_count": len([c for s in sections for c in s["content"] if c["type"] == "list"])
-            }
+    def _record_usage(self, usages: List[Dict], wall_seconds: float) -> Dict:
+        """汇总单个文档各次分析的用量，并累计到解析器统计"""
+        summary = {
+            "chunks": len(usages),
+            "cached_chunks": sum(1 for u in usages if u["cached"]),
+            "mock_chunks": sum(1 for u in usages if u["mock"]),
+            "prompt_tokens": sum(u["prompt_tokens"] for u in usages),
+            "completion_tokens": sum(u["completion_tokens"] for u in usages),
+            "api_seconds": round(sum(u["seconds"] for u in usages), 3),
+            "wall_seconds": round(wall_seconds, 3)
         }
+        summary["total_tokens"] = summary["prompt_tokens"] + summary["completion_tokens"]
         
-        return content
+        with self._analysis_lock:
+            self.analysis_stats["documents"] += 1
+            for key in ("chunks", "cached_chunks", "prompt_tokens", "completion_tokens", "api_seconds"):
+                self.analysis_stats[key] += summary[key]
+        return summary
     
-    def _call_deepseek_api(self, parsed_content: Dict) -> Dict:
-        """调用DeepSeek API进行智能分析（增强版：支持缓存+重试机制+三维度图谱数据提取）"""
-        import requests
-        import json
-        
-        text_sample = parsed_content.get("text", "")[:4000]  # 限制长度
-        if not text_sample.strip():
-            return {
-                "abstract": "",
-                "keywords": [],
-                "theories": [],
-                "experiment_flow": "",
-                "statistical_methods": [],
-                "conclusion": "",
-                "confidence_score": 0.0,
-                # 三维度图谱新增字段
-                "authors": [],
-                "theories_used": [],
-                "entities": [],
-                "entity_relations": []
-            }
+    def _analyze_text(self, text_sample: str) -> Tuple[Dict, Dict]:
+        """
+        分析一段文本（命中缓存时不调用 API）
         
+        Returns:
+            (分析结果, 用量)；用量包含 cached、mock、prompt_tokens、completion_tokens、seconds，
+            API 未返回 usage 时按文本长度估算 token 数
+        """
         api_key = settings.DEEPSEEK_API_KEY
-        api_base = settings.DEEPSEEK_API_BASE
         model = settings.DEEPSEEK_MODEL
+        usage = {"cached": False, "mock": False, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0}
         
-        # 1. 检查缓存
-        cached_response = self.cache.get(text_sample, model)
-        if cached_response:
-            logger.info(f"从缓存加载 DeepSeek 响应")
-            return cached_response
+        def compute() -> Dict:
+            # API 未配置时不请求也不缓存；已缓存的响应仍然可以使用
+            if api_key == "your-deepseek-api-key":
+                raise _ApiKeyNotConfigured()
+            return self._request_analysis(text_sample, model, usage)
         
-        # 2. API 未配置时使用模拟数据
-        if api_key == "your-deepseek-api-key":
+        # 查缓存，未命中时单飞调用 API：同一段文本在本机所有进程中只请求一次，其余调用方等待并读取其结果
+        start = time.perf_counter()
+        try:
+            result, shared = self.cache.get_or_compute(text_sample, compute, model)
+        except _ApiKeyNotConfigured:
             logger.warning("DeepSeek API Key未配置，使用模拟数据")
-            return self._mock_deepseek_response(text_sample)
-        
-        # 3. 准备 API 请求
-        url = f"{api_base.rstrip('/')}/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+            usage["mock"] = True
+            return self._mock_deepseek_response(text_sample), usage
+        except Exception as e:
+            logger.error(f"DeepSeek API调用失败（已重试）: {e}")
+            # 返回模拟数据作为降级处理
+            usage["mock"] = True
+            usage["seconds"] = time.perf_counter() - start
+            return self._mock_deepseek_response(text_sample), usage
+        
+        if shared:
+            logger.info("从缓存加载 DeepSeek 响应")
+            usage["cached"] = True
+            return dict(result), usage
+        
+        logger.info("DeepSeek API 响应已缓存")
+        # 结果对象同时存放在内存缓存中，返回副本避免调用方修改缓存条目
+        return dict(result), usage
+    
+    def _request_analysis(self, text_sample: str, model: str, usage: Dict) -> Dict:
+        """
+        请求 DeepSeek 分析一段文本（失败时抛出异常，由调用方降级）
         
+        Args:
+            text_sample: 文本
+            model: 模型名称
+            usage: 用量字典，写入耗时和 token 数
+        """
+        # 1. 准备 API 请求
         # 增强的提示词，提取三维度图谱数据
         prompt = f"""你是一个专业的学习平台知识图谱系统AI分析助手。请根据下面的文档内容，提取以下信息并以JSON格式返回：
 {{
@@ -394,55 +443,49 @@ class DocumentParser:
             "max_tokens": 2000
         }
         
-        # 4. 使用重试机制调用 API
-        def _make_api_request():
-            """实际执行 API 请求的内部函数"""
-            timeout = settings.DEEPSEEK_REQUEST_TIMEOUT if hasattr(settings, 'DEEPSEEK_REQUEST_TIMEOUT') else 60
-            resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=timeout)
-            resp.raise_for_status()
-            return resp.json()
-        
+        # 2. 通过共享连接池的客户端调用 API（重试退避在事件循环中等待，不占用连接）
+        start = time.perf_counter()
+        data = self._get_llm_client().complete(payload, retry=self.retry_handler)
+        content = data["choices"][0]["message"]["content"]
+        usage["seconds"] = time.perf_counter() - start
+        api_usage = data.get("usage") or {}
+        usage["prompt_tokens"] = api_usage.get("prompt_tokens") or estimate_tokens(prompt)
+        usage["completion_tokens"] = api_usage.get("completion_tokens") or estimate_tokens(content)
+        
+        # 清理 Markdown 代码块标记
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        
+        # 尝试解析JSON
         try:
-            # 使用重试机制执行请求
-            data = self.retry_handler.execute_with_retry(_make_api_request)
-            content = data["choices"][0]["message"]["content"]
-            
-            # 清理 Markdown 代码块标记
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            # 尝试解析JSON
-            try:
-                result = json.loads(content)
-            except json.JSONDecodeError:
-                # 如果返回非JSON，包装成默认结构
-                result = {
-                    "abstract": content[:200],
-                    "keywords": [],
-                    "theories": [],
-                    "experiment_flow": "",
-                    "statistical_methods": [],
-                    "conclusion": "",
-                    "confidence_score": 0.7,
-                    "authors": [],
-                    "theories_used": [],
-                    "entities": [],
-                    "entity_relations": []
-                }
-            result["confidence_score"] = 0.9
-            
-            # 5. 保存到缓存
-            self.cache.set(text_sample, result, model)
-            logger.info("DeepSeek API 响应已缓存")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"DeepSeek API调用失败（已重试）: {e}")
-            # 返回模拟数据作为降级处理
-            return self._mock_deepseek_response(text_sample)
+            result = json.loads(content)
+        except json.JSONDecodeError:
+            # 如果返回非JSON，包装成默认结构
+            result = {
+                "abstract": content[:200],
+                "keywords": [],
+                "theories": [],
+                "experiment_flow": "",
+                "statistical_methods": [],
+                "conclusion": "",
+                "confidence_score": 0.7,
+                "authors": [],
+                "theories_used": [],
+                "entities": [],
+                "entity_relations": []
+            }
+        result["confidence_score"] = 0.9
+        
+        return result
+    
+    def _get_llm_client(self):
+        if self._llm_client is None:
+            # 只有真正调用 API 时才需要 httpx
+            from app.utils.llm_client import get_llm_client
+            self._llm_client = get_llm_client()
+        return self._llm_client
     
     def _mock_deepseek_response(self, text_sample: str) -> Dict:
         """生成模拟响应（当API不可用时）"""
@@ -625,7 +668,14 @@ class DocumentParser:
         
         return entities[:15]
     
-    def _save_parse_result(self, file_id: int, parsed_content: Dict, ai_analysis: Dict) -> Dict:
+    def _save_parse_result(
+        self,
+        file_id: int,
+        parsed_content: Dict,
+        ai_analysis: Dict,
+        profile: Optional[str] = None,
+        with_tables: bool = False
+    ) -> Dict:
         """保存解析结果到数据库"""
         try:
             with get_db() as db_session:
@@ -649,10 +699,21 @@ class DocumentParser:
                 detail.experiment_flow = ai_analysis.get("experiment_flow")
                 detail.statistical_methods = ai_analysis.get("statistical_methods", [])
                 detail.conclusion = ai_analysis.get("conclusion")
-                detail.full_text = parsed_content.get("text", "")[:10000]  # 限制长度
                 detail.parse_status = "completed"
                 detail.parse_time = datetime.utcnow()
-                detail.deepseek_response = ai_analysis
+                detail.confidence_score = ai_analysis.get("confidence_score")
+                
+                # 全文和原始响应压缩后单独存储，详情行只保留结构化字段
+                detail.full_text = None
+                detail.deepseek_response = null()
+                save_parse_blobs(
+                    db_session, file_id,
+                    parsed_content.get("text", "")[:settings.PARSE_STORAGE_CHARS],  # 限制长度
+                    ai_analysis
+                )
+                detail.parse_profile = profile
+                # 本次未提取表格时清空旧缓存，详情接口访问时按当前文件内容重新提取
+                detail.tables = parsed_content.get("tables", []) if with_tables else None
                 
                 # 更新三维度图谱字段（新增）
                 detail.authors = ai_analysis.get("authors", [])
@@ -667,6 +728,8 @@ class DocumentParser:
                     "file_id": file_id,
                     "parse_time": detail.parse_time.isoformat(),
                     "word_count": len(parsed_content.get("text", "").split()),
+                    "truncated": parsed_content.get("truncated", False),
+                    "profile": profile,
                     "confidence_score": ai_analysis.get("confidence_score", 0),
                     "deepseek_response": ai_analysis
                 }
@@ -715,7 +778,11 @@ class DocumentParser:
         """
         return {
             "cache": self.cache.get_stats(),
-            "retry": self.retry_handler.get_stats()
+            "retry": self.retry_handler.get_stats(),
+            "dedup": {"reused": self.dedup_reused},
+            "analysis": {**self.analysis_stats, "api_seconds": round(self.analysis_stats["api_seconds"], 3)},
+            "engine": self.engine.get_stats(),
+            "llm_client": self._llm_client.get_stats() if self._llm_client is not None else None
         }
     
     def clear_cache(self):
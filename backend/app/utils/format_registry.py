@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档格式注册表 - 每种格式的处理器声明扩展名、开销等级和是否流式读取
+
+内置格式在 document_extractor 导入时注册；新增格式只需调用 register_format，
+DocumentExtractor 的提取和 ParseEngine 的调度都按注册表查找处理器。
+"""
+
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 开销等级：light 在调用线程内直接提取；heavy 交给解析进程池
+COST_LIGHT = "light"
+COST_HEAVY = "heavy"
+
+
+class FormatHandler(NamedTuple):
+    """格式处理器"""
+    name: str
+    extensions: Tuple[str, ...]
+    # parse(extractor, file_path, options) -> 提取结果
+    parse: Callable
+    cost: str = COST_HEAVY
+    # 是否逐页/逐行流式读取（内存占用不随文档大小增长）
+    streaming: bool = False
+    # tables(extractor, file_path) -> 表格列表（None 表示该格式没有表格）
+    tables: Optional[Callable] = None
+    # 依赖的可选库未安装时为 False，requires 为需要安装的包名
+    available: bool = True
+    requires: str = ""
+
+
+FORMAT_HANDLERS: Dict[str, FormatHandler] = {}
+
+_builtin_loaded = False
+
+
+def register_format(handler: FormatHandler):
+    """注册格式处理器（扩展名已注册时覆盖原处理器）"""
+    if handler.cost not in (COST_LIGHT, COST_HEAVY):
+        raise ValueError(f"未知的开销等级: {handler.cost}")
+    for extension in handler.extensions:
+        extension = extension.lower()
+        if extension in FORMAT_HANDLERS:
+            logger.debug(f"格式 {extension} 的处理器由 {FORMAT_HANDLERS[extension].name} 替换为 {handler.name}")
+        FORMAT_HANDLERS[extension] = handler
+
+
+def _load_builtin():
+    global _builtin_loaded
+    if not _builtin_loaded:
+        # 导入时注册内置格式
+        import app.utils.document_extractor  # noqa: F401
+        _builtin_loaded = True
+
+
+def get_format_handler(extension: str) -> Optional[FormatHandler]:
+    """按扩展名查找处理器（未注册时返回 None）"""
+    _load_builtin()
+    return FORMAT_HANDLERS.get(extension.lower())
+
+
+def supported_extensions() -> List[str]:
+    """可以解析的扩展名（不含缺少可选依赖的格式）"""
+    _load_builtin()
+    return sorted(ext for ext, handler in FORMAT_HANDLERS.items() if handler.available)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 客户端 - 通过常驻连接池异步调用 DeepSeek（OpenAI 兼容）接口
+
+每个进程一个后台事件循环线程，所有请求共享同一个 httpx.AsyncClient：
+连接保持 keep-alive 复用，不再每个文档重新建立 TCP/TLS 连接；
+同时在途的请求数由信号量限制。重试退避使用 asyncio.sleep，
+等待重试的请求不占用线程和连接，一个工作进程可以同时保持几十个分析请求。
+配置了 RateLimiter 时，每次发送前按估算的 token 数取得许可，响应的状态码、
+耗时和实际用量反馈给限流器调整额度和并发上限。
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+import httpx
+
+from app.utils.chunked_analysis import estimate_tokens
+from app.utils.deepseek_retry import DeepSeekRetry
+from app.utils.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+
+
+class LLMClient:
+    """
+    DeepSeek 异步客户端
+
+    协程代码使用 acomplete()，同步代码（解析线程、Celery 任务）使用 complete()，
+    两者都在客户端自己的事件循环中执行请求。
+    """
+
+    def __init__(
+        self,
+        api_base: str,
+        api_key: str,
+        timeout: float = 60.0,
+        max_concurrency: int = 32,
+        max_keepalive: int = 16,
+        keepalive_expiry: float = 30.0,
+        limiter: Optional[RateLimiter] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Args:
+            api_base: 接口地址
+            api_key: API Key
+            timeout: 单次请求超时（秒）
+            max_concurrency: 同时在途的请求数上限（也是连接数上限）
+            max_keepalive: 保持的空闲连接数
+            keepalive_expiry: 空闲连接保持时间（秒）
+            limiter: 限流器（None 表示不限流）
+            transport: 自定义传输层（测试用）
+        """
+        self.api_base = api_base.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.limiter = limiter
+        self._transport = transport
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        # 以下对象只在事件循环线程中创建和使用
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def acomplete(self, payload: Dict, retry: Optional[DeepSeekRetry] = None) -> Dict:
+        """在协程中调用 chat/completions（可以在任意事件循环中 await）"""
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await self._complete(payload, retry)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._complete(payload, retry), loop))
+
+    def complete(self, payload: Dict, retry: Optional[DeepSeekRetry] = None) -> Dict:
+        """同步调用 chat/completions（阻塞当前线程直到完成，请求本身在事件循环中执行）"""
+        return self.submit(payload, retry).result()
+
+    def submit(self, payload: Dict, retry: Optional[DeepSeekRetry] = None) -> Future:
+        """提交请求，立即返回 concurrent.futures.Future"""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("不能在客户端事件循环线程中同步等待请求，请使用 acomplete()")
+        return asyncio.run_coroutine_threadsafe(self._complete(payload, retry), loop)
+
+    async def _complete(self, payload: Dict, retry: Optional[DeepSeekRetry]) -> Dict:
+        if retry is None:
+            return await self._post(payload)
+        return await retry.execute_with_retry_async(self._post, payload)
+
+    async def _post(self, payload: Dict) -> Dict:
+        """发送一次请求（只在请求期间占用并发名额，重试等待期间不占用）"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                transport=self._transport
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            permit = await self.limiter.acquire(estimate_payload_tokens(payload)) if self.limiter else None
+            feedback = {}
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            try:
+                response = await self._client.post(CHAT_COMPLETIONS_PATH, json=payload)
+                if response.status_code == 429:
+                    # 被限流的请求不消耗 token，退回预扣的额度
+                    feedback = {"throttled": True, "retry_after": _retry_after(response), "used_tokens": 0}
+                response.raise_for_status()
+                data = response.json()
+                feedback = {"succeeded": True, "used_tokens": (data.get("usage") or {}).get("total_tokens")}
+                return data
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+                if permit is not None:
+                    await self._release_permit(permit, feedback)
+
+    async def _release_permit(self, permit, feedback: Dict):
+        """交回限流许可（失败只记录日志，不覆盖请求本身的结果或异常；租约到期后自动失效）"""
+        try:
+            await self.limiter.arelease(permit, **feedback)
+        except Exception as e:
+            logger.warning(f"交回限流许可失败: {e}")
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动后台事件循环（fork 出的子进程中重新启动，父进程的循环线程不会被继承）"""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread, self._pid = loop, thread, os.getpid()
+                self._client = None
+                self._semaphore = None
+            return self._loop
+
+    def close(self):
+        """关闭连接池并停止事件循环"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                self._loop = None
+                return
+            self._loop = None
+
+        async def _shutdown():
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout=10)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=10)
+            loop.close()
+
+    def get_stats(self) -> Dict:
+        stats = {**self.stats, "max_concurrency": self.max_concurrency}
+        if self.limiter is not None:
+            stats["rate_limit"] = self.limiter.get_stats()
+        return stats
+
+
+def estimate_payload_tokens(payload: Dict) -> int:
+    """估算请求消耗的 token 数（消息内容 + 最大输出长度）"""
+    text = "".join(str(message.get("content") or "") for message in payload.get("messages") or [])
+    return estimate_tokens(text) + int(payload.get("max_tokens") or 0)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+
+_client_instance: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """获取进程内共享的 LLM 客户端"""
+    global _client_instance
+    if _client_instance is None:
+        with _client_lock:
+            if _client_instance is None:
+                from app.core.config import settings
+                from app.utils.rate_limiter import get_rate_limiter
+                _client_instance = LLMClient(
+                    api_base=settings.DEEPSEEK_API_BASE,
+                    api_key=settings.DEEPSEEK_API_KEY,
+                    timeout=settings.DEEPSEEK_REQUEST_TIMEOUT,
+                    max_concurrency=settings.DEEPSEEK_MAX_CONCURRENCY,
+                    max_keepalive=settings.DEEPSEEK_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.DEEPSEEK_KEEPALIVE_EXPIRY,
+                    limiter=get_rate_limiter()
+                )
+    return _client_instance
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown 结构提取 - 逐行扫描块级元素，直接生成章节结构
+
+不渲染 HTML、不做代码高亮：标题划分章节，段落、引用、无序列表和代码块
+作为章节内容，行内标记（强调、链接、行内代码等）只保留文字。
+有序列表、表格、水平线、HTML 块和链接定义不计入章节内容。
+"""
+
+import re
+from typing import Dict, Iterator, List, Tuple
+
+_ATX_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_SETEXT_UNDERLINE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_HEADING_ATTRS = re.compile(r"[ \t]*\{[ \t]*#([\w-]+)[^}]*\}$")
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_HR = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_BULLET = re.compile(r"^([ \t]*)[-*+][ \t]+(.*)$")
+_ORDERED = re.compile(r"^([ \t]*)\d+[.)][ \t]+(.*)$")
+_QUOTE = re.compile(r"^ {0,3}>[ ]?(.*)$")
+_HTML_BLOCK = re.compile(r"^ {0,3}<(?:[a-zA-Z][\w-]*|!--)")
+_LINK_DEF = re.compile(r"^ {0,3}\[[^\]]+\]:\s*\S")
+_TABLE_DIVIDER = re.compile(r"^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)+\|?[ \t]*$")
+
+# 行内标记 -> 纯文本（按顺序替换）
+_INLINE_RULES = [
+    (re.compile(r"`+([^`]*?)`+"), r"\1"),
+    (re.compile(r"!\[[^\]]*\]\([^)]*\)"), ""),
+    (re.compile(r"\[([^\]]*)\]\([^)]*\)"), r"\1"),
+    (re.compile(r"\[([^\]]*)\]\[[^\]]*\]"), r"\1"),
+    (re.compile(r"<((?:https?|ftp)://[^>]+|[^@\s>]+@[^@\s>]+)>"), r"\1"),
+    (re.compile(r"</?[a-zA-Z][^>]*>"), ""),
+    (re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1"), r"\2"),
+    (re.compile(r"\*(?=\S)(.+?)(?<=\S)\*"), r"\1"),
+    (re.compile(r"(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)"), r"\1"),
+    (re.compile(r"\\([\\`*_{}\[\]()#+\-.!>|])"), r"\1"),
+]
+
+
+def strip_inline(text: str) -> str:
+    """去掉行内 Markdown 标记，只保留文字"""
+    for pattern, replacement in _INLINE_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _blank(line: str) -> bool:
+    return not line.strip()
+
+
+def _starts_block(line: str) -> bool:
+    """该行是否会打断正在累积的段落"""
+    return bool(
+        _ATX_HEADING.match(line) or _FENCE.match(line) or _QUOTE.match(line)
+        or _HR.match(line) or _BULLET.match(line)
+    )
+
+
+def iter_blocks(md_text: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    逐行扫描块级元素
+
+    Yields:
+        (类型, 数据)：heading {"level", "title", "id"}；p/blockquote/code {"text"}；list {"items"}
+    """
+    lines = md_text.splitlines()
+    n = len(lines)
+    i = 0
+    while i < n:
+        line = lines[i]
+
+        if _blank(line):
+            i += 1
+            continue
+
+        # 围栏代码块
+        fence = _FENCE.match(line)
+        if fence:
+            marker = fence.group(1)
+            body = []
+            i += 1
+            while i < n and not lines[i].strip().startswith(marker[0] * len(marker)):
+                body.append(lines[i])
+                i += 1
+            i += 1
+            text = "\n".join(body).strip()
+            if text:
+                yield "code", {"text": text}
+            continue
+
+        # 缩进代码块
+        if line.startswith("    ") or line.startswith("\t"):
+            body = []
+            while i < n and (_blank(lines[i]) or lines[i].startswith("    ") or lines[i].startswith("\t")):
+                body.append(lines[i])
+                i += 1
+            text = "\n".join(body).strip()
+            if text:
+                yield "code", {"text": text}
+            continue
+
+        heading = _ATX_HEADING.match(line)
+        if heading:
+            yield "heading", _heading(len(heading.group(1)), heading.group(2) or "")
+            i += 1
+            continue
+
+        if _HR.match(line):
+            i += 1
+            continue
+
+        # 引用块（到空行为止，允许省略 > 的延续行）
+        if _QUOTE.match(line):
+            body = []
+            while i < n and not _blank(lines[i]):
+                quote = _QUOTE.match(lines[i])
+                body.append(quote.group(1) if quote else lines[i])
+                i += 1
+            text = "\n".join(strip_inline(part.strip()) for part in body if part.strip())
+            if text:
+                yield "blockquote", {"text": text}
+            continue
+
+        # 列表（无序列表计入内容，有序列表跳过）
+        list_item = _BULLET.match(line) or _ORDERED.match(line)
+        if list_item:
+            ordered = _BULLET.match(line) is None
+            items = []
+            while i < n:
+                current = lines[i]
+                if _blank(current):
+                    # 空行后仍是列表项或缩进内容时，列表继续
+                    if i + 1 < n and (_BULLET.match(lines[i + 1]) or _ORDERED.match(lines[i + 1])
+                                      or lines[i + 1].startswith(("  ", "\t"))):
+                        i += 1
+                        continue
+                    break
+                item = _BULLET.match(current) or _ORDERED.match(current)
+                if item:
+                    items.append(item.group(2).strip())
+                elif items and (current.startswith((" ", "\t")) or not _starts_block(current)):
+                    items[-1] += "\n" + current.strip()
+                else:
+                    break
+                i += 1
+            items = [strip_inline(item) for item in items if item]
+            if items and not ordered:
+                yield "list", {"items": items}
+            continue
+
+        # HTML 块和链接定义
+        if _HTML_BLOCK.match(line) or _LINK_DEF.match(line):
+            while i < n and not _blank(lines[i]):
+                i += 1
+            continue
+
+        # 段落（可能是 Setext 标题或表格）
+        body = [line]
+        i += 1
+        setext_level = None
+        while i < n and not _blank(lines[i]):
+            underline = _SETEXT_UNDERLINE.match(lines[i])
+            if underline:
+                setext_level = 1 if underline.group(1)[0] == "=" else 2
+                i += 1
+                break
+            if _starts_block(lines[i]):
+                break
+            body.append(lines[i])
+            i += 1
+
+        if setext_level is not None:
+            yield "heading", _heading(setext_level, " ".join(part.strip() for part in body))
+            continue
+        if len(body) > 1 and _TABLE_DIVIDER.match(body[1]):
+            continue
+        text = "\n".join(strip_inline(part.strip()) for part in body).strip()
+        if text:
+            yield "p", {"text": text}
+
+
+def _heading(level: int, raw: str) -> Dict:
+    heading_id = ""
+    attrs = _HEADING_ATTRS.search(raw)
+    if attrs:
+        heading_id = attrs.group(1)
+        raw = raw[:attrs.start()]
+    return {"level": level, "title": strip_inline(raw.strip()), "id": heading_id}
+
+
+def parse_sections(md_text: str) -> List[Dict]:
+    """
+    按标题划分章节
+
+    Returns:
+        章节列表，每项包含 level、title、content（第一个标题之前的内容为 level 0 章节）；
+        没有内容的章节不输出
+    """
+    sections = []
+    current_section = {"level": 0, "title": "", "content": []}
+
+    for kind, data in iter_blocks(md_text):
+        if kind == "heading":
+            # 保存前一个section
+            if current_section["content"]:
+                sections.append(current_section)
+            current_section = {**data, "content": []}
+        elif kind == "list":
+            current_section["content"].append({"type": "list", "items": data["items"]})
+        else:
+            current_section["content"].append({"type": kind, "text": data["text"]})
+
+    # 添加最后一个section
+    if current_section["content"]:
+        sections.append(current_section)
+
+    return sections
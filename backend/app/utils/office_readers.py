@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Office 文档读取 - PPTX/XLSX 直接读取压缩包内的 XML，XLS/DOC 读取 OLE 复合文档
+
+PPTX 每次只解析一页幻灯片，XLSX 逐行流式读取工作表，都不加载整个文档。
+XLS 依赖 xlrd、DOC 依赖 olefile，均为可选依赖。
+"""
+
+import re
+import struct
+import zipfile
+import posixpath
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+# xlrd 为可选依赖，未安装时不支持 .xls
+try:
+    import xlrd
+    XLRD_AVAILABLE = True
+except ImportError:
+    XLRD_AVAILABLE = False
+
+# olefile 为可选依赖，未安装时不支持 .doc
+try:
+    import olefile
+    OLEFILE_AVAILABLE = True
+except ImportError:
+    OLEFILE_AVAILABLE = False
+
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+# 幻灯片中作为标题的占位符类型
+_PPTX_TITLE_TYPES = {"title", "ctrTitle"}
+
+
+def _relationships(archive: zipfile.ZipFile, rels_path: str, base_dir: str) -> Dict[str, str]:
+    """读取关系文件，返回 关系 ID -> 压缩包内路径"""
+    if rels_path not in archive.namelist():
+        return {}
+    root = ElementTree.fromstring(archive.read(rels_path))
+    targets = {}
+    for rel in root.iter(_REL):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            targets[rel.get("Id")] = target.lstrip("/")
+        else:
+            targets[rel.get("Id")] = posixpath.normpath(posixpath.join(base_dir, target))
+    return targets
+
+
+def _numbered_parts(archive: zipfile.ZipFile, pattern: str) -> List[str]:
+    """按文件名中的序号排序（关系文件缺失时的后备顺序）"""
+    regex = re.compile(pattern)
+    matches = [(int(m.group(1)), name) for name in archive.namelist() for m in [regex.fullmatch(name)] if m]
+    return [name for _, name in sorted(matches)]
+
+
+# ---------- PPTX ----------
+
+def pptx_slide_paths(archive: zipfile.ZipFile) -> List[str]:
+    """按演示文稿中的放映顺序列出幻灯片"""
+    names = set(archive.namelist())
+    rels = _relationships(archive, "ppt/_rels/presentation.xml.rels", "ppt")
+    paths = []
+    if "ppt/presentation.xml" in names:
+        root = ElementTree.fromstring(archive.read("ppt/presentation.xml"))
+        for slide_id in root.iter(f"{_P}sldId"):
+            target = rels.get(slide_id.get(_R_ID))
+            if target in names:
+                paths.append(target)
+    return paths or _numbered_parts(archive, r"ppt/slides/slide(\d+)\.xml")
+
+
+def _drawing_text(paragraph) -> str:
+    return "".join(
+        (node.text or "") if node.tag == f"{_A}t" else "\n"
+        for node in paragraph.iter() if node.tag in (f"{_A}t", f"{_A}br")
+    )
+
+
+def read_pptx_slide(archive: zipfile.ZipFile, path: str) -> Dict:
+    """
+    读取一页幻灯片
+
+    Returns:
+        {"title", "paragraphs", "tables"}：paragraphs 为文本框中的非空段落（按文档顺序），
+        tables 为表格的行列文本
+    """
+    root = ElementTree.fromstring(archive.read(path))
+    title_parts = []
+    paragraphs = []
+    for shape in root.iter(f"{_P}sp"):
+        body = shape.find(f"{_P}txBody")
+        if body is None:
+            continue
+        placeholder = shape.find(f"{_P}nvSpPr/{_P}nvPr/{_P}ph")
+        is_title = placeholder is not None and placeholder.get("type") in _PPTX_TITLE_TYPES
+        for paragraph in body.iter(f"{_A}p"):
+            text = _drawing_text(paragraph).strip()
+            if text:
+                paragraphs.append(text)
+                if is_title:
+                    title_parts.append(text)
+
+    tables = []
+    for table in root.iter(f"{_A}tbl"):
+        tables.append([
+            [
+                "\n".join(_drawing_text(p) for p in cell.iter(f"{_A}p")).strip()
+                for cell in row.findall(f"{_A}tc")
+            ]
+            for row in table.findall(f"{_A}tr")
+        ])
+
+    return {"title": " ".join(title_parts), "paragraphs": paragraphs, "tables": tables}
+
+
+# ---------- XLSX / XLS ----------
+
+def _column_index(cell_ref: str) -> int:
+    """单元格引用的列序号（"C5" -> 2）"""
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _rich_text(node) -> str:
+    """共享字符串/内联字符串的文本（忽略拼音注音 rPh）"""
+    parts = []
+    for child in node:
+        if child.tag == f"{_S}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{_S}r":
+            parts.extend(t.text or "" for t in child.findall(f"{_S}t"))
+    return "".join(parts)
+
+
+def _xlsx_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    with archive.open("xl/sharedStrings.xml") as xml:
+        for _, elem in ElementTree.iterparse(xml):
+            if elem.tag == f"{_S}si":
+                strings.append(_rich_text(elem))
+                elem.clear()
+    return strings
+
+
+def _xlsx_cell_value(cell, shared_strings: List[str]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        inline = cell.find(f"{_S}is")
+        return _rich_text(inline) if inline is not None else ""
+    value = cell.find(f"{_S}v")
+    if value is None or value.text is None:
+        return ""
+    if cell_type == "s":
+        try:
+            return shared_strings[int(value.text)]
+        except (ValueError, IndexError):
+            return ""
+    if cell_type == "b":
+        return "TRUE" if value.text == "1" else "FALSE"
+    # 数字按存储的原值返回（日期为序列号，不按单元格格式转换）
+    return value.text
+
+
+def _iter_xlsx_sheet_rows(archive: zipfile.ZipFile, path: str, shared_strings: List[str]) -> Iterator[List[str]]:
+    """逐行读取工作表（跳过空行），读完的行随即从内存中清除"""
+    with archive.open(path) as xml:
+        sheet_data = None
+        row = {}
+        next_column = 0
+        for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{_S}sheetData":
+                    sheet_data = elem
+                continue
+            if elem.tag == f"{_S}c":
+                ref = elem.get("r")
+                column = _column_index(ref) if ref else next_column
+                next_column = column + 1
+                value = _xlsx_cell_value(elem, shared_strings)
+                if value != "":
+                    row[column] = value
+            elif elem.tag == f"{_S}row":
+                if row:
+                    yield [row.get(i, "") for i in range(max(row) + 1)]
+                row = {}
+                next_column = 0
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+
+@contextmanager
+def open_xlsx(file_path: Union[str, Path]):
+    """
+    打开 XLSX 工作簿
+
+    Yields:
+        (工作表名称列表, 行迭代器)，行迭代器依次产出 (工作表序号, 行的单元格文本)
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        names = set(archive.namelist())
+        rels = _relationships(archive, "xl/_rels/workbook.xml.rels", "xl")
+        sheets = []
+        if "xl/workbook.xml" in names:
+            root = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+            for sheet in root.iter(f"{_S}sheet"):
+                target = rels.get(sheet.get(_R_ID))
+                if target in names:
+                    sheets.append((sheet.get("name", ""), target))
+        if not sheets:
+            sheets = [(f"Sheet{i + 1}", path) for i, path in
+                      enumerate(_numbered_parts(archive, r"xl/worksheets/sheet(\d+)\.xml"))]
+        shared_strings = _xlsx_shared_strings(archive)
+
+        def rows():
+            for index, (_, path) in enumerate(sheets):
+                for row in _iter_xlsx_sheet_rows(archive, path, shared_strings):
+                    yield index, row
+
+        yield [name for name, _ in sheets], rows()
+
+
+def _xls_cell_text(cell, datemode: int) -> str:
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return ""
+    if cell.ctype == xlrd.XL_CELL_NUMBER:
+        value = cell.value
+        return str(int(value)) if value.is_integer() else repr(value)
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        try:
+            return xlrd.xldate_as_datetime(cell.value, datemode).isoformat()
+        except (ValueError, OverflowError, xlrd.xldate.XLDateError):
+            return str(cell.value)
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return "TRUE" if cell.value else "FALSE"
+    if cell.ctype == xlrd.XL_CELL_ERROR:
+        return xlrd.error_text_from_code.get(cell.value, "")
+    return str(cell.value)
+
+
+@contextmanager
+def open_xls(file_path: Union[str, Path]):
+    """打开 XLS 工作簿（按需逐个加载工作表，读完即释放），产出值同 open_xlsx"""
+    if not XLRD_AVAILABLE:
+        raise RuntimeError("解析 .xls 需要安装 xlrd")
+    book = xlrd.open_workbook(str(file_path), on_demand=True)
+    try:
+        def rows():
+            for index in range(book.nsheets):
+                sheet = book.sheet_by_index(index)
+                for r in range(sheet.nrows):
+                    values = [_xls_cell_text(cell, book.datemode) for cell in sheet.row(r)]
+                    while values and values[-1] == "":
+                        values.pop()
+                    if values:
+                        yield index, values
+                book.unload_sheet(index)
+
+        yield book.sheet_names(), rows()
+    finally:
+        book.release_resources()
+
+
+# ---------- DOC（Word 97-2003）----------
+
+_DOC_MAGIC = 0xA5EC
+
+# 控制字符：段落/换行/分页/单元格结束标记转为空白，其余控制字符删除
+_DOC_TRANSLATE = {i: None for i in range(32) if i not in (9, 10)}
+_DOC_TRANSLATE.update({0x0D: "\n", 0x0B: "\n", 0x0C: "\n", 0x0E: "\n", 0x07: "\t", 0x1E: "-"})
+
+_FIELD_BEGIN, _FIELD_SEPARATOR, _FIELD_END = "\x13", "\x14", "\x15"
+
+
+def _strip_fields(text: str) -> str:
+    """删除域代码，只保留域结果（域可以嵌套）"""
+    if _FIELD_BEGIN not in text:
+        return text
+    output = []
+    # 每层域是否还在域代码部分（分隔符之前）
+    fields = []
+    for char in text:
+        if char == _FIELD_BEGIN:
+            fields.append(True)
+        elif char == _FIELD_SEPARATOR and fields:
+            fields[-1] = False
+        elif char == _FIELD_END and fields:
+            fields.pop()
+        elif not (fields and fields[-1]):
+            output.append(char)
+    return "".join(output)
+
+
+def doc_text(word_stream: bytes, read_stream: Callable[[str], bytes]) -> str:
+    """
+    从 WordDocument 流和表格流中读取正文文本
+
+    按 FIB 找到表格流中的分段表（piece table），依次读取正文的各个文本片段；
+    页眉、脚注等正文之后的内容不读取。
+
+    Args:
+        word_stream: WordDocument 流
+        read_stream: 按名称读取表格流（0Table / 1Table）
+    """
+    if len(word_stream) < 34 or struct.unpack_from("<H", word_stream, 0)[0] != _DOC_MAGIC:
+        raise ValueError("不是 Word 97-2003 文档")
+    flags = struct.unpack_from("<H", word_stream, 0x0A)[0]
+    if flags & 0x0100:
+        raise ValueError("加密的 DOC 文档无法解析")
+    table_name = "1Table" if flags & 0x0200 else "0Table"
+
+    # FibBase 之后依次是 fibRgW、fibRgLw 和 fibRgFcLcb，长度都记录在各自开头
+    pos = 32
+    csw = struct.unpack_from("<H", word_stream, pos)[0]
+    pos += 2 + csw * 2
+    cslw = struct.unpack_from("<H", word_stream, pos)[0]
+    ccp_text = struct.unpack_from("<i", word_stream, pos + 2 + 3 * 4)[0]
+    pos += 2 + cslw * 4
+    cb_rg_fc_lcb = struct.unpack_from("<H", word_stream, pos)[0]
+    pos += 2
+    if cb_rg_fc_lcb < 68:
+        raise ValueError("不支持的 DOC 版本")
+    fc_clx, lcb_clx = struct.unpack_from("<II", word_stream, pos + 66 * 4)
+
+    clx = read_stream(table_name)[fc_clx:fc_clx + lcb_clx]
+    i = 0
+    plc_pcd = None
+    while i < len(clx):
+        if clx[i] == 0x01:
+            # Prc：格式修改记录，跳过
+            i += 3 + struct.unpack_from("<h", clx, i + 1)[0]
+        elif clx[i] == 0x02:
+            length = struct.unpack_from("<I", clx, i + 1)[0]
+            plc_pcd = clx[i + 5:i + 5 + length]
+            break
+        else:
+            break
+    if plc_pcd is None:
+        raise ValueError("DOC 文档缺少分段表")
+
+    count = (len(plc_pcd) - 4) // 12
+    cps = struct.unpack_from(f"<{count + 1}I", plc_pcd, 0)
+    parts = []
+    remaining = ccp_text
+    for n in range(count):
+        if remaining <= 0:
+            break
+        length = min(cps[n + 1] - cps[n], remaining)
+        remaining -= length
+        fc = struct.unpack_from("<I", plc_pcd, (count + 1) * 4 + n * 8 + 2)[0]
+        if fc & 0x40000000:
+            # 压缩片段：每字符 1 字节（cp1252）
+            start = (fc & 0x3FFFFFFF) // 2
+            parts.append(word_stream[start:start + length].decode("cp1252", errors="replace"))
+        else:
+            start = fc & 0x3FFFFFFF
+            parts.append(word_stream[start:start + length * 2].decode("utf-16-le", errors="replace"))
+
+    return _strip_fields("".join(parts)).translate(_DOC_TRANSLATE)
+
+
+def _decode_property(value, codepage: Optional[int]) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        try:
+            return value.decode(f"cp{codepage}" if codepage else "cp1252", errors="replace").strip("\x00 ")
+        except LookupError:
+            return value.decode("latin-1").strip("\x00 ")
+    return str(value)
+
+
+def read_doc(file_path: Union[str, Path]) -> Tuple[str, Dict]:
+    """
+    读取 DOC 文档
+
+    Returns:
+        (正文文本, 文档属性 title/author/subject/created/modified)
+    """
+    if not OLEFILE_AVAILABLE:
+        raise RuntimeError("解析 .doc 需要安装 olefile")
+    with olefile.OleFileIO(str(file_path)) as ole:
+        text = doc_text(ole.openstream("WordDocument").read(), lambda name: ole.openstream(name).read())
+        meta = ole.get_metadata()
+
+    codepage = getattr(meta, "codepage", None)
+    properties = {
+        "title": _decode_property(meta.title, codepage),
+        "author": _decode_property(meta.author, codepage),
+        "subject": _decode_property(meta.subject, codepage),
+        "created": meta.create_time.isoformat() if isinstance(meta.create_time, datetime) else None,
+        "modified": meta.last_saved_time.isoformat() if isinstance(meta.last_saved_time, datetime) else None,
+    }
+    return text, properties
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析引擎 - 在进程池中执行 CPU 密集的文档内容提取
+
+每个工作进程启动时创建一个常驻的 DocumentExtractor（解析库只导入一次），
+提取结果回到主进程后再做 LLM 分析和入库。单个文档超时时终止并重建进程池，
+避免卡死的解析一直占用工作进程。
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ParseTimeoutError(Exception):
+    """单个文档的内容提取超时"""
+    pass
+
+
+# 工作进程内常驻的提取器
+_worker_extractor = None
+
+
+def _init_worker():
+    """工作进程初始化：预先创建提取器"""
+    global _worker_extractor
+    from app.utils.document_extractor import DocumentExtractor
+    _worker_extractor = DocumentExtractor()
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _extract_in_worker(file_path: str, options=None) -> Dict:
+    global _worker_extractor
+    if _worker_extractor is None:
+        _init_worker()
+    return _worker_extractor.extract(file_path, options)
+
+
+def _extract_tables_in_worker(file_path: str):
+    global _worker_extractor
+    if _worker_extractor is None:
+        _init_worker()
+    return _worker_extractor.extract_tables(file_path)
+
+
+class ParseEngine:
+    """
+    文档解析引擎
+
+    按格式注册表中的开销等级调度：heavy 格式交给进程池，light 格式（纯文本类）
+    在调用线程内直接提取，省去进程间传输；light 格式的文件超过 light_max_bytes
+    时同样交给进程池，以便受超时保护、不占用调用线程。禁用进程池或当前进程不允许创建子进程
+    （如 Celery prefork 工作进程）时全部在调用线程内提取，此时超时不生效。
+    """
+
+    def __init__(self, max_workers: int = 0, timeout: float = 300.0, use_processes: bool = True,
+                 light_max_bytes: int = 0):
+        """
+        Args:
+            max_workers: 工作进程数（0 表示按 CPU 核数）
+            timeout: 单个文档的提取超时（秒，0 表示不限制）
+            use_processes: 是否使用进程池
+            light_max_bytes: light 格式在调用线程内提取的文件大小上限（0 表示不限制）
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout or None
+        self.light_max_bytes = light_max_bytes
+        self.use_processes = use_processes and not multiprocessing.current_process().daemon
+        if use_processes and not self.use_processes:
+            logger.info("当前进程为守护进程，文档提取在线程内执行")
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        # 同时提交的任务数不超过工作进程数，超时只计算实际执行时间，不含排队
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._inline_extractor = None
+        # inline 为进程池模式下按开销等级在调用线程内提取的文档数
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "pool_restarts": 0, "inline": 0}
+        # PDF 各后端的使用次数和耗时（由提取结果中的 extraction 字段汇总）
+        self.pdf_stats = {"image_only": 0, "probe_seconds": 0.0, "backends": {}}
+
+    @property
+    def mode(self) -> str:
+        return "process" if self.use_processes else "inline"
+
+    def extract(self, file_path: str, options=None) -> Dict:
+        """
+        提取单个文档内容（阻塞直到完成、失败或超时）
+
+        Args:
+            file_path: 文档路径
+            options: 提取选项 ExtractOptions（None 表示默认选项）
+        """
+        if not self.use_processes:
+            result = self._count(self._get_inline_extractor().extract, str(file_path), options)
+        elif self._is_light(file_path):
+            self._bump("inline")
+            result = self._count(self._get_inline_extractor().extract, str(file_path), options)
+        else:
+            result = self.run(_extract_in_worker, str(file_path), options)
+        if result.get("extraction"):
+            self._record_extraction(result["extraction"])
+        return result
+
+    def extract_tables(self, file_path: str):
+        """单独提取文档中的表格（详情接口首次访问时调用）"""
+        if not self.use_processes or self._is_light(file_path):
+            return self._count(self._get_inline_extractor().extract_tables, str(file_path))
+        return self.run(_extract_tables_in_worker, str(file_path))
+
+    def _is_light(self, file_path: str) -> bool:
+        """按格式开销等级和文件大小判断是否在调用线程内提取"""
+        from app.utils.format_registry import COST_LIGHT, get_format_handler
+        handler = get_format_handler(os.path.splitext(str(file_path))[1])
+        if handler is None or handler.cost != COST_LIGHT:
+            return False
+        if not self.light_max_bytes:
+            return True
+        try:
+            return os.path.getsize(file_path) <= self.light_max_bytes
+        except OSError:
+            return False
+
+    def _get_inline_extractor(self):
+        if self._inline_extractor is None:
+            from app.utils.document_extractor import DocumentExtractor
+            self._inline_extractor = DocumentExtractor()
+        return self._inline_extractor
+
+    def run(self, func: Callable, *args) -> Any:
+        """在进程池中执行可序列化的函数，超时则终止并重建进程池"""
+        self._bump("submitted")
+        with self._slots:
+            return self._run_in_pool(func, *args)
+
+    def _run_in_pool(self, func: Callable, *args) -> Any:
+        for attempt in range(2):
+            pool, generation = self._get_pool()
+            future = pool.submit(func, *args)
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                self._bump("timeouts")
+                self._restart_pool(generation)
+                raise ParseTimeoutError(f"文档提取超过 {self.timeout} 秒")
+            except BrokenProcessPool:
+                # 其他文档超时导致进程池被重建时，本任务重新提交一次
+                self._restart_pool(generation)
+                if attempt == 0:
+                    continue
+                self._bump("failed")
+                raise
+            except Exception:
+                self._bump("failed")
+                raise
+            self._bump("completed")
+            return result
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            pdf = {
+                "image_only": self.pdf_stats["image_only"],
+                "probe_seconds": round(self.pdf_stats["probe_seconds"], 3),
+                "backends": {
+                    name: {**counters, "seconds": round(counters["seconds"], 3)}
+                    for name, counters in self.pdf_stats["backends"].items()
+                }
+            }
+            return {"mode": self.mode, "workers": self.max_workers, **self.stats, "pdf": pdf}
+
+    def _record_extraction(self, extraction: Dict):
+        """
+        汇总 PDF 后端计数：selected 为最终采用的次数，
+        attempts/errors/empty 为尝试、出错和未提取到可用文本的次数，seconds 为累计耗时
+        """
+        with self._lock:
+            self.pdf_stats["probe_seconds"] += extraction.get("probe_seconds", 0.0)
+            if extraction.get("image_only"):
+                self.pdf_stats["image_only"] += 1
+            backends = self.pdf_stats["backends"]
+            for attempt in extraction.get("attempts", []):
+                counters = backends.setdefault(
+                    attempt["backend"], {"selected": 0, "attempts": 0, "errors": 0, "empty": 0, "seconds": 0.0}
+                )
+                counters["attempts"] += 1
+                counters["seconds"] += attempt["seconds"]
+                if attempt["outcome"] == "error":
+                    counters["errors"] += 1
+                elif attempt["outcome"] == "empty":
+                    counters["empty"] += 1
+            if extraction.get("backend"):
+                backends[extraction["backend"]]["selected"] += 1
+
+    def _count(self, func: Callable, *args) -> Any:
+        self._bump("submitted")
+        try:
+            result = func(*args)
+        except Exception:
+            self._bump("failed")
+            raise
+        self._bump("completed")
+        return result
+
+    def _bump(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+                # 预热：等待工作进程启动并完成初始化，启动耗时不计入文档超时
+                for future in [pool.submit(_worker_ready) for _ in range(self.max_workers)]:
+                    future.result()
+                self._pool = pool
+                self._generation += 1
+            return self._pool, self._generation
+
+    def _restart_pool(self, generation: int):
+        """终止当前进程池（只处理发生问题的那一代，避免重复重建）"""
+        with self._lock:
+            if self._pool is None or generation != self._generation:
+                return
+            pool = self._pool
+            self._pool = None
+            self.stats["pool_restarts"] += 1
+
+        # 正在执行的任务无法取消，直接终止工作进程
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning("解析进程池已重建")
+
+
+_engine_instance: Optional[ParseEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_parse_engine() -> ParseEngine:
+    """获取进程内共享的解析引擎"""
+    global _engine_instance
+    if _engine_instance is None:
+        with _engine_lock:
+            if _engine_instance is None:
+                from app.core.config import settings
+                _engine_instance = ParseEngine(
+                    max_workers=settings.PARSE_WORKERS,
+                    timeout=settings.PARSE_TIMEOUT_SECONDS,
+                    use_processes=settings.PARSE_PROCESS_POOL_ENABLED,
+                    light_max_bytes=settings.PARSE_LIGHT_MAX_BYTES
+                )
+    return _engine_instance
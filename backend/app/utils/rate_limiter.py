@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 调用限流 - 令牌桶（每分钟请求数 / 每分钟 token 数）+ AIMD 自适应并发
+
+状态保存在本机的 SQLite 文件中，同一台机器上的 API 进程和各个 Celery 工作进程
+共用一份额度：
+- 请求桶和 token 桶按时间匀速补充，发请求前按估算的 token 数扣减，完成后按实际用量校正；
+- 并发上限按 AIMD 调整：请求成功且延迟正常时缓慢加一，遇到 429 或延迟过高时减半；
+- 429 响应的 Retry-After 让所有进程一起暂停，避免继续撞限流。
+在途请求以带过期时间的租约记录，进程崩溃留下的租约到期后自动失效。
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 并发已满时的轮询间隔，以及单次等待的上限（秒）
+CONCURRENCY_POLL_SECONDS = 0.1
+MAX_WAIT_STEP_SECONDS = 5.0
+# 两次减小并发上限的最短间隔，同一波 429 只减半一次
+DECREASE_COOLDOWN_SECONDS = 5.0
+# 429 未给出 Retry-After 时的暂停时间
+DEFAULT_THROTTLE_PAUSE_SECONDS = 1.0
+
+
+class Permit(NamedTuple):
+    """一次请求的许可（完成后交回 release）"""
+    lease_id: int
+    tokens: int
+    started: float
+
+
+class RateLimiter:
+    """跨进程共享的令牌桶限流器"""
+
+    def __init__(
+        self,
+        db_path: str,
+        rpm: int,
+        tpm: int,
+        max_concurrency: int = 32,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        latency_target: float = 30.0,
+        lease_seconds: float = 300.0,
+        name: str = "deepseek"
+    ):
+        """
+        Args:
+            db_path: 共享状态的 SQLite 文件
+            rpm: 每分钟请求数上限
+            tpm: 每分钟 token 数上限
+            max_concurrency / min_concurrency: 自适应并发上限的取值范围
+            initial_concurrency: 初始并发上限（None 时取最大值的四分之一）
+            latency_target: 请求耗时超过该秒数时视为过载，减小并发上限
+            lease_seconds: 在途租约的有效期（应大于单次请求的超时）
+            name: 额度名称（不同接口或 API Key 使用不同名称）
+        """
+        self.db_path = str(db_path)
+        self.rpm = max(1, rpm)
+        self.tpm = max(1, tpm)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        if initial_concurrency is None:
+            initial_concurrency = max(self.min_concurrency, self.max_concurrency // 4)
+        self.initial_concurrency = min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        self.latency_target = latency_target
+        self.lease_seconds = lease_seconds
+        self.name = name
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        # 本进程的等待统计
+        self.stats = {"acquired": 0, "waits": 0, "wait_seconds": 0.0, "throttled": 0, "slow": 0}
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程一个连接（fork 后的子进程重新连接）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS limiter_state (
+                name TEXT PRIMARY KEY,
+                request_tokens REAL NOT NULL,
+                token_tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                concurrency REAL NOT NULL,
+                last_decrease REAL NOT NULL DEFAULT 0,
+                blocked_until REAL NOT NULL DEFAULT 0,
+                throttled INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS limiter_leases (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                expires REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "INSERT OR IGNORE INTO limiter_state (name, request_tokens, token_tokens, updated, concurrency) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.name, self.rpm, self.tpm, time.time(), self.initial_concurrency)
+        )
+
+    def _load(self, conn: sqlite3.Connection, now: float) -> Dict:
+        """读取状态并按经过的时间补充两个桶（须在事务中调用）"""
+        row = conn.execute(
+            "SELECT request_tokens, token_tokens, updated, concurrency, last_decrease, blocked_until, throttled "
+            "FROM limiter_state WHERE name = ?", (self.name,)
+        ).fetchone()
+        if row is None:
+            row = (self.rpm, self.tpm, now, self.initial_concurrency, 0.0, 0.0, 0)
+            conn.execute(
+                "INSERT INTO limiter_state (name, request_tokens, token_tokens, updated, concurrency) "
+                "VALUES (?, ?, ?, ?, ?)", (self.name, *row[:4])
+            )
+        state = dict(zip(
+            ("request_tokens", "token_tokens", "updated", "concurrency", "last_decrease", "blocked_until", "throttled"),
+            row
+        ))
+        elapsed = max(0.0, now - state["updated"])
+        state["request_tokens"] = min(self.rpm, state["request_tokens"] + elapsed * self.rpm / 60)
+        state["token_tokens"] = min(self.tpm, state["token_tokens"] + elapsed * self.tpm / 60)
+        state["updated"] = now
+        # 配置调整后并发上限仍落在新的范围内
+        state["concurrency"] = min(max(state["concurrency"], self.min_concurrency), self.max_concurrency)
+        return state
+
+    def _save(self, conn: sqlite3.Connection, state: Dict):
+        conn.execute(
+            "UPDATE limiter_state SET request_tokens = ?, token_tokens = ?, updated = ?, concurrency = ?, "
+            "last_decrease = ?, blocked_until = ?, throttled = ? WHERE name = ?",
+            (state["request_tokens"], state["token_tokens"], state["updated"], state["concurrency"],
+             state["last_decrease"], state["blocked_until"], state["throttled"], self.name)
+        )
+
+    def try_acquire(self, tokens: int) -> Tuple[Optional[Permit], float]:
+        """
+        尝试取得许可
+
+        Returns:
+            (许可, 0) 或 (None, 建议等待的秒数)
+        """
+        tokens = max(0, min(int(tokens), self.tpm))
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = self._load(conn, now)
+            conn.execute("DELETE FROM limiter_leases WHERE name = ? AND expires < ?", (self.name, now))
+            in_flight = conn.execute(
+                "SELECT COUNT(*) FROM limiter_leases WHERE name = ?", (self.name,)
+            ).fetchone()[0]
+
+            wait = 0.0
+            if state["blocked_until"] > now:
+                wait = state["blocked_until"] - now
+            elif in_flight >= int(state["concurrency"]):
+                wait = CONCURRENCY_POLL_SECONDS
+            else:
+                if state["request_tokens"] < 1:
+                    wait = (1 - state["request_tokens"]) * 60 / self.rpm
+                if state["token_tokens"] < tokens:
+                    wait = max(wait, (tokens - state["token_tokens"]) * 60 / self.tpm)
+
+            permit = None
+            if wait <= 0:
+                state["request_tokens"] -= 1
+                state["token_tokens"] -= tokens
+                lease_id = conn.execute(
+                    "INSERT INTO limiter_leases (name, pid, expires) VALUES (?, ?, ?)",
+                    (self.name, os.getpid(), now + self.lease_seconds)
+                ).lastrowid
+                permit = Permit(lease_id, tokens, time.monotonic())
+            self._save(conn, state)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return permit, wait
+
+    async def acquire(self, tokens: int) -> Permit:
+        """
+        等待直到取得许可（异步等待，不占用线程）
+
+        SQLite 事务可能等待其他进程释放写锁，放到线程池中执行，不阻塞调用方的事件循环
+        """
+        waited = 0.0
+        while True:
+            permit, wait = await asyncio.to_thread(self.try_acquire, tokens)
+            if permit is not None:
+                with self._stats_lock:
+                    self.stats["acquired"] += 1
+                    if waited:
+                        self.stats["waits"] += 1
+                        self.stats["wait_seconds"] += waited
+                return permit
+            step = min(wait, MAX_WAIT_STEP_SECONDS)
+            await asyncio.sleep(step)
+            waited += step
+
+    def release(
+        self,
+        permit: Permit,
+        used_tokens: Optional[int] = None,
+        throttled: bool = False,
+        retry_after: Optional[float] = None,
+        succeeded: bool = False
+    ):
+        """
+        交回许可并反馈结果
+
+        Args:
+            permit: acquire 返回的许可
+            used_tokens: 实际消耗的 token 数（用于校正预扣的估算值）
+            throttled: 是否收到 429
+            retry_after: 429 响应要求的等待秒数
+            succeeded: 请求是否成功（成功且延迟正常时增大并发上限）
+        """
+        latency = time.monotonic() - permit.started
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM limiter_leases WHERE id = ?", (permit.lease_id,))
+            state = self._load(conn, now)
+            if used_tokens is not None:
+                state["token_tokens"] = min(self.tpm, state["token_tokens"] + permit.tokens - used_tokens)
+
+            if throttled:
+                state["throttled"] += 1
+                pause = retry_after if retry_after is not None else DEFAULT_THROTTLE_PAUSE_SECONDS
+                state["blocked_until"] = max(state["blocked_until"], now + pause)
+                self._decrease(state, now, "429")
+            elif succeeded and latency > self.latency_target:
+                self._decrease(state, now, f"耗时 {latency:.1f} 秒")
+            elif succeeded:
+                # 每个并发上限的请求都成功时约增加 1
+                state["concurrency"] = min(self.max_concurrency, state["concurrency"] + 1 / state["concurrency"])
+            self._save(conn, state)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if throttled or (succeeded and latency > self.latency_target):
+            with self._stats_lock:
+                self.stats["throttled" if throttled else "slow"] += 1
+
+    async def arelease(self, permit: Permit, **feedback):
+        """在线程池中执行 release（参数同 release），不阻塞调用方的事件循环"""
+        await asyncio.to_thread(self.release, permit, **feedback)
+
+    def _decrease(self, state: Dict, now: float, reason: str):
+        if now - state["last_decrease"] < DECREASE_COOLDOWN_SECONDS:
+            return
+        before = state["concurrency"]
+        state["concurrency"] = max(self.min_concurrency, before / 2)
+        state["last_decrease"] = now
+        logger.warning(f"LLM 并发上限 {before:.1f} -> {state['concurrency']:.1f}（{reason}）")
+
+    def get_stats(self) -> Dict:
+        """当前的限额和额度余量（各进程共享），以及本进程的等待统计"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            state = self._load(conn, now)
+            in_flight = conn.execute(
+                "SELECT COUNT(*) FROM limiter_leases WHERE name = ? AND expires >= ?", (self.name, now)
+            ).fetchone()[0]
+        finally:
+            conn.execute("ROLLBACK")
+        with self._stats_lock:
+            local = {**self.stats, "wait_seconds": round(self.stats["wait_seconds"], 3)}
+        return {
+            "rpm_limit": self.rpm,
+            "tpm_limit": self.tpm,
+            "concurrency_limit": int(state["concurrency"]),
+            "concurrency_range": [self.min_concurrency, self.max_concurrency],
+            "in_flight": in_flight,
+            "requests_available": round(state["request_tokens"], 2),
+            "tokens_available": int(state["token_tokens"]),
+            "paused_seconds": round(max(0.0, state["blocked_until"] - now), 3),
+            "throttled_total": state["throttled"],
+            "process": local
+        }
+
+
+_limiter_instance: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """获取进程内共享的限流器（配置关闭时返回 None）"""
+    global _limiter_instance
+    from app.core.config import settings
+    if not settings.DEEPSEEK_RATE_LIMIT_ENABLED:
+        return None
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                _limiter_instance = RateLimiter(
+                    db_path=settings.DEEPSEEK_RATE_LIMIT_DB,
+                    rpm=settings.DEEPSEEK_RPM_LIMIT,
+                    tpm=settings.DEEPSEEK_TPM_LIMIT,
+                    max_concurrency=settings.DEEPSEEK_MAX_CONCURRENCY,
+                    min_concurrency=settings.DEEPSEEK_MIN_CONCURRENCY,
+                    latency_target=settings.DEEPSEEK_LATENCY_TARGET_SECONDS,
+                    lease_seconds=settings.DEEPSEEK_REQUEST_TIMEOUT + 30
+                )
+    return _limiter_instance
@@ -13,6 +13,7 @@ import json
 from app.core.database import get_db
 from app.models.data_overview import DataOverview, DataBookDetail
 from app.crawler.file_scanner import FileScanner
+from app.crawler.duplicates import find_duplicate_groups
 from app.tasks.document_tasks import scan_filesystem_task, batch_process_documents
 from app.schemas.knowledge_tree import KnowledgeTreeResponse, TreeNode
 
@@ -64,19 +65,23 @@ async def get_knowledge_tree(
 @router.post("/scan")
 async def trigger_file_scan(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    incremental: bool = Query(True, description="是否增量扫描（仅同步变化的节点）"),
+    resume: bool = Query(True, description="存在中断的扫描时是否从检查点继续")
 ):
     """
     触发文件系统扫描
     """
     try:
         # 在后台执行扫描任务
-        task = scan_filesystem_task.delay()
+        task = scan_filesystem_task.delay(incremental=incremental, resume=resume)
         
         return JSONResponse({
             "status": "success",
             "message": "文件系统扫描已开始",
-            "task_id": task.id
+            "task_id": task.id,
+            "incremental": incremental,
+            "resume": resume
         })
         
     except Exception as e:
@@ -359,6 +364,33 @@ async def get_scanned_files(
         raise HTTPException(status_code=500, detail=f"获取已扫描文件失败: {str(e)}")
 
 
+@router.get("/duplicates")
+def get_duplicate_files(
+    db: Session = Depends(get_db),
+    min_count: int = Query(2, ge=2, description="分组内最少文件数"),
+    limit: int = Query(100, ge=1, le=1000, description="返回的最大分组数")
+):
+    """
+    获取内容相同的重复文件分组（按扫描时计算的内容指纹）
+
+    采样指纹相同的分组需要读取文件全部内容确认，普通函数由线程池执行，不阻塞事件循环
+    """
+    try:
+        groups = find_duplicate_groups(db, DataOverview, min_count=min_count, limit=limit)
+        
+        return JSONResponse({
+            "code": 200,
+            "message": "success",
+            "data": {
+                "groups": groups,
+                "total_groups": len(groups),
+                "wasted_bytes": sum(g["wasted_bytes"] for g in groups)
+            }
+        })
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取重复文件失败: {str(e)}")
+
 @router.get("/files/{file_id}/preview")
 async def preview_file(
     file_id: int,
@@ -5,22 +5,32 @@
 支持数据库持久化存储（PostgreSQL/SQLite）
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 import os
 import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional, List
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 # 数据库相关导入
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, event
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Float, LargeBinary, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.orm import sessionmaker, Session, relationship, deferred
 from contextlib import contextmanager
 
+from app.crawler.bulk_writer import BulkNodeWriter
+from app.crawler.dir_walker import ParallelDirWalker
+from app.crawler.scan_checkpoint import ScanCheckpoint
+from app.crawler.scan_filter import ScanFilter
+from app.crawler.scan_progress import ScanProgressRegistry, estimate_total_files, format_sse
+from app.crawler.fingerprint import compute_fingerprint
+from app.crawler.mime_sniffer import get_mime_sniffer
+from app.crawler.duplicates import find_duplicate_groups
+
 # ==================== 数据库配置 ====================
 # 默认使用 SQLite，方便部署；可通过环境变量切换到 PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/knowledge_graph.db")
@@ -64,6 +74,8 @@ class DataOverview(Base):
     modified_time = Column(DateTime, nullable=True, comment="文件修改时间")
     is_deleted = Column(Boolean, default=False, comment="是否删除")
     doc_metadata = Column(JSON, nullable=True, comment="额外元数据")
+    content_hash = Column(String(64), nullable=True, index=True, comment="内容指纹（识别重复文件）")
+    mime_type = Column(String(100), nullable=True, comment="嗅探得到的MIME类型")
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -86,7 +98,7 @@ class DataBookDetail(Base):
     experiment_flow = Column(Text, nullable=True, comment="实验流程概述")
     statistical_methods = Column(JSON, nullable=True, comment="使用的统计方法")
     conclusion = Column(Text, nullable=True, comment="研究结论")
-    full_text = Column(Text, nullable=True, comment="全文存储（可选）")
+    full_text = deferred(Column(Text, nullable=True, comment="全文存储（旧数据，新数据见 data_book_blob）"))
     
     # 三维度图谱字段
     authors = Column(JSON, nullable=True, comment="文档作者列表")
@@ -95,10 +107,13 @@ class DataBookDetail(Base):
     entity_relations = Column(JSON, nullable=True, comment="实体间关系")
     
     # 解析状态
-    parse_status = Column(String(20), default="pending", comment="解析状态：pending/processing/completed/failed")
+    parse_status = Column(String(20), default="pending", comment="解析状态：pending/processing/completed/failed/rejected")
     parse_time = Column(DateTime, nullable=True, comment="解析时间")
     parse_error = Column(Text, nullable=True, comment="解析错误信息")
-    deepseek_response = Column(JSON, nullable=True, comment="DeepSeek API原始响应")
+    deepseek_response = deferred(Column(JSON, nullable=True, comment="DeepSeek API原始响应（旧数据，新数据见 data_book_blob）"))
+    confidence_score = Column(Float, nullable=True, comment="DeepSeek 分析置信度")
+    parse_profile = Column(String(20), nullable=True, comment="解析档位：fast/standard/full")
+    tables = deferred(Column(JSON, nullable=True, comment="提取的表格（按需提取后缓存，NULL 表示尚未提取）"))
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -107,9 +122,50 @@ class DataBookDetail(Base):
     file_info = relationship("DataOverview", back_populates="book_detail")
 
 
+class DataBookBlob(Base):
+    """解析大字段表（压缩存储全文和 DeepSeek 原始响应，按需读取）"""
+    __tablename__ = "data_book_blob"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    file_id = Column(Integer, ForeignKey("data_overview.id", ondelete="CASCADE"), nullable=False, unique=True, index=True, comment="关联data_overview表")
+    codec = Column(String(10), nullable=False, comment="压缩算法：zstd/zlib")
+    full_text = Column(LargeBinary, nullable=True, comment="压缩后的全文")
+    deepseek_response = Column(LargeBinary, nullable=True, comment="压缩后的DeepSeek原始响应（JSON）")
+    raw_size = Column(Integer, nullable=True, comment="压缩前字节数")
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # 创建所有表
 Base.metadata.create_all(bind=engine)
 
+# 后续新增的列（create_all 不会修改已存在的表，这里为旧数据库补齐）
+ADDED_COLUMNS = [
+    ("data_overview", "content_hash", "VARCHAR(64)", "ix_data_overview_content_hash"),
+    ("data_overview", "mime_type", "VARCHAR(100)", None),
+    ("data_book_detail", "parse_profile", "VARCHAR(20)", None),
+    ("data_book_detail", "tables", "JSON", None),
+    ("data_book_detail", "confidence_score", "FLOAT", None),
+]
+
+
+def ensure_added_columns():
+    """为旧数据库补充新增列及其索引"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, column, column_type, index_name in ADDED_COLUMNS:
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column in existing:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            if index_name:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column})"))
+            print(f"已为 {table} 添加列 {column}")
+
+
+ensure_added_columns()
+
 
 # ==================== 数据库会话管理 ====================
 @contextmanager
@@ -146,24 +202,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 扫描状态存储
-scan_status_store: Dict[str, Any] = {
-    "status": "idle",
-    "progress": 0,
-    "current_file": "",
-    "current_path": "",
-    "total_files": 0,
-    "scanned_files": 0,
-    "total_folders": 0,
-    "start_time": None,
-    "errors": [],
-    "files": [],
-    "folders": []
-}
+# 扫描状态存储（按 scan_id 隔离，并发扫描互不覆盖）
+scan_registry = ScanProgressRegistry()
+
+# SSE 推送扫描进度的检查间隔（秒）
+SCAN_EVENT_INTERVAL = 0.5
 
 # 支持的文件类型
 SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.doc', '.txt', '.md', '.pptx', '.xlsx', '.xls'}
 
+# 扫描结果批量写入数据库的每批行数
+SCAN_BATCH_SIZE = int(os.getenv("SCAN_BATCH_SIZE", "1000"))
+
+# 扫描检查点（扫描中断或服务重启后从检查点继续）
+SCAN_CHECKPOINT_DIR = os.getenv("SCAN_CHECKPOINT_DIR", "./data/scan_checkpoints")
+SCAN_CHECKPOINT_INTERVAL = float(os.getenv("SCAN_CHECKPOINT_INTERVAL", "30"))
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "4"))
+# 新文件的 MIME 嗅探和指纹在线程池中执行，最多同时挂起这么多个文件
+SCAN_INSPECT_WINDOW = SCAN_WORKERS * 16
+
+# 扫描过滤规则（gitignore 语法，逗号分隔；被排除的文件夹整棵子树都不会遍历）
+SCAN_EXCLUDE_PATTERNS = [p.strip() for p in os.getenv(
+    "SCAN_EXCLUDE_PATTERNS", ".*,~$*,node_modules/,__pycache__/"
+).split(",") if p.strip()]
+SCAN_INCLUDE_PATTERNS = [p.strip() for p in os.getenv("SCAN_INCLUDE_PATTERNS", "").split(",") if p.strip()]
+SCAN_IGNORE_FILE = os.getenv("SCAN_IGNORE_FILE", ".scanignore")
+SCAN_MAX_DEPTH = int(os.getenv("SCAN_MAX_DEPTH", "20"))
+SCAN_MIN_FILE_SIZE = int(os.getenv("SCAN_MIN_FILE_SIZE", "0"))
+SCAN_MAX_FILE_SIZE = int(os.getenv("SCAN_MAX_FILE_SIZE", "0"))
+SCAN_MAX_FILES_PER_DIR = int(os.getenv("SCAN_MAX_FILES_PER_DIR", "0"))
+
+
+def build_scan_filter(folder_path: str) -> ScanFilter:
+    """构建扫描过滤规则（只保留支持的文档类型，其他文件不获取 stat）"""
+    scan_filter = ScanFilter(
+        folder_path,
+        exclude=SCAN_EXCLUDE_PATTERNS,
+        include=SCAN_INCLUDE_PATTERNS,
+        extensions=SUPPORTED_EXTENSIONS,
+        min_file_size=SCAN_MIN_FILE_SIZE,
+        max_file_size=SCAN_MAX_FILE_SIZE,
+        max_files_per_dir=SCAN_MAX_FILES_PER_DIR
+    )
+    if SCAN_IGNORE_FILE:
+        scan_filter.load_ignore_file(SCAN_IGNORE_FILE)
+    return scan_filter
+
 # 存储扫描后的真实数据
 scanned_files_store: Dict[str, Any] = {
     "files": [],
@@ -461,257 +545,358 @@ async def check_database_status(db: Session = Depends(get_db_session)):
         }
 
 # 后台扫描任务
-async def scan_folder_task(folder_path: str):
-    """后台扫描文件夹任务 - 将数据存入数据库"""
-    global scan_status_store, scanned_files_store
+def scan_folder_task(folder_path: str, scan_id: str):
+    """
+    后台扫描文件夹任务 - 将数据存入数据库
     
-    scan_status_store = {
-        "status": "processing",
-        "progress": 0,
-        "current_file": "",
-        "current_path": folder_path,
-        "total_files": 0,
-        "scanned_files": 0,
-        "total_folders": 0,
-        "start_time": datetime.now().isoformat(),
-        "errors": [],
-        "files": [],
-        "folders": []
-    }
+    单遍遍历：不预先统计文件总数，进度按上次扫描的文件数或遍历前沿估算。
+    普通函数由 BackgroundTasks 放到线程池执行，不会阻塞事件循环。
+    """
+    global scanned_files_store
     
-    # 重置扫描数据存储（用于前端实时展示）
-    scanned_files_store = {
-        "files": [],
-        "folders": [],
-        "tree": [],
-        "stats": {
-            "total_files": 0,
-            "total_folders": 0,
-            "supported_docs": 0,
-            "total_size_mb": 0.0
-        }
-    }
-    
-    # 先统计文件总数
-    try:
-        for root, dirs, files in os.walk(folder_path):
-            scan_status_store["total_folders"] += len(dirs)
-            for file in files:
-                ext = os.path.splitext(file)[1].lower()
-                if ext in SUPPORTED_EXTENSIONS:
-                    scan_status_store["total_files"] += 1
-    except Exception as e:
-        scan_status_store["errors"].append(str(e))
-        scan_status_store["status"] = "error"
+    scan = scan_registry.get(scan_id)
+    if not os.path.isdir(folder_path):
+        scan.add_error(f"扫描路径不存在: {folder_path}")
+        scan.finish("error")
         return
     
-    if scan_status_store["total_files"] == 0:
-        scan_status_store["status"] = "completed"
-        scan_status_store["progress"] = 100
-        scanned_files_store["tree"] = [{
-            "id": 1,
-            "name": os.path.basename(folder_path) or folder_path,
-            "path": folder_path,
-            "type": "folder",
-            "children": []
-        }]
-        return
+    scan_filter = build_scan_filter(folder_path)
+    checkpoint = ScanCheckpoint(SCAN_CHECKPOINT_DIR, folder_path, SCAN_CHECKPOINT_INTERVAL, scope="minimal_server")
+    state = checkpoint.load()
     
-    # 扫描文件并存入数据库
+    # 从检查点恢复时沿用上次的统计
+    if state is not None:
+        stats = state["stats"]
+        scan.update(
+            total_folders=stats.get("total_folders", 0),
+            total_files=stats.get("total_files", 0),
+            scanned_files=stats.get("scanned_files", 0)
+        )
+        print(f"从检查点继续扫描: 已完成 {state['completed_dirs']} 个目录，待列举 {len(state['frontier'])} 个目录")
+    
+    # 扫描文件并存入数据库（批量写入，避免逐行 commit/refresh）
     total_size = 0
-    added_folders = {}  # 路径 -> 数据库ID映射
     
     try:
         with get_db() as db:
-            # 创建根目录节点
             root_normalized = folder_path.replace("\\", "/")
-            root_folder = db.query(DataOverview).filter(
-                DataOverview.file_path == root_normalized
-            ).first()
             
-            if not root_folder:
-                root_folder = DataOverview(
-                    file_name=os.path.basename(folder_path) or folder_path,
-                    file_path=root_normalized,
-                    file_type="folder",
-                    parent_id=None
+            # 一次性加载扫描根目录下已存在的节点，替代逐文件查询
+            existing_rows = {
+                row.file_path: row
+                for row in db.query(
+                    DataOverview.id,
+                    DataOverview.file_path,
+                    DataOverview.file_name,
+                    DataOverview.file_type,
+                    DataOverview.file_size,
+                    DataOverview.created_at,
+                    DataOverview.updated_at
+                ).filter(
+                    (DataOverview.file_path == root_normalized) |
+                    DataOverview.file_path.startswith(root_normalized.rstrip("/") + "/", autoescape=True)
                 )
-                db.add(root_folder)
-                db.commit()
-                db.refresh(root_folder)
+            }
             
-            added_folders[root_normalized] = root_folder.id
+            # 新节点的展示信息在写入器取回ID后再加入状态列表
+            pending_file_infos: Dict[str, Dict[str, Any]] = {}
+            pending_folder_infos: Dict[str, Dict[str, Any]] = {}
             
-            # 遍历所有文件和文件夹
-            for root, dirs, files in os.walk(folder_path):
-                root_normalized = root.replace("\\", "/")
-                
-                # 确保当前目录在数据库中
-                if root_normalized not in added_folders:
-                    parent_path = os.path.dirname(root_normalized).replace("\\", "/")
-                    parent_id = added_folders.get(parent_path)
-                    
-                    current_folder = DataOverview(
-                        file_name=os.path.basename(root) or root,
-                        file_path=root_normalized,
-                        file_type="folder",
-                        parent_id=parent_id
-                    )
-                    db.add(current_folder)
+            def on_inserted(path: str, node_id: int):
+                file_info = pending_file_infos.pop(path, None)
+                if file_info is not None:
+                    file_info["id"] = node_id
+                    scan.add_node(file_info)
+                    return
+                folder_info = pending_folder_infos.pop(path, None)
+                if folder_info is not None:
+                    folder_info["id"] = node_id
+                    scan.add_node(folder_info)
+            
+            writer = BulkNodeWriter(
+                db, DataOverview, DataBookDetail,
+                batch_size=SCAN_BATCH_SIZE,
+                on_inserted=on_inserted
+            )
+            writer.preload({path: row.id for path, row in existing_rows.items()})
+            # 上次扫描记录的文件数，作为本次进度的总数估计
+            previous_total = sum(1 for row in existing_rows.values() if row.file_type == "file")
+            
+            # 创建根目录节点
+            if root_normalized not in existing_rows:
+                writer.insert({
+                    "file_name": os.path.basename(folder_path) or folder_path,
+                    "file_path": root_normalized,
+                    "file_type": "folder"
+                })
+            
+            walker = ParallelDirWalker(
+                max_workers=SCAN_WORKERS,
+                max_depth=SCAN_MAX_DEPTH,
+                scan_filter=scan_filter
+            )
+            completed_dirs = state["completed_dirs"] if state is not None else 0
+            if state is not None:
+                total_size = state["stats"].get("total_size", 0)
+            
+            # 新文件按发现顺序排队，文件头读取在线程池中并行，结果按顺序写入
+            inspect_pool = ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="scan-inspect")
+            pending_inserts = deque()
+            
+            def inspect_new_file(file_path: str, ext: str, entry, file_size: int):
+                # 只读文件头尾嗅探类型、计算指纹
+                mime_check = get_mime_sniffer().check(file_path, ext, entry.inode, entry.mtime, file_size)
+                return mime_check, compute_fingerprint(file_path, file_size)
+            
+            def drain_inserts(keep: int = 0):
+                while len(pending_inserts) > keep:
+                    future, file, file_path_normalized, ext, entry, file_size, parent_path = pending_inserts.popleft()
+                    mime_check, content_hash = future.result()
+                    # 内容与扩展名不符的直接标记为 rejected
+                    now = datetime.utcnow()
+                    detail = None
+                    if mime_check is not None and not mime_check.valid:
+                        detail = {
+                            "parse_status": "rejected",
+                            "parse_error": f"文件内容与扩展名不符（实际类型: {mime_check.mime_type}），已跳过解析"
+                        }
+                    pending_file_infos[file_path_normalized] = {
+                        "id": None,
+                        "name": file,
+                        "path": file_path_normalized,
+                        "type": "file",
+                        "file_type": ext.replace('.', ''),
+                        "size": file_size,
+                        "extension": ext,
+                        "parse_status": detail["parse_status"] if detail else "pending",
+                        "created_at": now.strftime("%Y-%m-%d %H:%M:%S"),
+                        "updated_at": now.strftime("%Y-%m-%d %H:%M:%S")
+                    }
+                    writer.insert({
+                        "file_name": file,
+                        "file_path": file_path_normalized,
+                        "file_type": "file",
+                        "file_size": file_size,
+                        "file_extension": ext,
+                        "modified_time": datetime.fromtimestamp(entry.mtime),
+                        "content_hash": content_hash,
+                        "mime_type": mime_check.mime_type[:100] if mime_check else None,
+                        "created_at": now,
+                        "updated_at": now
+                    }, parent_path=parent_path, with_detail=True, detail=detail)
+            
+            def on_dir_done(dir_path: str, children: list):
+                # 更新总数估计；定期提交已写入的节点并保存遍历前沿
+                nonlocal completed_dirs
+                completed_dirs += 1
+                scan.update(total_files=estimate_total_files(
+                    scan.scanned_files, completed_dirs, walker.pending_count(), previous_total
+                ))
+                if checkpoint.due():
+                    # 检查点之前的文件必须全部写入，恢复时不会再遍历这些目录
+                    drain_inserts()
+                    writer.flush()
                     db.commit()
-                    db.refresh(current_folder)
-                    added_folders[root_normalized] = current_folder.id
-                    
-                    # 更新状态
-                    scan_status_store["folders"].append({
-                        "id": current_folder.id,
-                        "name": current_folder.file_name,
-                        "path": current_folder.file_path,
-                        "type": "folder"
+                    checkpoint.save(walker.pending_dirs(), completed_dirs, {
+                        "total_files": scan.total_files,
+                        "total_folders": scan.total_folders,
+                        "scanned_files": scan.scanned_files,
+                        "total_size": total_size
                     })
+            
+            # 遍历所有文件和文件夹（广度优先，父目录先于子项写入）
+            frontier = state["frontier"] if state is not None else None
+            for entry in walker.walk(folder_path, frontier=frontier, on_dir_done=on_dir_done):
+                entry_path = entry.path.replace("\\", "/")
+                parent_path = entry.parent_path.replace("\\", "/") if entry.parent_path else None
+                
+                if entry.is_dir:
+                    if entry.parent_path is not None:
+                        scan.update(total_folders=scan.total_folders + 1)
+                    # 确保当前目录在数据库中
+                    if entry_path not in writer:
+                        pending_folder_infos[entry_path] = {
+                            "id": None,
+                            "name": entry.name,
+                            "path": entry_path,
+                            "type": "folder"
+                        }
+                        writer.insert({
+                            "file_name": entry.name,
+                            "file_path": entry_path,
+                            "file_type": "folder"
+                        }, parent_path=parent_path)
+                    continue
                 
                 # 处理文件
-                parent_id = added_folders[root_normalized]
+                file = entry.name
+                ext = os.path.splitext(file)[1].lower()
+                if ext not in SUPPORTED_EXTENSIONS:
+                    continue
                 
-                for file in files:
-                    ext = os.path.splitext(file)[1].lower()
-                    if ext in SUPPORTED_EXTENSIONS:
-                        file_path = os.path.join(root, file)
-                        file_path_normalized = file_path.replace("\\", "/")
-                        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                        total_size += file_size
-                        
-                        # 更新状态
-                        scan_status_store["current_file"] = file
-                        scan_status_store["current_path"] = root
-                        scan_status_store["scanned_files"] += 1
-                        scan_status_store["progress"] = int(
-                            (scan_status_store["scanned_files"] / scan_status_store["total_files"]) * 100
-                        )
-                        
-                        # 检查文件是否已存在
-                        existing_file = db.query(DataOverview).filter(
-                            DataOverview.file_path == file_path_normalized
-                        ).first()
-                        
-                        if existing_file:
-                            file_info = {
-                                "id": existing_file.id,
-                                "name": existing_file.file_name,
-                                "path": existing_file.file_path,
-                                "type": "file",
-                                "file_type": ext.replace('.', ''),
-                                "size": existing_file.file_size or file_size,
-                                "extension": ext,
-                                "parse_status": "pending",
-                                "created_at": existing_file.created_at.strftime("%Y-%m-%d %H:%M:%S") if existing_file.created_at else "",
-                                "updated_at": existing_file.updated_at.strftime("%Y-%m-%d %H:%M:%S") if existing_file.updated_at else ""
-                            }
-                        else:
-                            # 创建新文件记录
-                            new_file = DataOverview(
-                                file_name=file,
-                                file_path=file_path_normalized,
-                                file_type="file",
-                                parent_id=parent_id,
-                                file_size=file_size,
-                                file_extension=ext,
-                                modified_time=datetime.fromtimestamp(os.path.getmtime(file_path)) if os.path.exists(file_path) else None
-                            )
-                            db.add(new_file)
-                            db.commit()
-                            db.refresh(new_file)
-                            
-                            # 创建对应的解析记录
-                            existing_detail = db.query(DataBookDetail).filter(
-                                DataBookDetail.file_id == new_file.id
-                            ).first()
-                            if not existing_detail:
-                                new_detail = DataBookDetail(
-                                    file_id=new_file.id,
-                                    parse_status="pending"
-                                )
-                                db.add(new_detail)
-                                db.commit()
-                            
-                            file_info = {
-                                "id": new_file.id,
-                                "name": file,
-                                "path": file_path_normalized,
-                                "type": "file",
-                                "file_type": ext.replace('.', ''),
-                                "size": file_size,
-                                "extension": ext,
-                                "parse_status": "pending",
-                                "created_at": new_file.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                                "updated_at": new_file.updated_at.strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                        
-                        scan_status_store["files"].append(file_info)
-                        scanned_files_store["files"].append(file_info)
-                        
-                        await asyncio.sleep(0.01)
+                file_path = entry.path
+                file_path_normalized = entry_path
+                file_size = entry.size or 0
+                total_size += file_size
+                
+                # 更新状态（总数为估计值，完成前进度最多 99）
+                scanned_files = scan.scanned_files + 1
+                total_files = max(scan.total_files, scanned_files)
+                scan.update(
+                    current_file=file,
+                    current_path=entry.parent_path,
+                    scanned_files=scanned_files,
+                    total_files=total_files,
+                    progress=min(99, int((scanned_files / total_files) * 100))
+                )
+                
+                # 检查文件是否已存在
+                existing_file = existing_rows.get(file_path_normalized)
+                
+                if existing_file:
+                    file_info = {
+                        "id": existing_file.id,
+                        "name": existing_file.file_name,
+                        "path": existing_file.file_path,
+                        "type": "file",
+                        "file_type": ext.replace('.', ''),
+                        "size": existing_file.file_size or file_size,
+                        "extension": ext,
+                        "parse_status": "pending",
+                        "created_at": existing_file.created_at.strftime("%Y-%m-%d %H:%M:%S") if existing_file.created_at else "",
+                        "updated_at": existing_file.updated_at.strftime("%Y-%m-%d %H:%M:%S") if existing_file.updated_at else ""
+                    }
+                    scan.add_node(file_info)
+                else:
+                    # 创建新文件记录（连同解析记录一起批量写入）：文件头读取交给线程池
+                    pending_inserts.append((
+                        inspect_pool.submit(inspect_new_file, file_path, ext, entry, file_size),
+                        file, file_path_normalized, ext, entry, file_size, parent_path
+                    ))
+                    drain_inserts(keep=SCAN_INSPECT_WINDOW)
+            
+            drain_inserts()
+            inspect_pool.shutdown()
+            writer.flush()
+            db.commit()
+            checkpoint.clear()
+            print(f"[扫描写入] {writer.stats}")
                         
     except Exception as e:
-        scan_status_store["errors"].append(str(e))
+        scan.add_error(str(e))
         print(f"扫描错误: {e}")
         import traceback
         traceback.print_exc()
     
     # 构建树形结构（用于前端展示）
-    scanned_files_store["folders"] = scan_status_store["folders"]
-    scanned_files_store["tree"] = build_tree_from_files(
-        scan_status_store["files"],
-        scan_status_store["folders"],
-        folder_path
-    )
-    
-    # 更新统计信息
-    scanned_files_store["stats"] = {
-        "total_files": scan_status_store["scanned_files"],
-        "total_folders": len(scan_status_store["folders"]),
-        "supported_docs": scan_status_store["scanned_files"],
-        "total_size_mb": round(total_size / (1024 * 1024), 2)
+    scan.flush_nodes()
+    scanned_files_store = {
+        "files": scan.files,
+        "folders": scan.folders,
+        "tree": build_tree_from_files(scan.files, scan.folders, folder_path),
+        "stats": {
+            "total_files": scan.scanned_files,
+            "total_folders": len(scan.folders),
+            "supported_docs": scan.scanned_files,
+            "total_size_mb": round(total_size / (1024 * 1024), 2)
+        }
     }
     
-    # 完成
-    scan_status_store["status"] = "completed"
-    scan_status_store["progress"] = 100
-    scan_status_store["current_file"] = ""
+    # 完成（总数以实际扫描到的文件数为准）
+    scan.update(total_files=scan.scanned_files)
+    scan.finish()
 
 # 知识树扫描
 @app.post("/api/v1/knowledge-tree/scan")
 async def scan_knowledge_tree(background_tasks: BackgroundTasks, folder_path: str = "D:/zyfdownloadanalysis"):
-    # 重置状态
-    global scan_status_store
-    scan_status_store["status"] = "processing"
-    scan_status_store["progress"] = 0
-    scan_status_store["start_time"] = datetime.now().isoformat()
+    # 每次扫描独立登记状态
+    scan = scan_registry.create(folder_path)
     
     # 启动后台任务
-    background_tasks.add_task(scan_folder_task, folder_path)
+    background_tasks.add_task(scan_folder_task, folder_path, scan.scan_id)
     
     return {
         "code": 200,
         "message": "扫描任务已开始",
         "data": {
-            "task_id": "scan_task_001",
+            "task_id": scan.scan_id,
+            "scan_id": scan.scan_id,
             "status": "processing",
-            "folder_path": folder_path
+            "folder_path": folder_path,
+            "events_url": f"/api/v1/knowledge-tree/scan/{scan.scan_id}/events"
         },
         "timestamp": datetime.now().isoformat()
     }
 
 # 扫描进度查询
 @app.get("/api/v1/knowledge-tree/scan/status")
-async def get_scan_status():
+async def get_scan_status(scan_id: Optional[str] = None, since: Optional[int] = None):
+    """
+    查询扫描进度（只返回计数等摘要）
+    
+    - **scan_id**: 扫描任务ID，不传时返回最近一次扫描
+    - **since**: 事件游标，传入时额外返回该游标之后新发现的节点
+    """
+    scan = scan_registry.get(scan_id)
+    if scan is None:
+        if scan_id is not None:
+            raise HTTPException(status_code=404, detail=f"扫描任务不存在: {scan_id}")
+        data = {"status": "idle", "progress": 0, "total_files": 0, "scanned_files": 0, "total_folders": 0}
+    else:
+        data = scan.snapshot()
+        if since is not None:
+            data["nodes"], data["cursor"] = scan.nodes_since(since)
+    
     return {
         "code": 200,
         "message": "success",
-        "data": scan_status_store,
+        "data": data,
         "timestamp": datetime.now().isoformat()
     }
 
+# 扫描进度推送（Server-Sent Events）
+@app.get("/api/v1/knowledge-tree/scan/{scan_id}/events")
+async def stream_scan_events(scan_id: str, request: Request):
+    """
+    以 SSE 推送扫描进度：progress（计数快照）、nodes（新发现节点批次）、
+    error、finished。断线重连时通过 Last-Event-ID 从游标处继续。
+    """
+    scan = scan_registry.get(scan_id)
+    if scan is None:
+        raise HTTPException(status_code=404, detail=f"扫描任务不存在: {scan_id}")
+    
+    try:
+        start_cursor = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        start_cursor = 0
+    
+    async def event_stream():
+        cursor = start_cursor
+        sent_version = -1
+        while True:
+            if await request.is_disconnected():
+                break
+            
+            for seq, event in scan.events_since(cursor):
+                yield format_sse(event["event"], event["data"], seq)
+                cursor = seq
+            
+            if scan.finished and cursor >= scan.last_seq:
+                break
+            
+            # 状态有变化时才推送进度快照
+            if scan.version != sent_version:
+                sent_version = scan.version
+                yield format_sse("progress", scan.snapshot())
+            
+            await asyncio.sleep(SCAN_EVENT_INTERVAL)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # 获取知识树（从数据库读取）
 @app.get("/api/v1/knowledge-tree")
 async def get_knowledge_tree(db: Session = Depends(get_db_session)):
@@ -851,6 +1036,30 @@ async def get_scanned_files(skip: int = 0, limit: int = 100, db: Session = Depen
             "timestamp": datetime.now().isoformat()
         }
 
+# 重复文件分组（按内容指纹）
+@app.get("/api/v1/knowledge-tree/duplicates")
+def get_duplicate_files(min_count: int = 2, limit: int = 100, db: Session = Depends(get_db_session)):
+    """获取内容相同的重复文件分组（确认采样指纹需要读取文件，普通函数在线程池中执行）"""
+    try:
+        groups = find_duplicate_groups(db, DataOverview, min_count=max(2, min_count), limit=limit)
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "groups": groups,
+                "total_groups": len(groups),
+                "wasted_bytes": sum(g["wasted_bytes"] for g in groups)
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            "code": 500,
+            "message": f"获取重复文件失败: {str(e)}",
+            "data": None,
+            "timestamp": datetime.now().isoformat()
+        }
+
 # 预览文件内容（从数据库读取）
 @app.get("/api/v1/knowledge-tree/files/{file_id}/preview")
 async def preview_file(file_id: int, db: Session = Depends(get_db_session)):
@@ -1051,6 +1260,34 @@ async def get_document_detail(document_id: int, db: Session = Depends(get_db_ses
             "timestamp": datetime.now().isoformat()
         }
 
+# 获取文档表格（首次访问时提取并缓存）
+@app.get("/api/v1/documents/{document_id}/tables")
+def get_document_tables(document_id: int):
+    """获取文档表格 - 表格不在解析时提取，首次访问时由解析引擎提取后写入数据库"""
+    try:
+        from app.utils.document_parser import DocumentParser
+        tables = DocumentParser().get_tables(document_id)
+        if tables is None:
+            return {
+                "code": 404,
+                "message": "文档不存在",
+                "data": None,
+                "timestamp": datetime.now().isoformat()
+            }
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {"document_id": document_id, "table_count": len(tables), "tables": tables},
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            "code": 500,
+            "message": f"提取表格失败: {str(e)}",
+            "data": None,
+            "timestamp": datetime.now().isoformat()
+        }
+
 # 解析文档（通用接口）- 状态持久化
 @app.post("/api/v1/documents/parse")
 async def parse_document_general(request: dict, background_tasks: BackgroundTasks, db: Session = Depends(get_db_session)):
@@ -1058,6 +1295,8 @@ async def parse_document_general(request: dict, background_tasks: BackgroundTask
     file_path = request.get("file_path")
     file_id = request.get("file_id")
     force_reparse = request.get("force_reparse", False)  # 强制重新解析
+    full_extraction = request.get("full_extraction")  # 提取全文（未传时按 PARSE_FULL_EXTRACTION 配置）
+    profile = request.get("profile")  # 解析档位 fast/standard/full（默认按扩展名配置）
     
     if not file_path or not file_id:
         return {
@@ -1067,6 +1306,15 @@ async def parse_document_general(request: dict, background_tasks: BackgroundTask
             "timestamp": datetime.now().isoformat()
         }
     
+    from app.utils.document_extractor import PARSE_PROFILES
+    if profile is not None and profile not in PARSE_PROFILES:
+        return {
+            "code": 400,
+            "message": f"未知的解析档位: {profile}（可选: {', '.join(PARSE_PROFILES)}）",
+            "data": None,
+            "timestamp": datetime.now().isoformat()
+        }
+    
     # 检查文件是否存在
     if not os.path.exists(file_path):
         return {
@@ -1097,6 +1345,22 @@ async def parse_document_general(request: dict, background_tasks: BackgroundTask
             "timestamp": datetime.now().isoformat()
         }
     
+    # 扫描时已判定内容与扩展名不符的文档，除非强制重新解析
+    if current_status == "rejected" and not force_reparse:
+        return {
+            "code": 200,
+            "message": "文档内容与扩展名不符，已跳过解析",
+            "data": {
+                "task_id": f"parse_task_{file_id}",
+                "file_id": file_id,
+                "file_path": file_path,
+                "status": "rejected",
+                "error": detail.parse_error if detail else None,
+                "note": "如确认文件可以解析，请设置 force_reparse=true"
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+    
     # 若文档正在解析中，返回当前状态
     if current_status == "processing":
         return {
@@ -1147,7 +1411,7 @@ async def parse_document_general(request: dict, background_tasks: BackgroundTask
             
             print(f"[DeepSeek解析] 开始解析: {file_path}")
             
-            result = parser.parse_document(file_path, int(file_id))
+            result = parser.parse_document(file_path, int(file_id), full_extraction=full_extraction, profile=profile)
             print(f"[DeepSeek解析] 完成: {file_path}")
             print(f"[缓存统计] {parser.get_stats()}")
             
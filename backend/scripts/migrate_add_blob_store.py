@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库迁移脚本 - 全文和 DeepSeek 原始响应改为压缩存储
+执行方式: python backend/scripts/migrate_add_blob_store.py
+
+1. data_book_detail 添加 confidence_score 列
+2. 创建 data_book_blob 表
+3. 把已有的 full_text / deepseek_response 压缩写入 data_book_blob，并清空原列
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import null, text
+from app.core.database import engine, SessionLocal
+from app.models.data_overview import DataBookBlob, DataBookDetail
+from app.utils.blob_store import default_codec, encode_blobs
+
+# 每批迁移的记录数
+BATCH_SIZE = 200
+
+
+def add_columns(db):
+    if str(engine.url).startswith('sqlite'):
+        print("检测到SQLite数据库，执行迁移...")
+        
+        result = db.execute(text("PRAGMA table_info(data_book_detail)"))
+        existing_columns = {row[1] for row in result.fetchall()}
+        
+        if 'confidence_score' not in existing_columns:
+            print("添加列: confidence_score")
+            db.execute(text("ALTER TABLE data_book_detail ADD COLUMN confidence_score FLOAT"))
+        else:
+            print("列 confidence_score 已存在，跳过")
+    else:
+        # PostgreSQL
+        print("检测到PostgreSQL数据库，执行迁移...")
+        db.execute(text("""
+            ALTER TABLE data_book_detail 
+            ADD COLUMN IF NOT EXISTS confidence_score FLOAT
+        """))
+        print("列 confidence_score 检查/添加完成")
+    db.commit()
+    
+    DataBookBlob.__table__.create(bind=engine, checkfirst=True)
+    print("表 data_book_blob 检查/创建完成")
+
+
+def move_blobs(db) -> int:
+    """分批把旧列中的大字段压缩写入 data_book_blob"""
+    codec = default_codec()
+    moved = 0
+    while True:
+        rows = db.query(
+            DataBookDetail.id, DataBookDetail.file_id,
+            DataBookDetail.full_text, DataBookDetail.deepseek_response
+        ).filter(
+            (DataBookDetail.full_text.isnot(None)) | (DataBookDetail.deepseek_response.isnot(None))
+        ).order_by(DataBookDetail.id).limit(BATCH_SIZE).all()
+        if not rows:
+            return moved
+        
+        for detail_id, file_id, full_text, deepseek_response in rows:
+            # 已有压缩记录的以压缩记录为准，只清空旧列
+            exists = db.query(DataBookBlob.id).filter(DataBookBlob.file_id == file_id).first()
+            if exists is None:
+                text_blob, response_blob, raw_size = encode_blobs(full_text, deepseek_response, codec)
+                db.add(DataBookBlob(
+                    file_id=file_id, codec=codec, full_text=text_blob,
+                    deepseek_response=response_blob, raw_size=raw_size
+                ))
+            
+            confidence = (deepseek_response or {}).get("confidence_score") if isinstance(deepseek_response, dict) else None
+            db.query(DataBookDetail).filter(DataBookDetail.id == detail_id).update({
+                DataBookDetail.full_text: None,
+                DataBookDetail.deepseek_response: null(),
+                DataBookDetail.confidence_score: confidence
+            }, synchronize_session=False)
+        
+        db.commit()
+        moved += len(rows)
+        print(f"已迁移 {moved} 条记录")
+
+
+def migrate():
+    """执行数据库迁移"""
+    print("开始数据库迁移...")
+    
+    db = SessionLocal()
+    
+    try:
+        add_columns(db)
+        moved = move_blobs(db)
+        
+        print("\n✅ 数据库迁移成功！")
+        print(f"共迁移 {moved} 条记录的全文和原始响应（压缩算法: {default_codec()}）")
+        if str(engine.url).startswith('sqlite'):
+            print("如需回收磁盘空间，可执行 VACUUM")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ 迁移失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库迁移脚本 - 添加文件内容指纹字段
+执行方式: python backend/scripts/migrate_add_content_hash.py
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+
+
+def migrate():
+    """执行数据库迁移"""
+    print("开始数据库迁移...")
+    
+    db = SessionLocal()
+    
+    try:
+        if str(engine.url).startswith('sqlite'):
+            print("检测到SQLite数据库，执行迁移...")
+            
+            result = db.execute(text("PRAGMA table_info(data_overview)"))
+            existing_columns = {row[1] for row in result.fetchall()}
+            
+            if 'content_hash' not in existing_columns:
+                print("添加列: content_hash")
+                db.execute(text("ALTER TABLE data_overview ADD COLUMN content_hash VARCHAR(64)"))
+            else:
+                print("列 content_hash 已存在，跳过")
+        else:
+            # PostgreSQL
+            print("检测到PostgreSQL数据库，执行迁移...")
+            db.execute(text("""
+                ALTER TABLE data_overview 
+                ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)
+            """))
+            print("列 content_hash 检查/添加完成")
+        
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_data_overview_content_hash "
+            "ON data_overview (content_hash)"
+        ))
+        print("索引 ix_data_overview_content_hash 检查/添加完成")
+        
+        db.commit()
+        print("\n✅ 数据库迁移成功！")
+        print("已有文件的指纹会在下一次扫描时补算")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ 迁移失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
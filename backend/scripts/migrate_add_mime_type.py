@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库迁移脚本 - 添加文件 MIME 类型字段
+执行方式: python backend/scripts/migrate_add_mime_type.py
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+
+
+def migrate():
+    """执行数据库迁移"""
+    print("开始数据库迁移...")
+    
+    db = SessionLocal()
+    
+    try:
+        if str(engine.url).startswith('sqlite'):
+            print("检测到SQLite数据库，执行迁移...")
+            
+            result = db.execute(text("PRAGMA table_info(data_overview)"))
+            existing_columns = {row[1] for row in result.fetchall()}
+            
+            if 'mime_type' not in existing_columns:
+                print("添加列: mime_type")
+                db.execute(text("ALTER TABLE data_overview ADD COLUMN mime_type VARCHAR(100)"))
+            else:
+                print("列 mime_type 已存在，跳过")
+        else:
+            # PostgreSQL
+            print("检测到PostgreSQL数据库，执行迁移...")
+            db.execute(text("""
+                ALTER TABLE data_overview 
+                ADD COLUMN IF NOT EXISTS mime_type VARCHAR(100)
+            """))
+            print("列 mime_type 检查/添加完成")
+        
+        db.commit()
+        print("\n✅ 数据库迁移成功！")
+        print("已有文档的类型会在下一次扫描时补充嗅探")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ 迁移失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库迁移脚本 - 添加解析档位和表格缓存字段
+执行方式: python backend/scripts/migrate_add_parse_profile.py
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine, SessionLocal
+
+# 新字段及类型
+NEW_COLUMNS = [
+    ("parse_profile", "VARCHAR(20)"),
+    ("tables", "JSON"),
+]
+
+
+def migrate():
+    """执行数据库迁移"""
+    print("开始数据库迁移...")
+    
+    db = SessionLocal()
+    
+    try:
+        if str(engine.url).startswith('sqlite'):
+            print("检测到SQLite数据库，执行迁移...")
+            
+            result = db.execute(text("PRAGMA table_info(data_book_detail)"))
+            existing_columns = {row[1] for row in result.fetchall()}
+            
+            for column, column_type in NEW_COLUMNS:
+                if column not in existing_columns:
+                    print(f"添加列: {column}")
+                    db.execute(text(f"ALTER TABLE data_book_detail ADD COLUMN {column} {column_type}"))
+                else:
+                    print(f"列 {column} 已存在，跳过")
+        else:
+            # PostgreSQL
+            print("检测到PostgreSQL数据库，执行迁移...")
+            for column, column_type in NEW_COLUMNS:
+                db.execute(text(f"""
+                    ALTER TABLE data_book_detail 
+                    ADD COLUMN IF NOT EXISTS {column} {column_type}
+                """))
+                print(f"列 {column} 检查/添加完成")
+        
+        db.commit()
+        print("\n✅ 数据库迁移成功！")
+        print("已解析文档的表格会在详情接口首次访问时提取")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ 迁移失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动文件监听守护进程
+
+监听 SCAN_PATH 下的新增/修改/移动/删除，按批同步到 data_overview，
+并只为变化的文档排队 process_document 解析任务。
+"""
+import sys
+import logging
+from pathlib import Path
+from typing import List
+
+# 添加项目根目录到路径
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+# 加载环境变量
+from dotenv import load_dotenv
+env_path = backend_dir / ".env"
+load_dotenv(env_path)
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.crawler.file_scanner import FileScanner
+from app.crawler.fs_watcher import FileSystemWatcher
+from app.tasks.document_tasks import process_document
+
+logger = logging.getLogger("fs_watcher")
+
+
+def main():
+    scanner = FileScanner()
+    
+    def on_changes(paths: List[str]):
+        with get_db() as db_session:
+            changes = scanner.sync_paths(db_session, paths)
+        
+        for file_id in changes.document_ids:
+            process_document.delay(file_id)
+        
+        logger.info(
+            f"同步 {len(paths)} 个变化路径: 新增 {changes.added} / 修改 {changes.modified} / "
+            f"删除 {changes.removed}，排队解析 {len(changes.document_ids)} 个文档"
+        )
+    
+    watcher = FileSystemWatcher(
+        str(scanner.scan_path),
+        on_changes,
+        debounce_seconds=settings.WATCH_DEBOUNCE_SECONDS,
+        max_delay=settings.WATCH_MAX_DELAY_SECONDS,
+        poll_interval=settings.WATCH_POLL_INTERVAL,
+        use_polling=settings.WATCH_FORCE_POLLING,
+        scan_workers=settings.SCAN_WORKERS,
+        scan_filter=scanner.build_scan_filter()
+    )
+    
+    print("=" * 60)
+    print("文件监听守护进程")
+    print("=" * 60)
+    print(f"监听目录: {scanner.scan_path}")
+    print(f"监听模式: {watcher.mode}")
+    print("=" * 60)
+    print("\n按 Ctrl+C 停止\n")
+    
+    watcher.run_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析大字段压缩存储单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import BaseModel
+from app.models.data_overview import DataOverview, DataBookDetail, DataBookBlob
+from app.utils import blob_store
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    BaseModel.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for file_id in (1, 2):
+        session.add(DataOverview(id=file_id, file_name=f"{file_id}.txt", file_path=f"/d/{file_id}.txt", file_type="file"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestCodecs:
+    """测试压缩算法"""
+
+    @pytest.mark.parametrize("codec", ["zlib", pytest.param("zstd", marks=pytest.mark.skipif(
+        not blob_store.ZSTD_AVAILABLE, reason="未安装 zstandard"))])
+    def test_roundtrip(self, codec):
+        data = "全文内容".encode("utf-8") * 100
+        packed = blob_store.compress(data, codec)
+        assert len(packed) < len(data)
+        assert blob_store.decompress(packed, codec) == data
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            blob_store.compress(b"x", "lz4")
+
+
+class TestBlobStore:
+    """测试大字段读写"""
+
+    def test_save_and_load(self, db_session):
+        """测试写入后按 file_id 读取"""
+        blob_store.save_parse_blobs(db_session, 1, "全文" * 50, {"abstract": "摘要", "confidence_score": 0.9})
+        db_session.commit()
+        assert blob_store.load_full_text(db_session, 1) == "全文" * 50
+        assert blob_store.load_deepseek_response(db_session, 1)["abstract"] == "摘要"
+        assert db_session.query(DataBookBlob).count() == 1
+
+    def test_overwrite(self, db_session):
+        """测试重新解析时覆盖原记录"""
+        blob_store.save_parse_blobs(db_session, 1, "old", None)
+        blob_store.save_parse_blobs(db_session, 1, "new", None)
+        db_session.commit()
+        assert blob_store.load_full_text(db_session, 1) == "new"
+        assert blob_store.load_deepseek_response(db_session, 1) is None
+        assert db_session.query(DataBookBlob).count() == 1
+
+    def test_copy(self, db_session):
+        """测试复用重复文件结果时复制压缩数据"""
+        blob_store.save_parse_blobs(db_session, 1, "text", {"keywords": ["a"]})
+        blob_store.copy_parse_blobs(db_session, 1, 2)
+        db_session.commit()
+        assert blob_store.load_full_text(db_session, 2) == "text"
+        assert blob_store.load_deepseek_response(db_session, 2) == {"keywords": ["a"]}
+
+    def test_legacy_columns(self, db_session):
+        """测试未迁移的旧记录从原列读取"""
+        db_session.add(DataBookDetail(file_id=1, full_text="legacy", deepseek_response={"confidence_score": 0.5}))
+        db_session.commit()
+        assert blob_store.load_full_text(db_session, 1) == "legacy"
+        assert blob_store.load_deepseek_response(db_session, 1) == {"confidence_score": 0.5}
+        assert blob_store.load_full_text(db_session, 2) is None
+
+    def test_detail_columns_deferred(self, db_session):
+        """测试查询详情行时不加载大字段"""
+        db_session.add(DataBookDetail(file_id=1, full_text="x" * 1000))
+        db_session.commit()
+        db_session.expunge_all()
+        detail = db_session.query(DataBookDetail).first()
+        assert "full_text" not in detail.__dict__
+        assert "deepseek_response" not in detail.__dict__
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描节点批量写入器单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import BaseModel
+from app.models.data_overview import DataOverview, DataBookDetail
+from app.crawler.bulk_writer import BulkNodeWriter
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "select-fallback"])
+def db_session(request, tmp_path):
+    """分别在支持 / 不支持 INSERT ... RETURNING 的方言上运行"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    engine.dialect.insert_executemany_returning = request.param
+    BaseModel.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def row(path, file_type="file", **extra):
+    return {"file_name": os.path.basename(path), "file_path": path, "file_type": file_type, **extra}
+
+
+def by_path(session):
+    return {node.file_path: node for node in session.query(DataOverview)}
+
+
+class TestBulkNodeWriter:
+    """测试批量插入、父节点解析和解析记录创建"""
+
+    def test_returning_flag(self, db_session):
+        """测试按方言能力选择取回ID的方式"""
+        writer = BulkNodeWriter(db_session, DataOverview)
+        expected = db_session.get_bind().dialect.insert_executemany_returning
+        assert writer._use_returning is expected
+
+    def test_parent_ids_across_batches(self, db_session):
+        """测试父节点在之前批次或当前缓冲区中时都能解析出 parent_id"""
+        inserted = []
+        writer = BulkNodeWriter(db_session, DataOverview, batch_size=2,
+                                on_inserted=lambda path, node_id: inserted.append(path))
+        writer.insert(row("/r", "folder"))
+        writer.insert(row("/r/a", "folder"), parent_path="/r")
+        writer.insert(row("/r/b", "folder"), parent_path="/r")
+        writer.insert(row("/r/a/1.txt"), parent_path="/r/a")
+        writer.insert(row("/r/b/2.txt"), parent_path="/r/b")
+        writer.insert(row("/r/b/3.txt"), parent_path="/r/b")
+        writer.flush()
+        db_session.commit()
+
+        nodes = by_path(db_session)
+        assert len(nodes) == 6
+        assert nodes["/r"].parent_id is None
+        assert nodes["/r/a"].parent_id == nodes["/r"].id
+        assert nodes["/r/b"].parent_id == nodes["/r"].id
+        assert nodes["/r/a/1.txt"].parent_id == nodes["/r/a"].id
+        assert nodes["/r/b/2.txt"].parent_id == nodes["/r/b"].id
+        assert nodes["/r/b/3.txt"].parent_id == nodes["/r/b"].id
+        assert writer.path_to_id == {path: node.id for path, node in nodes.items()}
+        assert sorted(inserted) == sorted(nodes)
+        assert writer.stats["inserted"] == 6
+
+    def test_round_trips(self, db_session):
+        """测试每批插入的往返次数：RETURNING 一次，回查方式两次"""
+        writer = BulkNodeWriter(db_session, DataOverview, batch_size=3)
+        for i in range(3):
+            writer.insert(row(f"/f{i}.txt"))
+        expected = 1 if writer._use_returning else 2
+        assert writer.stats["round_trips"] == expected
+
+    def test_preloaded_parent(self, db_session):
+        """测试父节点已在库中时使用预加载的ID，不触发刷新"""
+        db_session.add(DataOverview(**row("/r", "folder")))
+        db_session.commit()
+        parent_id = by_path(db_session)["/r"].id
+
+        writer = BulkNodeWriter(db_session, DataOverview)
+        writer.preload({"/r": parent_id})
+        writer.insert(row("/r/1.txt"), parent_path="/r")
+        assert writer.stats["round_trips"] == 0
+        assert "/r/1.txt" in writer and "/r" in writer
+        writer.flush()
+        db_session.commit()
+        assert by_path(db_session)["/r/1.txt"].parent_id == parent_id
+
+    def test_detail_rows(self, db_session):
+        """测试按需创建解析记录，可覆盖状态和原因"""
+        writer = BulkNodeWriter(db_session, DataOverview, DataBookDetail, batch_size=2)
+        writer.insert(row("/a.pdf"), with_detail=True)
+        writer.insert(row("/b.txt"))
+        writer.insert(row("/c.pdf"), with_detail=True,
+                      detail={"parse_status": "rejected", "parse_error": "内容与扩展名不符"})
+        writer.flush()
+        db_session.commit()
+
+        nodes = by_path(db_session)
+        details = {d.file_id: d for d in db_session.query(DataBookDetail)}
+        assert set(details) == {nodes["/a.pdf"].id, nodes["/c.pdf"].id}
+        assert details[nodes["/a.pdf"].id].parse_status == "pending"
+        assert details[nodes["/c.pdf"].id].parse_status == "rejected"
+        assert details[nodes["/c.pdf"].id].parse_error == "内容与扩展名不符"
+        assert writer.stats["details_inserted"] == 2
+
+    def test_update_and_mark_deleted(self, db_session):
+        """测试按主键批量更新（不同列集合分组执行）和分批软删除"""
+        writer = BulkNodeWriter(db_session, DataOverview, batch_size=2)
+        for path in ("/r", "/x.txt", "/y.txt", "/z.txt"):
+            writer.insert(row(path, "folder" if path == "/r" else "file"))
+        writer.flush()
+        ids = dict(writer.path_to_id)
+
+        writer.update({"id": ids["/x.txt"], "file_size": 10}, parent_path="/r")
+        writer.update({"id": ids["/y.txt"], "content_hash": "f:1:abc"})
+        writer.mark_deleted([ids["/y.txt"], ids["/z.txt"], ids["/r"]])
+        writer.flush()
+        db_session.commit()
+
+        nodes = by_path(db_session)
+        assert nodes["/x.txt"].file_size == 10
+        assert nodes["/x.txt"].parent_id == ids["/r"]
+        assert nodes["/y.txt"].content_hash == "f:1:abc"
+        assert nodes["/y.txt"].parent_id is None
+        assert [p for p, n in sorted(nodes.items()) if n.is_deleted] == ["/r", "/y.txt", "/z.txt"]
+        assert writer.stats["updated"] == 2
+        assert writer.stats["deleted"] == 3
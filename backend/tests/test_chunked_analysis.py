@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块分析单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.utils.chunked_analysis import estimate_tokens, merge_analyses, split_chunks
+
+
+class TestSplitChunks:
+    """测试按 token 预算切块"""
+
+    def test_estimate_tokens(self):
+        """测试中文按字计数，其他字符约 4 个一个 token"""
+        assert estimate_tokens("中文") == 2
+        assert estimate_tokens("abcdefgh") == 2
+
+    def test_chunks_within_budget(self):
+        """测试每块不超过预算且覆盖全文"""
+        text = "\n\n".join("第%d段。" % i + "内容" * 50 for i in range(20))
+        chunks = split_chunks(text, 300)
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 300 for chunk in chunks)
+        assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+    def test_long_sentence_hard_cut(self):
+        """测试没有分隔符的超长文本按字符硬切"""
+        chunks = split_chunks("字" * 1000, 300)
+        assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+
+    def test_max_chunks_samples_evenly(self):
+        """测试块数超出上限时均匀抽取，保留首尾"""
+        text = "\n\n".join(f"para{i:02d} " + "x" * 40 for i in range(10))
+        chunks = split_chunks(text, 15, max_chunks=3)
+        assert len(chunks) == 3
+        assert chunks[0].startswith("para00") and chunks[-1].startswith("para09")
+
+
+class TestMergeAnalyses:
+    """测试合并各块结果"""
+
+    def test_frequency_aware_merge(self):
+        """测试按出现频次去重排序"""
+        merged = merge_analyses([
+            {"keywords": ["A", "b"], "authors": ["张三"], "abstract": "开头", "conclusion": "",
+             "entities": [{"name": "BERT", "type": "方法", "frequency": 2}],
+             "theories_used": [{"name": "TAM", "description": "短"}],
+             "entity_relations": [{"source": "x", "target": "y", "relation": "使用"}],
+             "confidence_score": 0.8},
+            {"keywords": ["b", "c"], "authors": ["张三", "李四"], "abstract": "中间", "conclusion": "结论",
+             "entities": [{"name": "bert", "type": "方法", "frequency": 3}, {"name": "BERT", "type": "术语"}],
+             "theories_used": [{"name": "tam", "description": "更长的描述"}],
+             "entity_relations": [{"source": "X", "target": "Y", "relation": "使用"}],
+             "confidence_score": 0.9},
+        ])
+        assert merged["keywords"] == ["b", "A", "c"]
+        assert merged["authors"] == ["张三", "李四"]
+        assert merged["abstract"] == "开头" and merged["conclusion"] == "结论"
+        assert merged["entities"] == [
+            {"name": "BERT", "type": "方法", "frequency": 5},
+            {"name": "BERT", "type": "术语", "frequency": 1},
+        ]
+        assert merged["theories_used"] == [{"name": "TAM", "description": "更长的描述"}]
+        assert len(merged["entity_relations"]) == 1
+        assert merged["confidence_score"] == pytest.approx(0.85)
+
+    def test_single_result_unchanged(self):
+        """测试只有一块时原样返回"""
+        assert merge_analyses([{"keywords": ["a"]}]) == {"keywords": ["a"]}
+
+
+class TestChunkedDocumentAnalysis:
+    """测试 DocumentParser 分块分析"""
+
+    def test_chunks_analyzed_concurrently(self, monkeypatch):
+        """测试长文档切块并发分析并汇总用量"""
+        document_parser = pytest.importorskip("app.utils.document_parser")
+        settings = document_parser.settings
+        monkeypatch.setattr(settings, "PARSE_ANALYSIS_CHUNKED", True)
+        monkeypatch.setattr(settings, "PARSE_ANALYSIS_CHUNK_TOKENS", 100)
+        monkeypatch.setattr(settings, "PARSE_ANALYSIS_MAX_CHUNKS", 4)
+        monkeypatch.setattr(settings, "PARSE_ANALYSIS_CONCURRENCY", 2)
+
+        parser = document_parser.DocumentParser()
+
+        def fake_analyze(chunk):
+            usage = {"cached": chunk.startswith("第0"), "mock": False,
+                     "prompt_tokens": 10, "completion_tokens": 5, "seconds": 0.1}
+            return {"keywords": ["共同", chunk[:2]], "confidence_score": 0.9}, usage
+
+        monkeypatch.setattr(parser, "_analyze_text", fake_analyze)
+        text = "\n\n".join(f"第{i}节" + "正文" * 40 for i in range(6))
+        result = parser._call_deepseek_api({"text": text})
+
+        usage = result["analysis_usage"]
+        assert usage["chunks"] == 4
+        assert usage["cached_chunks"] == 1
+        assert usage["total_tokens"] == 60
+        assert result["keywords"][0] == "共同"
+        assert parser.get_stats()["analysis"]["chunks"] == 4
@@ -8,6 +8,9 @@ import pytest
 import tempfile
 import os
 import time
+import threading
+import subprocess
+import multiprocessing
 from pathlib import Path
 
 # 添加项目路径 - 必须在导入 app 之前
@@ -24,6 +27,19 @@ from app.utils.deepseek_retry import (
 )
 
 
+def _compute_in_process(cache_dir, log_path, queue):
+    """在子进程中通过单飞读取或计算同一内容"""
+    cache = DeepSeekCache(cache_dir=cache_dir)
+
+    def compute():
+        with open(log_path, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.5)
+        return {"data": "shared"}
+
+    queue.put(cache.get_or_compute("多进程共享的内容", compute))
+
+
 class TestDeepSeekCache:
     """测试 DeepSeek 缓存功能"""
     
@@ -144,6 +160,257 @@ class TestDeepSeekCache:
         assert info_after["valid"] is True
         assert info_after["cached_at"] is not None
 
+    def test_disk_store_persists(self):
+        """测试磁盘缓存保存在单个数据库文件中，新实例可以读取"""
+        self.cache.set("持久化的内容", {"data": "value"})
+
+        reopened = DeepSeekCache(cache_dir=str(self.cache_dir), cache_ttl_hours=1)
+        assert reopened.get("持久化的内容") == {"data": "value"}
+        assert reopened.get_stats()["memory_cache_count"] == 1
+        assert (self.cache_dir / "cache.db").exists()
+        assert list(self.cache_dir.glob("*.cache")) == []
+
+    def test_size_accounting(self):
+        """测试总条数和总字节数随写入、覆盖和删除同步更新"""
+        self.cache.set("内容一", {"data": "a"})
+        self.cache.set("内容二", {"data": "b"})
+        self.cache.set("内容一", {"data": "a" * 100})
+
+        stats = self.cache.get_stats()
+        assert stats["cache_files_count"] == 2
+        sizes = sum(self.cache.get_cache_info(c)["size_bytes"] for c in ("内容一", "内容二"))
+        assert stats["disk_size_bytes"] == sizes
+
+        self.cache.clear_all()
+        stats = self.cache.get_stats()
+        assert stats["cache_files_count"] == 0
+        assert stats["disk_size_bytes"] == 0
+
+    def test_expired_entries_cleaned_when_over_size(self, tmp_path):
+        """测试超过大小限制时先删除过期记录"""
+        cache = DeepSeekCache(cache_dir=str(tmp_path / "small"), max_cache_size_mb=60 / (1024 * 1024), cache_ttl_hours=1)
+        cache.set("旧内容", {"data": "old"})
+        cache._connect().execute("UPDATE cache_entries SET cached_at = cached_at - 7200")
+
+        cache.set("新内容", {"data": "new"})
+        stats = cache.get_stats()
+        assert stats["cache_files_count"] == 1
+        assert cache.get_cache_info("旧内容")["exists"] is False
+        assert stats["expired_removed"] == 1
+        assert stats["disk_evictions"] == 0
+
+    def test_memory_tier_lru_by_bytes(self, tmp_path):
+        """测试内存缓存按字节数限制，命中刷新最近使用顺序"""
+        entry_size = len(DeepSeekCache._encode({"data": "x" * 100}, None))
+        cache = DeepSeekCache(
+            cache_dir=str(tmp_path / "memory"),
+            max_memory_cache_mb=entry_size * 3.5 / (1024 * 1024)
+        )
+        for name in ("甲", "乙", "丙"):
+            cache.set(name, {"data": "x" * 100})
+        cache.get("甲")
+        cache.set("丁", {"data": "x" * 100})
+
+        # 甲刚被访问过，淘汰的是最久未使用的乙
+        keys = list(cache._memory_cache)
+        assert keys == [cache._generate_cache_key(name) for name in ("丙", "甲", "丁")]
+        stats = cache.get_stats()
+        assert stats["memory_evictions"] == 1
+        assert stats["memory_size_bytes"] == entry_size * 3
+        # 被淘汰的条目仍可从磁盘读取
+        assert cache.get("乙") == {"data": "x" * 100}
+
+    def test_disk_tier_lru_eviction(self, tmp_path):
+        """测试磁盘缓存超过上限时淘汰最久未访问的记录"""
+        entry_size = len(DeepSeekCache._encode({"data": "x" * 100}, None))
+        cache = DeepSeekCache(
+            cache_dir=str(tmp_path / "disk"),
+            max_cache_size_mb=entry_size * 3.5 / (1024 * 1024)
+        )
+        conn = cache._connect()
+        for index, name in enumerate(("甲", "乙", "丙")):
+            cache.set(name, {"data": "x" * 100})
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE cache_key = ?",
+                         (index, cache._generate_cache_key(name)))
+        # 访问甲（访问时间在淘汰前写回）
+        cache.get("甲")
+        cache.set("丁", {"data": "x" * 100})
+
+        assert cache.get_cache_info("甲")["exists"] is True
+        assert cache.get_cache_info("丁")["exists"] is True
+        assert cache.get_cache_info("丙")["exists"] is True
+        assert cache.get_cache_info("乙")["exists"] is False
+        stats = cache.get_stats()
+        assert stats["disk_evictions"] == 1
+        assert stats["evictions"] == 1
+        assert stats["disk_size_bytes"] <= entry_size * 3.5 * 0.9
+
+    def test_access_time_flushed_in_batches(self):
+        """测试命中时的访问时间批量写回"""
+        self.cache.set("访问时间", {"data": "value"})
+        conn = self.cache._connect()
+        conn.execute("UPDATE cache_entries SET accessed_at = 0")
+
+        self.cache.get("访问时间")
+        assert conn.execute("SELECT accessed_at FROM cache_entries").fetchone()[0] == 0
+        self.cache.flush()
+        assert conn.execute("SELECT accessed_at FROM cache_entries").fetchone()[0] > 0
+
+    def test_legacy_files_imported(self, tmp_path):
+        """测试旧版 .cache 文件导入数据库后删除"""
+        import pickle
+        from datetime import datetime
+
+        legacy_dir = tmp_path / "legacy"
+        legacy_dir.mkdir()
+        key = self.cache._generate_cache_key("旧版内容")
+        with open(legacy_dir / f"{key}.cache", "wb") as f:
+            pickle.dump({
+                "cache_key": key,
+                "cached_at": datetime.now().isoformat(),
+                "model": "deepseek-chat",
+                "response": {"data": "legacy"},
+                "metadata": {}
+            }, f)
+        (legacy_dir / "broken.cache").write_bytes(b"not a pickle")
+
+        cache = DeepSeekCache(cache_dir=str(legacy_dir), cache_ttl_hours=1)
+        assert cache.get("旧版内容") == {"data": "legacy"}
+        assert cache.get_stats()["cache_files_count"] == 1
+        assert list(legacy_dir.glob("*.cache")) == []
+
+
+class TestSingleFlight:
+    """测试缓存单飞：同一内容同时只计算一次"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.cache_dir = tmp_path / "single_flight"
+        self.cache = DeepSeekCache(cache_dir=str(self.cache_dir))
+
+    def test_threads_share_one_computation(self):
+        """测试进程内并发调用只计算一次"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.5)
+            return {"data": "value"}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_compute("并发内容", compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert [response for response, _ in results] == [{"data": "value"}] * 8
+        assert sum(1 for _, shared in results if not shared) == 1
+        assert self.cache.get_stats()["single_flight_computed"] == 1
+        assert self.cache.get_stats()["single_flight_waited"] == 7
+
+    def test_failure_not_cached(self):
+        """测试计算失败时不写入缓存，下一个调用方重新计算"""
+        def failing():
+            raise ConnectionError("Connection refused")
+
+        with pytest.raises(ConnectionError):
+            self.cache.get_or_compute("失败的内容", failing)
+        assert self.cache.get_cache_info("失败的内容")["exists"] is False
+
+        response, shared = self.cache.get_or_compute("失败的内容", lambda: {"data": "retry"})
+        assert response == {"data": "retry"}
+        assert shared is False
+        # 租约已释放
+        assert self.cache._connect().execute("SELECT COUNT(*) FROM cache_leases").fetchone()[0] == 0
+
+    def test_processes_share_one_computation(self, tmp_path):
+        """测试多个进程同时请求同一内容只计算一次"""
+        log_path = tmp_path / "computed.log"
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_compute_in_process, args=(str(self.cache_dir), str(log_path), queue))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        results = [queue.get(timeout=30) for _ in processes]
+        for process in processes:
+            process.join(timeout=30)
+
+        assert len(log_path.read_text().split()) == 1
+        assert all(response == {"data": "shared"} for response, _ in results)
+        assert sorted(shared for _, shared in results) == [False, True, True]
+
+    def test_lease_of_exited_process_taken_over(self):
+        """测试持有租约的进程已退出时直接接管"""
+        exited = subprocess.Popen(["true"])
+        exited.wait()
+        key = self.cache._generate_cache_key("孤儿租约")
+        self.cache._connect().execute(
+            "INSERT INTO cache_leases (cache_key, pid, expires) VALUES (?, ?, ?)",
+            (key, exited.pid, time.time() + 600)
+        )
+
+        started = time.monotonic()
+        response, shared = self.cache.get_or_compute("孤儿租约", lambda: {"data": "value"})
+        assert response == {"data": "value"}
+        assert shared is False
+        assert time.monotonic() - started < 1
+
+    def test_analyze_text_counts_one_lookup(self, monkeypatch):
+        """测试分析文本时每次调用只查一次缓存，模拟数据不写入缓存"""
+        document_parser = pytest.importorskip("app.utils.document_parser")
+        parser = document_parser.DocumentParser()
+        monkeypatch.setattr(parser, "cache", self.cache)
+
+        monkeypatch.setattr(document_parser.settings, "DEEPSEEK_API_KEY", "your-deepseek-api-key")
+        _, usage = parser._analyze_text("待分析的文本")
+        assert usage["mock"] is True
+        assert self.cache.get_cache_info("待分析的文本", document_parser.settings.DEEPSEEK_MODEL)["exists"] is False
+
+        monkeypatch.setattr(document_parser.settings, "DEEPSEEK_API_KEY", "sk-test")
+        monkeypatch.setattr(parser, "_request_analysis", lambda text, model, usage: {"abstract": "摘要"})
+        first, usage = parser._analyze_text("待分析的文本")
+        assert usage["cached"] is False
+        second, usage = parser._analyze_text("待分析的文本")
+        assert usage["cached"] is True
+        assert first == second == {"abstract": "摘要"}
+
+        stats = self.cache.get_stats()
+        assert stats["total_requests"] == 3
+        assert stats["misses"] == 2
+        assert stats["hits"] == 1
+        assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+    def test_analyze_text_returns_copy(self, monkeypatch):
+        """测试首次计算的结果也返回副本，调用方添加字段不影响缓存条目"""
+        document_parser = pytest.importorskip("app.utils.document_parser")
+        parser = document_parser.DocumentParser()
+        monkeypatch.setattr(parser, "cache", self.cache)
+        monkeypatch.setattr(document_parser.settings, "DEEPSEEK_API_KEY", "sk-test")
+        monkeypatch.setattr(parser, "_request_analysis", lambda text, model, usage: {"abstract": "摘要"})
+
+        first, usage = parser._analyze_text("待分析的文本")
+        assert usage["cached"] is False
+        first["analysis_usage"] = {"chunks": 1}
+        second, usage = parser._analyze_text("待分析的文本")
+        assert usage["cached"] is True
+        assert second == {"abstract": "摘要"}
+
+    def test_parsers_share_cache_instance(self):
+        """测试每个 DocumentParser 使用同一个进程内缓存实例"""
+        document_parser = pytest.importorskip("app.utils.document_parser")
+        reset_cache_instance()
+        try:
+            assert document_parser.DocumentParser().cache is document_parser.DocumentParser().cache
+        finally:
+            reset_cache_instance()
+
 
 class TestDeepSeekRetry:
     """测试 DeepSeek 重试机制"""
@@ -318,6 +585,45 @@ class TestDeepSeekRetry:
         # 验证不超过最大延迟
         for delay in delays:
             assert delay <= self.config.max_delay
+    
+    def test_async_retry_does_not_block_loop(self):
+        """测试异步重试：退避期间事件循环中的其他协程继续执行"""
+        import asyncio
+        call_count = [0]
+        ticks = []
+        
+        async def failing_func():
+            call_count[0] += 1
+            if call_count[0] < 3:
+                raise ConnectionError("Connection refused")
+            return {"result": "ok"}
+        
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+        
+        async def main():
+            return await asyncio.gather(self.retry.execute_with_retry_async(failing_func), ticker())
+        
+        result, _ = asyncio.run(main())
+        assert result == {"result": "ok"}
+        assert len(ticks) == 5
+        assert self.retry.get_stats()["retries"] == 2
+    
+    def test_async_circuit_breaker_shared(self):
+        """测试异步调用与同步调用共享断路器"""
+        import asyncio
+        
+        async def always_fail():
+            raise ValueError("bad request")
+        
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                asyncio.run(self.retry.execute_with_retry_async(always_fail))
+        
+        with pytest.raises(Exception, match="断路器已断开"):
+            self.retry.execute_with_retry(lambda: "ok")
 
 
 class TestIntegration:
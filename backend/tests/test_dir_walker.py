@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行目录遍历器单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.crawler import dir_walker
+from app.crawler.dir_walker import ParallelDirWalker
+
+
+class TestParallelDirWalker:
+    """测试并行目录遍历"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """构建测试目录树"""
+        self.root = tmp_path / "library"
+        (self.root / "b_folder" / "deep").mkdir(parents=True)
+        (self.root / "a_folder").mkdir()
+        (self.root / ".hidden").mkdir()
+        (self.root / "z.pdf").write_bytes(b"%PDF-1.4")
+        (self.root / "a.txt").write_text("hello", encoding="utf-8")
+        (self.root / "a_folder" / "note.md").write_text("# title", encoding="utf-8")
+        (self.root / "b_folder" / "deep" / "paper.docx").write_bytes(b"PK")
+        (self.root / ".hidden" / "secret.txt").write_text("x", encoding="utf-8")
+
+    def _names(self, entries):
+        return [os.path.relpath(e.path, self.root) for e in entries]
+
+    def test_deterministic_breadth_first_order(self):
+        """测试输出顺序确定且父节点先于子节点"""
+        walker = ParallelDirWalker(max_workers=4, skip_name=lambda n: n.startswith('.'))
+        entries = list(walker.walk(str(self.root)))
+
+        assert self._names(entries) == [
+            ".",
+            "a_folder",
+            "b_folder",
+            "a.txt",
+            "z.pdf",
+            os.path.join("a_folder", "note.md"),
+            os.path.join("b_folder", "deep"),
+            os.path.join("b_folder", "deep", "paper.docx"),
+        ]
+
+        # 多次、不同并发度下结果一致
+        for workers in (1, 8):
+            again = list(ParallelDirWalker(max_workers=workers, skip_name=lambda n: n.startswith('.')).walk(str(self.root)))
+            assert self._names(again) == self._names(entries)
+
+    def test_stat_data_cached_on_entry(self):
+        """测试条目携带 stat 信息"""
+        walker = ParallelDirWalker(max_workers=2)
+        entries = {e.name: e for e in walker.walk(str(self.root))}
+
+        assert entries["a.txt"].size == 5
+        assert entries["a.txt"].is_dir is False
+        assert entries["a_folder"].size is None
+        assert entries["a_folder"].parent_path == str(self.root)
+        assert entries["note.md"].depth == 2
+
+    def test_max_depth(self):
+        """测试最大深度限制"""
+        walker = ParallelDirWalker(max_workers=2, max_depth=1)
+        entries = list(walker.walk(str(self.root)))
+
+        assert max(e.depth for e in entries) == 1
+        assert "note.md" not in {e.name for e in entries}
+
+    def test_resume_from_frontier(self):
+        """测试从遍历前沿继续，结果与完整遍历的剩余部分一致"""
+        walker = ParallelDirWalker(max_workers=2, skip_name=lambda n: n.startswith('.'))
+        full = self._names(walker.walk(str(self.root)))
+
+        # 根目录列举完成时记录前沿，并在此处“中断”
+        frontier = []
+        done = []
+
+        def on_dir_done(dir_path, children):
+            done.append(dir_path)
+            if not frontier:
+                frontier.extend(walker.pending_dirs())
+
+        consumed = []
+        for entry in walker.walk(str(self.root), on_dir_done=on_dir_done):
+            if done:
+                break
+            consumed.append(entry)
+
+        assert done == [str(self.root)]
+        assert frontier == [(str(self.root / "a_folder"), 2), (str(self.root / "b_folder"), 2)]
+
+        resumed = ParallelDirWalker(max_workers=2, skip_name=lambda n: n.startswith('.'))
+        rest = self._names(resumed.walk(str(self.root), frontier=frontier))
+        assert self._names(consumed) + rest == full
+
+    def test_failed_listing_not_reported_done(self, monkeypatch):
+        """测试目录列举失败时不回调 on_dir_done（避免误判子项被删除）"""
+        real_scandir = os.scandir
+
+        def flaky_scandir(path):
+            if os.path.basename(path) == "a_folder":
+                raise PermissionError("denied")
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", flaky_scandir)
+        done = []
+        walker = ParallelDirWalker(max_workers=2)
+        list(walker.walk(str(self.root), on_dir_done=lambda path, children: done.append(path)))
+
+        assert str(self.root / "a_folder") not in done
+        assert str(self.root / "b_folder") in done
+
+    def test_outstanding_listings_bounded(self, tmp_path, monkeypatch):
+        """测试宽目录下同时提交的列举任务有上限，其余目录排队且计入前沿"""
+        monkeypatch.setattr(dir_walker, "LISTINGS_PER_WORKER", 2)
+        wide = tmp_path / "wide"
+        for i in range(20):
+            (wide / f"d{i:02d}" / "sub").mkdir(parents=True)
+
+        walker = ParallelDirWalker(max_workers=2)
+        assert walker.max_outstanding == 4
+        peak = 0
+        frontier_sizes = []
+
+        def on_dir_done(dir_path, children):
+            frontier_sizes.append(walker.pending_count())
+            assert walker.pending_count() == len(walker.pending_dirs())
+
+        entries = []
+        for entry in walker.walk(str(wide), on_dir_done=on_dir_done):
+            peak = max(peak, len(walker._listing))
+            entries.append(entry)
+
+        assert peak == 4
+        # 根目录列举完成时 20 个子目录都在前沿中（4 个已提交，16 个排队）
+        assert frontier_sizes[0] == 20
+        assert len(entries) == 1 + 20 + 20
+        assert [os.path.relpath(e.path, wide) for e in entries[1:21]] == [f"d{i:02d}" for i in range(20)]
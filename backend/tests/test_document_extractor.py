@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档内容提取器单元测试
+"""
+
+import pytest
+import os
+from contextlib import contextmanager
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+# 依赖 pdfplumber / python-docx 等解析库
+document_extractor = pytest.importorskip("app.utils.document_extractor")
+DocumentExtractor = document_extractor.DocumentExtractor
+ExtractOptions = document_extractor.ExtractOptions
+
+
+def build_pdf(page_texts):
+    """生成每页一行文本的最小 PDF"""
+    count = len(page_texts)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(count))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {count} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    return _serialize_pdf(objects)
+
+
+def build_image_pdf(page_count):
+    """生成每页只有一张图片、没有字体的 PDF（模拟扫描件）"""
+    kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(page_count))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode(),
+    ]
+    for i in range(page_count):
+        image = 3 + 3 * i + 2
+        stream = b"q 100 0 0 100 0 0 cm /Im0 Do Q"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {4 + 3 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 8 /Length 1 >>\nstream\n\x00\nendstream"
+        )
+    return _serialize_pdf(objects)
+
+
+def _serialize_pdf(objects):
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, body in enumerate(objects):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % (i + 1) + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+class TestPdfExtraction:
+    """测试 PDF 逐页提取"""
+
+    @pytest.fixture
+    def pdf_path(self, tmp_path):
+        path = tmp_path / "book.pdf"
+        path.write_bytes(build_pdf([f"page {i} text" for i in range(30)]))
+        return str(path)
+
+    def test_full_extraction(self, pdf_path):
+        """测试未设置上限时提取全部页面"""
+        content = DocumentExtractor().extract(pdf_path)
+        assert len(content["pages"]) == 30
+        assert content["metadata"]["page_count"] == 30
+        assert not content["truncated"]
+
+    def test_stops_after_budget(self, pdf_path):
+        """测试文本达到上限后不再处理后面的页面"""
+        content = DocumentExtractor().extract(pdf_path, ExtractOptions(max_chars=30))
+        assert len(content["pages"]) == 3
+        assert content["truncated"]
+        assert content["text"].startswith("page 0 text")
+        assert content["metadata"]["page_count"] == 30
+
+
+class TestParseProfiles:
+    """测试解析档位"""
+
+    @pytest.fixture
+    def pdf_path(self, tmp_path):
+        path = tmp_path / "book.pdf"
+        path.write_bytes(build_pdf([f"page {i} text" for i in range(5)]))
+        return str(path)
+
+    def test_profile_options(self):
+        """测试档位选项及 full 档位忽略文本上限"""
+        assert document_extractor.profile_options("fast", 100) == ExtractOptions(max_chars=100, structure=False)
+        assert document_extractor.profile_options("standard", 100) == ExtractOptions(max_chars=100)
+        full = document_extractor.profile_options("full", 100)
+        assert full.max_chars is None and full.tables and full.layout
+
+    def test_unknown_profile(self):
+        """测试未知档位"""
+        with pytest.raises(ValueError):
+            document_extractor.profile_options("turbo")
+
+    def test_fast_profile_skips_structure(self, pdf_path):
+        """测试 fast 档位只提取文本"""
+        content = DocumentExtractor().extract(pdf_path, document_extractor.profile_options("fast"))
+        assert content["pages"] == []
+        assert "page 4 text" in content["text"]
+
+    def test_tables_extracted_on_demand(self, pdf_path):
+        """测试默认不提取表格，单独提取时返回带页码的表格列表"""
+        extractor = DocumentExtractor()
+        assert extractor.extract(pdf_path)["tables"] == []
+        assert extractor.extract_tables(pdf_path) == []
+        assert extractor.extract_tables(pdf_path.replace(".pdf", ".txt")) == []
+
+
+class TestPdfBackendChain:
+    """测试 PDF 后端链"""
+
+    @pytest.fixture
+    def pdf_path(self, tmp_path):
+        path = tmp_path / "book.pdf"
+        path.write_bytes(build_pdf([f"page {i} text" for i in range(5)]))
+        return str(path)
+
+    def test_first_backend_used(self, pdf_path):
+        """测试第一个后端提取到可用文本时不再尝试后面的后端"""
+        content = DocumentExtractor(pdf_backends=["pypdf2", "pdfplumber"]).extract(pdf_path)
+        assert content["extraction"]["backend"] == "pypdf2"
+        assert [a["backend"] for a in content["extraction"]["attempts"]] == ["pypdf2"]
+        assert len(content["pages"]) == 5
+
+    def test_layout_prefers_pdfplumber(self, pdf_path):
+        """测试需要表格或版面时 pdfplumber 优先"""
+        extractor = DocumentExtractor(pdf_backends=["pypdf2", "pdfplumber"])
+        content = extractor.extract(pdf_path, ExtractOptions(tables=True))
+        assert content["extraction"]["backend"] == "pdfplumber"
+
+    def test_falls_back_on_error_and_empty_text(self, pdf_path, monkeypatch):
+        """测试后端出错或提取不到文本时尝试下一个后端"""
+        @contextmanager
+        def broken(file_path, options):
+            raise RuntimeError("boom")
+            yield
+
+        @contextmanager
+        def blank(file_path, options):
+            yield {"page_count": 1}, iter([(1, "  ", [])])
+
+        backends = dict(document_extractor.PDF_BACKENDS, broken=broken, blank=blank)
+        monkeypatch.setattr(document_extractor, "PDF_BACKENDS", backends)
+        content = DocumentExtractor(pdf_backends=["broken", "blank", "pdfplumber"]).extract(pdf_path)
+        outcomes = [(a["backend"], a["outcome"]) for a in content["extraction"]["attempts"]]
+        assert outcomes == [("broken", "error"), ("blank", "empty"), ("pdfplumber", "ok")]
+        assert content["extraction"]["backend"] == "pdfplumber"
+
+    def test_unavailable_backends_skipped(self):
+        """测试未安装的后端被跳过"""
+        extractor = DocumentExtractor(pdf_backends=["no-such-backend", "pypdf2"])
+        assert extractor.pdf_backends == ["pypdf2"]
+
+    def test_image_only_pdf(self, tmp_path):
+        """测试纯图片 PDF 在检查阶段直接返回，不运行文本后端"""
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(build_image_pdf(4))
+        content = DocumentExtractor(pdf_probe_pages=3).extract(str(path))
+        assert content["extraction"]["image_only"]
+        assert content["extraction"]["attempts"] == []
+        assert content["metadata"]["page_count"] == 4
+        assert content["text"] == ""
+
+    def test_text_pdf_not_image_only(self, pdf_path):
+        """测试含字体的 PDF 不会被判定为纯图片"""
+        content = DocumentExtractor(pdf_probe_pages=3).extract(pdf_path)
+        assert not content["extraction"]["image_only"]
+
+
+class TestTxtExtraction:
+    """测试纯文本提取"""
+
+    def test_detect_encoding(self):
+        """测试 BOM、UTF-8 快速判断和中文编码"""
+        detect = document_extractor.detect_encoding
+        assert detect("文本".encode("utf-8-sig")) == "utf-8-sig"
+        assert detect("文本".encode("utf-16")) == "utf-16"
+        # 样本末尾截断的多字节字符仍判定为 UTF-8
+        assert detect("中文".encode("utf-8")[:-1]) == "utf-8"
+        assert detect(("中文段落测试，编码检测。" * 20).encode("gbk")) == "gb18030"
+
+    def test_streaming_stats(self, tmp_path):
+        """测试逐行统计段落、行数和词数"""
+        path = tmp_path / "notes.txt"
+        path.write_text("first line\nsecond line\n\n\nnext para\n \nsame para", encoding="utf-8")
+        content = DocumentExtractor().extract(str(path))
+        assert content["paragraphs"] == [
+            {"text": "first line\nsecond line", "line_count": 2},
+            {"text": "next para\n \nsame para", "line_count": 3},
+        ]
+        assert content["metadata"]["line_count"] == 7
+        assert content["metadata"]["word_count"] == 8
+        assert content["metadata"]["paragraph_count"] == 2
+
+    def test_stats_without_structure(self, tmp_path):
+        """测试不需要结构时只统计段落数，不构建段落列表"""
+        path = tmp_path / "notes.txt"
+        text = "first line\nsecond line\n\n\nnext para\n \nsame para"
+        path.write_text(text, encoding="utf-8")
+        content = DocumentExtractor().extract(str(path), ExtractOptions(structure=False))
+        assert content["text"] == text
+        assert content["paragraphs"] == []
+        assert content["metadata"]["paragraph_count"] == 2
+        assert content["metadata"]["character_count"] == len(text)
+
+    def test_gbk_file(self, tmp_path):
+        """测试非 UTF-8 文件按检测出的编码解码"""
+        path = tmp_path / "gbk.txt"
+        text = "中文段落测试，编码检测。\n\n第二段" * 20
+        path.write_bytes(text.encode("gbk"))
+        content = DocumentExtractor().extract(str(path))
+        assert content["text"] == text
+        assert content["metadata"]["encoding"] == "gb18030"
+
+
+class TestDocxExtraction:
+    """测试 Word 文档提取"""
+
+    @pytest.fixture
+    def docx_path(self, tmp_path):
+        docx = pytest.importorskip("docx")
+        doc = docx.Document()
+        doc.core_properties.title = "标题"
+        doc.add_paragraph("第一段")
+        para = doc.add_paragraph("plain")
+        para.add_run(" bold").bold = True
+        doc.add_paragraph("")
+        table = doc.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "表格内容"
+        doc.add_paragraph("after\ttab")
+        path = tmp_path / "book.docx"
+        doc.save(str(path))
+        return str(path)
+
+    def test_streaming_paragraphs(self, docx_path):
+        """测试默认流式读取正文段落，不含表格内容和文字格式"""
+        content = DocumentExtractor().extract(docx_path)
+        assert content["paragraphs"] == [{"text": "第一段"}, {"text": "plain bold"}, {"text": "after\ttab"}]
+        assert content["tables"] == []
+        assert content["metadata"]["title"] == "标题"
+
+    def test_detailed_mode_matches_text(self, docx_path):
+        """测试详细模式保留样式和格式，文本与流式读取一致"""
+        extractor = DocumentExtractor()
+        detailed = extractor.extract(docx_path, ExtractOptions(runs=True, tables=True))
+        assert detailed["text"] == extractor.extract(docx_path)["text"]
+        assert detailed["paragraphs"][1]["runs"][1] == {"text": " bold", "bold": True, "italic": None}
+        assert detailed["tables"] == [{"page_number": None, "rows": [["表格内容", ""]]}]
+
+    def test_tables_on_demand(self, docx_path):
+        """测试单独提取表格"""
+        assert DocumentExtractor().extract_tables(docx_path)[0]["rows"] == [["表格内容", ""]]
+
+
+_P_NS = 'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" ' \
+        'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" ' \
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_S_NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" ' \
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_RELS_NS = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+_CORE = (
+    '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>{}</dc:title></cp:coreProperties>'
+)
+
+
+def build_zip(path, parts):
+    import zipfile
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in parts.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def _relationships(targets):
+    rels = "".join(f'<Relationship Id="{rid}" Type="t" Target="{target}"/>' for rid, target in targets.items())
+    return f'<Relationships {_RELS_NS}>{rels}</Relationships>'
+
+
+def _slide(title, paragraphs, table=None):
+    shapes = (
+        f'<p:sp><p:nvSpPr><p:cNvPr id="1" name="t"/><p:cNvSpPr/><p:nvPr><p:ph type="title"/></p:nvPr></p:nvSpPr>'
+        f'<p:txBody><a:p><a:r><a:t>{title}</a:t></a:r></a:p></p:txBody></p:sp>'
+        '<p:sp><p:nvSpPr><p:cNvPr id="2" name="b"/><p:cNvSpPr/><p:nvPr/></p:nvSpPr><p:txBody>'
+        + "".join(f'<a:p><a:r><a:t>{text}</a:t></a:r></a:p>' for text in paragraphs)
+        + '</p:txBody></p:sp>'
+    )
+    if table:
+        rows = "".join(
+            "<a:tr>" + "".join(f"<a:tc><a:txBody><a:p><a:r><a:t>{cell}</a:t></a:r></a:p></a:txBody></a:tc>" for cell in row) + "</a:tr>"
+            for row in table
+        )
+        shapes += f'<p:graphicFrame><a:graphic><a:graphicData><a:tbl>{rows}</a:tbl></a:graphicData></a:graphic></p:graphicFrame>'
+    return f'<p:sld {_P_NS}><p:cSld><p:spTree>{shapes}</p:spTree></p:cSld></p:sld>'
+
+
+class TestPptxExtraction:
+    """测试 PowerPoint 演示文稿提取"""
+
+    @pytest.fixture
+    def pptx_path(self, tmp_path):
+        # 放映顺序与文件编号相反
+        return build_zip(tmp_path / "deck.pptx", {
+            "ppt/presentation.xml": f'<p:presentation {_P_NS}><p:sldIdLst>'
+                                    '<p:sldId id="256" r:id="rId2"/><p:sldId id="257" r:id="rId1"/>'
+                                    '</p:sldIdLst></p:presentation>',
+            "ppt/_rels/presentation.xml.rels": _relationships({"rId1": "slides/slide1.xml", "rId2": "slides/slide2.xml"}),
+            "ppt/slides/slide1.xml": _slide("结论", ["效果显著"], table=[["指标", "值"], ["准确率", "0.9"]]),
+            "ppt/slides/slide2.xml": _slide("研究背景", ["第一点", "第二点"]),
+            "docProps/core.xml": _CORE.format("演示"),
+        })
+
+    def test_slides_in_presentation_order(self, pptx_path):
+        """测试按放映顺序读取幻灯片标题、文本和表格"""
+        content = DocumentExtractor().extract(pptx_path)
+        assert [slide["title"] for slide in content["slides"]] == ["研究背景", "结论"]
+        assert content["slides"][0]["text"] == "研究背景\n第一点\n第二点"
+        assert content["slides"][1]["text"] == "结论\n效果显著\n指标\t值\n准确率\t0.9"
+        assert content["slides"][1]["table_count"] == 1
+        assert content["tables"] == []
+        assert content["metadata"]["slide_count"] == 2
+        assert content["metadata"]["title"] == "演示"
+
+    def test_stops_after_budget(self, pptx_path):
+        """测试文本达到上限后不再读取后面的幻灯片"""
+        content = DocumentExtractor().extract(pptx_path, ExtractOptions(max_chars=5))
+        assert len(content["slides"]) == 1
+        assert content["truncated"] is True
+
+    def test_tables_on_demand(self, pptx_path):
+        """测试单独提取表格，页码为幻灯片序号"""
+        assert DocumentExtractor().extract_tables(pptx_path) == [
+            {"page_number": 2, "rows": [["指标", "值"], ["准确率", "0.9"]]}
+        ]
+
+
+class TestXlsxExtraction:
+    """测试 Excel 工作簿提取"""
+
+    @pytest.fixture
+    def xlsx_path(self, tmp_path):
+        sheet1 = (
+            f'<worksheet {_S_NS}><sheetData>'
+            '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>'
+            '<row r="2"><c r="A2"><v>3.5</v></c><c r="B2" t="b"><v>1</v></c>'
+            '<c r="C2" t="inlineStr"><is><t>内联</t></is></c></row>'
+            '<row r="3"><c r="A3" s="1"/></row>'
+            '</sheetData></worksheet>'
+        )
+        sheet2 = f'<worksheet {_S_NS}><sheetData><row r="1"><c r="B1" t="s"><v>2</v></c></row></sheetData></worksheet>'
+        return build_zip(tmp_path / "book.xlsx", {
+            "xl/workbook.xml": f'<workbook {_S_NS}><sheets><sheet name="数据" sheetId="1" r:id="rId1"/>'
+                               '<sheet name="备注" sheetId="2" r:id="rId2"/></sheets></workbook>',
+            "xl/_rels/workbook.xml.rels": _relationships({"rId1": "worksheets/sheet1.xml", "rId2": "/xl/worksheets/sheet2.xml"}),
+            "xl/sharedStrings.xml": f'<sst {_S_NS}><si><t>名称</t></si>'
+                                    '<si><r><t>数</t></r><r><t>值</t></r><rPh><t>すう</t></rPh></si>'
+                                    '<si><t>说明</t></si></sst>',
+            "xl/worksheets/sheet1.xml": sheet1,
+            "xl/worksheets/sheet2.xml": sheet2,
+            "docProps/core.xml": _CORE.format("工作簿"),
+        })
+
+    def test_rows_streamed(self, xlsx_path):
+        """测试逐行读取共享字符串、数字、布尔值和内联字符串，跳过空行"""
+        content = DocumentExtractor().extract(xlsx_path)
+        assert content["text"] == "[数据]\n名称\t\t数值\n3.5\tTRUE\t内联\n\n[备注]\n\t说明"
+        assert content["sheets"] == [
+            {"name": "数据", "row_count": 2, "column_count": 3},
+            {"name": "备注", "row_count": 1, "column_count": 2},
+        ]
+        assert content["metadata"]["sheet_count"] == 2
+        assert content["metadata"]["title"] == "工作簿"
+
+    def test_stops_after_budget(self, xlsx_path):
+        """测试文本达到上限后停止读取"""
+        content = DocumentExtractor().extract(xlsx_path, ExtractOptions(max_chars=5))
+        assert content["metadata"]["row_count"] == 1
+        assert content["truncated"] is True
+
+    def test_tables_on_demand(self, xlsx_path):
+        """测试单独提取表格，每个工作表一张"""
+        tables = DocumentExtractor().extract_tables(xlsx_path)
+        assert [(t["page_number"], t["sheet"]) for t in tables] == [(1, "数据"), (2, "备注")]
+        assert tables[0]["rows"][1] == ["3.5", "TRUE", "内联"]
+
+
+class TestDocText:
+    """测试 Word 97-2003 正文读取（不依赖 olefile，直接构造数据流）"""
+
+    @staticmethod
+    def build_streams(pieces, ccp_text):
+        """pieces: [(文本, 是否压缩)]，返回 (WordDocument 流, 表格流)"""
+        import struct
+        fib = bytearray(1024)
+        struct.pack_into("<HH", fib, 0, 0xA5EC, 0)
+        struct.pack_into("<H", fib, 0x0A, 0x0200)
+        pos = 32
+        struct.pack_into("<H", fib, pos, 14)
+        pos += 2 + 14 * 2
+        struct.pack_into("<H", fib, pos, 22)
+        struct.pack_into("<i", fib, pos + 2 + 3 * 4, ccp_text)
+        pos += 2 + 22 * 4
+        struct.pack_into("<H", fib, pos, 93)
+        fc_lcb = pos + 2
+
+        data = bytearray()
+        cps = [0]
+        pcds = b""
+        for text, compressed in pieces:
+            offset = len(fib) + len(data)
+            if compressed:
+                data += text.encode("cp1252")
+                fc = (offset * 2) | 0x40000000
+            else:
+                data += text.encode("utf-16-le")
+                fc = offset
+            cps.append(cps[-1] + len(text))
+            pcds += struct.pack("<HIH", 0, fc, 0)
+        plc_pcd = struct.pack(f"<{len(cps)}I", *cps) + pcds
+        clx = b"\x01" + struct.pack("<h", 2) + b"\x00\x00" + b"\x02" + struct.pack("<I", len(plc_pcd)) + plc_pcd
+        table = b"\x00" * 8 + clx
+        struct.pack_into("<II", fib, fc_lcb + 66 * 4, 8, len(clx))
+        return bytes(fib) + bytes(data), table
+
+    def test_piece_table(self):
+        """测试读取压缩和 Unicode 片段，去掉域代码并只读取正文"""
+        pieces = [
+            ("Hello\r", True),
+            ("世界\x13 HYPERLINK \"x\" \x14链接\x15\x07单元格\r", False),
+            ("脚注", False),
+        ]
+        from app.utils.office_readers import doc_text
+        word, table = self.build_streams(pieces, ccp_text=len(pieces[0][0]) + len(pieces[1][0]))
+        text = doc_text(word, {"1Table": table}.__getitem__)
+        assert text == "Hello\n世界链接\t单元格\n"
+
+    def test_rejects_other_formats(self):
+        """测试非 Word 97 文档报错"""
+        from app.utils.office_readers import doc_text
+        with pytest.raises(ValueError):
+            doc_text(b"\x00" * 64, lambda name: b"")
+
+
+class TestFormatRegistry:
+    """测试格式注册表"""
+
+    def test_builtin_formats(self):
+        """测试内置格式的开销等级和可选依赖"""
+        from app.utils.format_registry import COST_LIGHT, get_format_handler, supported_extensions
+        assert get_format_handler(".TXT").cost == COST_LIGHT
+        assert get_format_handler(".pptx").streaming
+        assert {".pdf", ".docx", ".pptx", ".xlsx", ".txt", ".md"} <= set(supported_extensions())
+        assert (".doc" in supported_extensions()) == get_format_handler(".doc").available
+
+    def test_register_custom_format(self, tmp_path, monkeypatch):
+        """测试注册新格式后提取器按注册表解析"""
+        from app.utils import format_registry
+        monkeypatch.setattr(format_registry, "FORMAT_HANDLERS", dict(format_registry.FORMAT_HANDLERS))
+        monkeypatch.setattr(document_extractor, "FORMAT_HANDLERS", format_registry.FORMAT_HANDLERS)
+        format_registry.register_format(format_registry.FormatHandler(
+            "csv", (".csv",), lambda extractor, path, options: {"text": path.read_text()}, format_registry.COST_LIGHT
+        ))
+        path = tmp_path / "a.csv"
+        path.write_text("a,b")
+        assert DocumentExtractor().extract(str(path)) == {"text": "a,b"}
+        assert DocumentExtractor().extract_tables(str(path)) == []
+
+    def test_unavailable_format(self, tmp_path, monkeypatch):
+        """测试缺少可选依赖的格式提示需要安装的包"""
+        from app.utils import format_registry
+        handler = format_registry.FORMAT_HANDLERS[".doc"]._replace(available=False)
+        monkeypatch.setitem(document_extractor.FORMAT_HANDLERS, ".doc", handler)
+        path = tmp_path / "old.doc"
+        path.write_bytes(b"")
+        with pytest.raises(ValueError, match="olefile"):
+            DocumentExtractor().extract(str(path))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重复文件分组单元测试
+"""
+
+import pytest
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import BaseModel
+from app.models.data_overview import DataOverview, DataBookDetail
+from app.crawler.duplicates import find_duplicate_groups
+
+BLOCK = 16
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    BaseModel.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_file(session, path, data, content_hash):
+    path.write_bytes(data)
+    session.add(DataOverview(
+        file_name=path.name, file_path=str(path), file_type="file",
+        file_size=len(data), content_hash=content_hash
+    ))
+
+
+class TestFindDuplicateGroups:
+    """测试按内容指纹分组"""
+
+    def test_sampled_groups_split_by_full_hash(self, db_session, tmp_path):
+        """测试采样指纹相同但中间内容不同的文件不算重复"""
+        head, tail = b"H" * BLOCK, b"T" * BLOCK
+        sampled = "s:40:head-tail"
+        add_file(db_session, tmp_path / "a.pdf", head + b"middle-1" + tail, sampled)
+        add_file(db_session, tmp_path / "b.pdf", head + b"middle-2" + tail, sampled)
+        add_file(db_session, tmp_path / "c.pdf", head + b"middle-1" + tail, sampled)
+        add_file(db_session, tmp_path / "d.pdf", head + b"middle-3" + tail, "s:40:other")
+        add_file(db_session, tmp_path / "e.pdf", head + b"middle-4" + tail, "s:40:other")
+        db_session.commit()
+
+        groups = find_duplicate_groups(db_session, DataOverview)
+        assert len(groups) == 1
+        assert groups[0]["count"] == 2
+        assert groups[0]["verified"] is True
+        assert [f["name"] for f in groups[0]["files"]] == ["a.pdf", "c.pdf"]
+        assert groups[0]["wasted_bytes"] == 40
+
+    def test_full_fingerprint_trusted(self, db_session, tmp_path):
+        """测试全内容指纹的分组不再读取文件"""
+        for name in ("a.txt", "b.txt"):
+            db_session.add(DataOverview(
+                file_name=name, file_path=str(tmp_path / "missing" / name), file_type="file",
+                file_size=5, content_hash="f:5:same"
+            ))
+        db_session.commit()
+
+        groups = find_duplicate_groups(db_session, DataOverview)
+        assert [g["count"] for g in groups] == [2]
+
+    def test_unverified_mode(self, db_session, tmp_path):
+        """测试关闭确认时按采样指纹分组"""
+        add_file(db_session, tmp_path / "a.pdf", b"H" * BLOCK + b"1" + b"T" * BLOCK, "s:33:x")
+        add_file(db_session, tmp_path / "b.pdf", b"H" * BLOCK + b"2" + b"T" * BLOCK, "s:33:x")
+        db_session.commit()
+
+        assert find_duplicate_groups(db_session, DataOverview) == []
+        groups = find_duplicate_groups(db_session, DataOverview, verify=False)
+        assert groups[0]["count"] == 2
+        assert groups[0]["verified"] is False
+
+
+class TestReuseDuplicateResult:
+    """测试解析时复用重复文件的结果"""
+
+    @pytest.fixture
+    def parser(self, db_session, monkeypatch):
+        document_parser = pytest.importorskip("app.utils.document_parser")
+
+        @contextmanager
+        def get_db():
+            yield db_session
+
+        monkeypatch.setattr(document_parser, "get_db", get_db)
+        return document_parser.DocumentParser()
+
+    @pytest.fixture
+    def files(self, db_session, tmp_path):
+        """已按 fast 档位解析的来源文件与内容相同的待解析文件"""
+        data = b"same content" * 10
+        add_file(db_session, tmp_path / "source.txt", data, "f:120:same")
+        add_file(db_session, tmp_path / "copy.txt", data, "f:120:same")
+        db_session.commit()
+        source, target = db_session.query(DataOverview).order_by(DataOverview.id).all()
+        db_session.add(DataBookDetail(file_id=source.id, parse_status="completed",
+                                      parse_profile="fast", abstract="摘要"))
+        db_session.commit()
+        return source, target
+
+    def test_richer_profile_not_served_from_fast(self, parser, files):
+        """测试 full / standard 请求不复用 fast 档位的结果"""
+        source, target = files
+        for profile in ("full", "standard"):
+            assert parser._reuse_duplicate_result(
+                Path(target.file_path), target.id, 120, profile
+            ) is None
+        assert parser.dedup_reused == 0
+
+    def test_same_profile_reused(self, parser, files, db_session):
+        """测试档位相同时复用并复制解析结果"""
+        source, target = files
+        result = parser._reuse_duplicate_result(
+            Path(target.file_path), target.id, 120, "fast"
+        )
+        assert result["reused_from"] == source.id
+        detail = db_session.query(DataBookDetail).filter(DataBookDetail.file_id == target.id).one()
+        assert (detail.parse_profile, detail.abstract) == ("fast", "摘要")
+
+    def test_explicit_full_extraction_requires_full_profile(self, parser, files, monkeypatch):
+        """测试显式要求全文时按 full 档位查找可复用的结果"""
+        source, target = files
+        seen = []
+
+        def fake_reuse(file_path, file_id, file_size, profile):
+            seen.append(profile)
+            return {"status": "success"}
+
+        monkeypatch.setattr(parser, "_reuse_duplicate_result", fake_reuse)
+        parser.parse_document(target.file_path, target.id, full_extraction=True, profile="fast")
+        parser.parse_document(target.file_path, target.id, profile="fast")
+        assert seen == ["full", "fast"]
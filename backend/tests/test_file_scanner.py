@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量文件扫描单元测试
+"""
+
+import pytest
+import os
+import shutil
+import time
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import BaseModel
+from app.models.data_overview import DataOverview
+from app.crawler import file_scanner
+from app.crawler.file_scanner import FileScanner
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    BaseModel.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """root/a/x.txt、root/a/y.txt、root/b/z.txt"""
+    root = tmp_path / "root"
+    for rel in ("a/x.txt", "a/y.txt", "b/z.txt"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"内容 {rel}", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def scanner(tree, tmp_path):
+    scanner = FileScanner()
+    scanner.scan_path = tree
+    scanner.checkpoint_dir = str(tmp_path / "checkpoints")
+    scanner.batch_size = 2
+    yield scanner
+    scanner.executor.shutdown()
+
+
+def touch(path, content):
+    """改写文件并把 mtime 推后，避免文件系统时间精度导致漏判"""
+    path.write_text(content, encoding="utf-8")
+    mtime = time.time() + 10
+    os.utime(path, (mtime, mtime))
+
+
+def node(session, path):
+    return session.query(DataOverview).filter(DataOverview.file_path == str(path)).one()
+
+
+class TestIncrementalScan:
+    """测试按 mtime/size 清单比对的增量扫描"""
+
+    def test_initial_scan(self, scanner, db_session, tree):
+        """测试首次扫描全部为新增，父节点ID和内容指纹已写入"""
+        changes = scanner.scan_filesystem(db_session)["changes"]
+        assert (changes["added"], changes["modified"], changes["removed"]) == (6, 0, 0)
+        files = {node(db_session, tree / rel).id for rel in ("a/x.txt", "a/y.txt", "b/z.txt")}
+        assert set(changes["added_file_ids"]) == files
+        assert set(changes["document_ids"]) == files
+        assert changes["resumed"] is False
+
+        x = node(db_session, tree / "a" / "x.txt")
+        assert x.parent_id == node(db_session, tree / "a").id
+        assert x.content_hash is not None
+        assert node(db_session, tree).parent_id is None
+
+    def test_rescan_without_changes(self, scanner, db_session):
+        """测试内容未变时重新扫描不产生变更"""
+        scanner.scan_filesystem(db_session)
+        changes = scanner.scan_filesystem(db_session)["changes"]
+        assert (changes["added"], changes["modified"], changes["removed"]) == (0, 0, 0)
+        assert changes["unchanged"] == 6
+        assert changes["document_ids"] == []
+
+    def test_modify_delete_add(self, scanner, db_session, tree):
+        """测试修改、删除、新增后重新扫描得到对应的变更集并软删除消失的节点"""
+        scanner.scan_filesystem(db_session)
+        x, y, z, b = (node(db_session, tree / rel) for rel in ("a/x.txt", "a/y.txt", "b/z.txt", "b"))
+        ids = {"x": x.id, "y": y.id, "z": z.id, "b": b.id}
+
+        touch(tree / "a" / "x.txt", "修改后的内容")
+        (tree / "a" / "y.txt").unlink()
+        shutil.rmtree(tree / "b")
+        (tree / "a" / "w.txt").write_text("新文件", encoding="utf-8")
+
+        changes = scanner.scan_filesystem(db_session)["changes"]
+        w = node(db_session, tree / "a" / "w.txt")
+        assert changes["added_file_ids"] == [w.id]
+        assert changes["modified_file_ids"] == [ids["x"]]
+        assert set(changes["removed_file_ids"]) == {ids["y"], ids["z"]}
+        # y.txt、文件夹 b 及其下的 z.txt
+        assert changes["removed"] == 3
+        assert set(changes["document_ids"]) == {w.id, ids["x"]}
+
+        db_session.expire_all()
+        for key in ("y", "z", "b"):
+            assert db_session.get(DataOverview, ids[key]).is_deleted is True
+        assert db_session.get(DataOverview, ids["x"]).is_deleted is False
+
+    def test_restored_path_counts_as_added(self, scanner, db_session, tree):
+        """测试软删除后重新出现的文件复用原记录，按新增处理"""
+        scanner.scan_filesystem(db_session)
+        y_id = node(db_session, tree / "a" / "y.txt").id
+        (tree / "a" / "y.txt").unlink()
+        scanner.scan_filesystem(db_session)
+
+        touch(tree / "a" / "y.txt", "恢复")
+        changes = scanner.scan_filesystem(db_session)["changes"]
+        assert changes["added_file_ids"] == [y_id]
+        db_session.expire_all()
+        assert db_session.get(DataOverview, y_id).is_deleted is False
+        assert db_session.query(DataOverview).filter(DataOverview.file_path == str(tree / "a" / "y.txt")).count() == 1
+
+    def test_resume_from_checkpoint(self, scanner, db_session, tree, monkeypatch):
+        """测试扫描中断后从检查点继续，已写入的节点不会重复插入"""
+        scanner.checkpoint_interval = 0
+        original_save = file_scanner.ScanCheckpoint.save
+
+        def interrupted_save(self, *args, **kwargs):
+            original_save(self, *args, **kwargs)
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(file_scanner.ScanCheckpoint, "save", interrupted_save)
+        with pytest.raises(KeyboardInterrupt):
+            scanner.scan_filesystem(db_session)
+        db_session.rollback()
+        monkeypatch.setattr(file_scanner.ScanCheckpoint, "save", original_save)
+        # 根目录列举完成后中断：根目录及 a、b 两个文件夹已提交
+        assert db_session.query(DataOverview).count() == 3
+
+        changes = scanner.scan_filesystem(db_session)["changes"]
+        assert changes["resumed"] is True
+        assert changes["added"] == 6
+        assert len(changes["added_file_ids"]) == 3
+        assert db_session.query(DataOverview).count() == 6
+        assert not os.listdir(scanner.checkpoint_dir)
+
+    def test_full_rescan_ignores_checkpoint(self, scanner, db_session):
+        """测试不恢复时忽略检查点，重新比对整棵树"""
+        scanner.scan_filesystem(db_session)
+        changes = scanner.scan_filesystem(db_session, resume=False)["changes"]
+        assert changes["resumed"] is False
+        assert changes["unchanged"] == 6
+
+
+class TestSyncPaths:
+    """测试只同步指定路径"""
+
+    def test_sync_paths(self, scanner, db_session, tree):
+        """测试按路径同步修改、删除和新增，不处理其他路径"""
+        scanner.scan_filesystem(db_session)
+        x_id = node(db_session, tree / "a" / "x.txt").id
+        y_id = node(db_session, tree / "a" / "y.txt").id
+
+        touch(tree / "a" / "x.txt", "修改")
+        (tree / "a" / "y.txt").unlink()
+        (tree / "b" / "n.txt").write_text("新文件", encoding="utf-8")
+        (tree / "b" / "z.txt").unlink()
+
+        changes = scanner.sync_paths(db_session, [
+            str(tree / "a" / "x.txt"), str(tree / "a" / "y.txt"), str(tree / "b" / "n.txt")
+        ])
+        n = node(db_session, tree / "b" / "n.txt")
+        assert changes.added_file_ids == [n.id]
+        assert changes.modified_file_ids == [x_id]
+        assert changes.removed_file_ids == [y_id]
+        assert n.parent_id == node(db_session, tree / "b").id
+
+        db_session.expire_all()
+        assert db_session.get(DataOverview, y_id).is_deleted is True
+        # 未列入同步的 z.txt 保持原状，留给下次完整扫描处理
+        assert node(db_session, tree / "b" / "z.txt").is_deleted is False
+
+    def test_sync_removed_folder(self, scanner, db_session, tree):
+        """测试同步已删除的文件夹时连同子树一起软删除"""
+        scanner.scan_filesystem(db_session)
+        z_id = node(db_session, tree / "b" / "z.txt").id
+        shutil.rmtree(tree / "b")
+
+        changes = scanner.sync_paths(db_session, [str(tree / "b")])
+        assert changes.removed == 2
+        assert changes.removed_file_ids == [z_id]
+        db_session.expire_all()
+        assert node(db_session, tree / "b").is_deleted is True
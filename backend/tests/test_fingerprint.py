@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件内容指纹单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.crawler.fingerprint import (
+    compute_fingerprint, compute_full_hash, is_full_fingerprint
+)
+
+
+class TestFingerprint:
+    """测试内容指纹"""
+
+    BLOCK = 16
+
+    def _write(self, tmp_path, name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+
+    def test_identical_content_same_fingerprint(self, tmp_path):
+        """测试不同路径下的相同内容指纹一致"""
+        data = os.urandom(200)
+        a = self._write(tmp_path, "a.pdf", data)
+        (tmp_path / "copy").mkdir()
+        b = self._write(tmp_path / "copy", "b.pdf", data)
+
+        assert compute_fingerprint(a, block_size=self.BLOCK) == compute_fingerprint(b, block_size=self.BLOCK)
+
+    def test_small_file_hashed_fully(self, tmp_path):
+        """测试小文件直接哈希全部内容"""
+        a = self._write(tmp_path, "a.txt", b"x" * 20)
+        b = self._write(tmp_path, "b.txt", b"x" * 19 + b"y")
+
+        fp_a = compute_fingerprint(a, block_size=self.BLOCK)
+        assert is_full_fingerprint(fp_a)
+        assert fp_a != compute_fingerprint(b, block_size=self.BLOCK)
+
+    def test_sampled_collision_resolved_by_full_hash(self, tmp_path):
+        """测试头尾相同、中间不同的文件需全量哈希区分"""
+        head, tail = b"H" * self.BLOCK, b"T" * self.BLOCK
+        a = self._write(tmp_path, "a.pdf", head + b"middle-1" + tail)
+        b = self._write(tmp_path, "b.pdf", head + b"middle-2" + tail)
+        c = self._write(tmp_path, "c.pdf", head + b"middle-1" + tail)
+
+        fp = compute_fingerprint(a, block_size=self.BLOCK)
+        assert not is_full_fingerprint(fp)
+        assert fp == compute_fingerprint(b, block_size=self.BLOCK)
+        assert compute_full_hash(a) != compute_full_hash(b)
+        assert compute_full_hash(a) == compute_full_hash(c)
+
+    def test_size_is_part_of_fingerprint(self, tmp_path):
+        """测试文件大小参与指纹"""
+        a = self._write(tmp_path, "a.pdf", b"A" * 40)
+        b = self._write(tmp_path, "b.pdf", b"A" * 41)
+        assert compute_fingerprint(a, block_size=self.BLOCK) != compute_fingerprint(b, block_size=self.BLOCK)
+
+    def test_missing_file(self, tmp_path):
+        """测试文件不存在时返回 None"""
+        missing = str(tmp_path / "missing.pdf")
+        assert compute_fingerprint(missing) is None
+        assert compute_full_hash(missing) is None
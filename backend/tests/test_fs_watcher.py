@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件监听单元测试
+"""
+
+import pytest
+import os
+import time
+import threading
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.crawler.fs_watcher import FileSystemWatcher, PathDebouncer
+
+
+class TestPathDebouncer:
+    """测试路径去抖"""
+
+    def test_waits_for_quiet_period(self):
+        """测试静默期内不交付，重复路径合并"""
+        debouncer = PathDebouncer(quiet_period=2.0, max_delay=30.0)
+        debouncer.add("/a/1.pdf", now=0.0)
+        debouncer.add("/a/1.pdf", "/a/2.pdf", now=1.5)
+
+        assert debouncer.pop_ready(now=3.0) == []
+        assert debouncer.pop_ready(now=3.5) == ["/a/1.pdf", "/a/2.pdf"]
+        assert debouncer.pop_ready(now=10.0) == []
+
+    def test_max_delay_under_continuous_events(self):
+        """测试持续有事件时达到最长等待即交付"""
+        debouncer = PathDebouncer(quiet_period=2.0, max_delay=5.0)
+        for i in range(6):
+            debouncer.add(f"/a/{i}.pdf", now=float(i))
+
+        assert len(debouncer.pop_ready(now=5.0)) == 6
+        assert len(debouncer) == 0
+
+    def test_ignores_empty_dest_path(self):
+        """测试非移动事件的空目标路径被忽略"""
+        debouncer = PathDebouncer(quiet_period=0.0)
+        debouncer.add("/a/1.pdf", None, now=0.0)
+        assert debouncer.pop_ready(now=0.0) == ["/a/1.pdf"]
+
+
+class TestPollingWatcher:
+    """测试轮询模式的监听"""
+
+    def test_detects_create_modify_delete(self, tmp_path):
+        """测试新增、修改、删除被按批交付，隐藏文件被忽略"""
+        (tmp_path / "old.txt").write_text("old", encoding="utf-8")
+        (tmp_path / "keep.txt").write_text("keep", encoding="utf-8")
+
+        batches = []
+        delivered = threading.Event()
+
+        def on_changes(paths):
+            batches.append(paths)
+            delivered.set()
+
+        watcher = FileSystemWatcher(
+            str(tmp_path), on_changes,
+            debounce_seconds=0.1, poll_interval=0.1, use_polling=True,
+            skip_name=lambda name: name.startswith('.')
+        )
+        watcher.start()
+        try:
+            (tmp_path / "new.pdf").write_bytes(b"%PDF")
+            (tmp_path / ".hidden.txt").write_text("x", encoding="utf-8")
+            (tmp_path / "keep.txt").write_text("changed content", encoding="utf-8")
+            os.remove(tmp_path / "old.txt")
+            assert delivered.wait(5.0)
+            time.sleep(0.3)
+        finally:
+            watcher.stop()
+
+        changed = {os.path.basename(p) for batch in batches for p in batch}
+        assert changed == {"new.pdf", "keep.txt", "old.txt"}
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 客户端单元测试
+"""
+
+import pytest
+import os
+import json
+import asyncio
+import threading
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+httpx = pytest.importorskip("httpx")
+
+from app.utils.llm_client import LLMClient
+from app.utils.deepseek_retry import DeepSeekRetry, RetryConfig
+
+
+def reply(content="{}"):
+    return {"choices": [{"message": {"content": content}}], "usage": {"prompt_tokens": 3, "completion_tokens": 2}}
+
+
+class TestLLMClient:
+    """测试共享连接池的异步客户端"""
+
+    @pytest.fixture
+    def make_client(self):
+        clients = []
+
+        def make(handler, **kwargs):
+            client = LLMClient("https://api.example.com/", "key", transport=httpx.MockTransport(handler), **kwargs)
+            clients.append(client)
+            return client
+
+        yield make
+        for client in clients:
+            client.close()
+
+    def test_sync_complete(self, make_client):
+        """测试同步调用：请求地址、认证头和请求体"""
+        seen = {}
+
+        def handler(request):
+            seen["url"] = str(request.url)
+            seen["auth"] = request.headers["Authorization"]
+            seen["body"] = json.loads(request.content)
+            return httpx.Response(200, json=reply("结果"))
+
+        client = make_client(handler)
+        data = client.complete({"model": "m", "messages": []})
+        assert data["choices"][0]["message"]["content"] == "结果"
+        assert seen == {
+            "url": "https://api.example.com/v1/chat/completions",
+            "auth": "Bearer key",
+            "body": {"model": "m", "messages": []}
+        }
+
+    def test_retry_on_server_error(self, make_client):
+        """测试 5xx 响应按 DeepSeekRetry 退避重试"""
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(503 if len(calls) < 3 else 200, json=reply())
+
+        retry = DeepSeekRetry(RetryConfig(base_delay=0.01, jitter=False))
+        client = make_client(handler)
+        assert client.complete({}, retry=retry) == reply()
+        assert len(calls) == 3
+        assert retry.get_stats()["retries"] == 2
+        assert client.get_stats()["errors"] == 2
+
+    def test_concurrency_limit(self, make_client):
+        """测试同时在途的请求数不超过上限，多个同步调用方共享同一个事件循环"""
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json=reply())
+
+        client = make_client(handler, max_concurrency=2)
+        futures = [client.submit({}) for _ in range(6)]
+        assert all(f.result(timeout=10) == reply() for f in futures)
+        stats = client.get_stats()
+        assert stats["requests"] == 6
+        assert stats["max_in_flight"] == 2
+
+    def test_acomplete_from_other_loop(self, make_client):
+        """测试在其他事件循环中 await，不阻塞调用方的循环"""
+        client = make_client(lambda request: httpx.Response(200, json=reply("a")))
+
+        async def main():
+            return await asyncio.gather(client.acomplete({}), client.acomplete({}))
+
+        results = asyncio.run(main())
+        assert [r["choices"][0]["message"]["content"] for r in results] == ["a", "a"]
+        assert client._thread is not threading.current_thread()
+
+    def test_rate_limiter_feedback(self, make_client, tmp_path):
+        """测试 429 响应反馈给限流器，成功响应按实际用量校正 token 额度"""
+        from app.utils.rate_limiter import RateLimiter
+        limiter = RateLimiter(str(tmp_path / "limits.db"), rpm=100, tpm=100000,
+                              max_concurrency=8, initial_concurrency=8)
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0.1"}, json={})
+            return httpx.Response(200, json=reply())
+
+        retry = DeepSeekRetry(RetryConfig(base_delay=0.01, jitter=False))
+        client = make_client(handler, limiter=limiter)
+        client.complete({"messages": [{"content": "x" * 400}], "max_tokens": 1000}, retry=retry)
+
+        stats = client.get_stats()["rate_limit"]
+        assert stats["throttled_total"] == 1
+        assert stats["concurrency_limit"] == 4
+        assert stats["in_flight"] == 0
+        # 第二次请求实际只用了 5 个 token，预扣的估算值已退回
+        assert stats["tokens_available"] > 100000 - 1200
+
+    def test_limiter_error_does_not_mask_response_error(self, make_client, tmp_path):
+        """测试交回许可失败时仍抛出请求本身的异常"""
+        from app.utils.rate_limiter import RateLimiter
+        limiter = RateLimiter(str(tmp_path / "limits.db"), rpm=100, tpm=100000)
+
+        def broken_release(permit, **feedback):
+            raise RuntimeError("database is locked")
+
+        limiter.release = broken_release
+        client = make_client(lambda request: httpx.Response(400, json={}), limiter=limiter)
+        with pytest.raises(httpx.HTTPStatusError):
+            client.complete({})
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown 结构提取单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.utils.markdown_sections import parse_sections, strip_inline
+
+
+class TestParseSections:
+    """测试章节划分"""
+
+    def test_headings_split_sections(self):
+        """测试标题划分章节，第一个标题之前的内容为 level 0 章节"""
+        sections = parse_sections("intro\n\n# One {#first}\n\ntext\n\nTwo\n---\n\nmore\n")
+        assert [(s["level"], s["title"], s.get("id", "")) for s in sections] == [(0, "", ""), (1, "One", "first"), (2, "Two", "")]
+        assert sections[1]["content"] == [{"type": "p", "text": "text"}]
+
+    def test_empty_sections_dropped(self):
+        """测试没有内容的章节不输出"""
+        sections = parse_sections("# Empty\n\n## Filled\n\nbody\n")
+        assert [s["title"] for s in sections] == ["Filled"]
+
+    def test_block_types(self):
+        """测试引用、列表和代码块"""
+        md = "# T\n\n> quoted\n> text\n\n- a\n- *b*\n\n```\nprint(1)\n```\n\n1. skipped\n"
+        content = parse_sections(md)[0]["content"]
+        assert content == [
+            {"type": "blockquote", "text": "quoted\ntext"},
+            {"type": "list", "items": ["a", "b"]},
+            {"type": "code", "text": "print(1)"},
+        ]
+
+    def test_tables_and_rules_skipped(self):
+        """测试表格和水平线不计入内容"""
+        content = parse_sections("| a | b |\n|---|---|\n| 1 | 2 |\n\n***\n\nafter\n")[0]["content"]
+        assert content == [{"type": "p", "text": "after"}]
+
+
+class TestStripInline:
+    """测试行内标记"""
+
+    @pytest.mark.parametrize("source, expected", [
+        ("**bold** and _em_", "bold and em"),
+        ("see [docs](http://x) ![img](a.png)", "see docs "),
+        ("`code` <b>tag</b> snake_case_name", "code tag snake_case_name"),
+    ])
+    def test_strip(self, source, expected):
+        assert strip_inline(source) == expected
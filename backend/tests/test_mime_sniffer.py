@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MIME 类型嗅探单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.crawler.mime_sniffer import MimeSniffer, is_expected_mime, sniff_buffer
+
+
+class TestMimeCheck:
+    """测试扩展名与内容类型校验"""
+
+    def test_pdf_signature(self):
+        """测试 PDF 文件头识别"""
+        mime_type = sniff_buffer(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        assert is_expected_mime(".pdf", mime_type)
+
+    def test_html_saved_as_pdf_rejected(self):
+        """测试下载失败保存的网页不能冒充 PDF"""
+        mime_type = sniff_buffer(b"<!DOCTYPE html><html><body>404</body></html>")
+        assert not is_expected_mime(".pdf", mime_type)
+        assert not is_expected_mime(".txt", mime_type)
+
+    def test_plain_text_accepted(self):
+        """测试纯文本与 Markdown"""
+        mime_type = sniff_buffer("# 标题\n\n正文内容".encode("utf-8"))
+        assert is_expected_mime(".md", mime_type)
+        assert is_expected_mime(".txt", mime_type)
+
+    def test_empty_file_rejected(self):
+        """测试空文件"""
+        assert not is_expected_mime(".pdf", sniff_buffer(b""))
+
+    def test_unknown_extension_not_checked(self):
+        """测试未登记的扩展名不做限制"""
+        assert is_expected_mime(".epub", "application/zip")
+
+
+class TestMimeSniffer:
+    """测试带缓存的嗅探器"""
+
+    def test_reads_only_head(self, tmp_path):
+        """测试只读取文件头"""
+        path = tmp_path / "a.pdf"
+        path.write_bytes(b"%PDF-1.4\n" + b"x" * 100000)
+        sniffer = MimeSniffer(sniff_bytes=16)
+        stat = path.stat()
+
+        check = sniffer.check(str(path), ".pdf", stat.st_ino, stat.st_mtime, stat.st_size)
+        assert check.valid
+        assert sniffer.stats["sniffed"] == 1
+
+    def test_cache_by_inode_mtime_size(self, tmp_path):
+        """测试 (inode, mtime, size) 不变时命中缓存"""
+        path = tmp_path / "a.txt"
+        path.write_text("hello", encoding="utf-8")
+        sniffer = MimeSniffer()
+        stat = path.stat()
+
+        first = sniffer.sniff(str(path), stat.st_ino, stat.st_mtime, stat.st_size)
+        second = sniffer.sniff(str(path), stat.st_ino, stat.st_mtime, stat.st_size)
+        assert first == second
+        assert sniffer.stats == {"hits": 1, "sniffed": 1, "errors": 0}
+
+        # 大小变化后重新嗅探
+        sniffer.sniff(str(path), stat.st_ino, stat.st_mtime, stat.st_size + 1)
+        assert sniffer.stats["sniffed"] == 2
+
+    def test_cache_bounded(self, tmp_path):
+        """测试缓存条目数上限"""
+        path = tmp_path / "a.txt"
+        path.write_text("hello", encoding="utf-8")
+        sniffer = MimeSniffer(max_entries=2)
+        for size in range(5):
+            sniffer.sniff(str(path), 1, 0.0, size)
+        assert len(sniffer._cache) == 2
+
+    def test_missing_file(self, tmp_path):
+        """测试文件不存在时返回 None"""
+        sniffer = MimeSniffer()
+        assert sniffer.check(str(tmp_path / "missing.pdf"), ".pdf", 1, 0.0, 10) is None
+        assert sniffer.stats["errors"] == 1
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析引擎（进程池）单元测试
+"""
+
+import pytest
+import os
+import time
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.utils.parse_engine import ParseEngine, ParseTimeoutError
+
+
+class TestParseEngine:
+    """测试解析引擎"""
+
+    @pytest.fixture
+    def engine(self):
+        engine = ParseEngine(max_workers=2, timeout=5)
+        yield engine
+        engine.shutdown()
+
+    def test_runs_in_worker_process(self, engine):
+        """测试任务在工作进程中执行"""
+        assert engine.mode == "process"
+        assert engine.run(os.getpid) != os.getpid()
+        assert engine.get_stats()["completed"] == 1
+
+    def test_errors_propagate(self, engine):
+        """测试工作进程中的异常传回调用方"""
+        with pytest.raises(ValueError):
+            engine.run(int, "not a number")
+        assert engine.get_stats()["failed"] == 1
+
+    def test_timeout_restarts_pool(self, engine):
+        """测试超时后终止并重建进程池"""
+        engine.timeout = 0.5
+        started = time.monotonic()
+        with pytest.raises(ParseTimeoutError):
+            engine.run(time.sleep, 30)
+        assert time.monotonic() - started < 10
+
+        stats = engine.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["pool_restarts"] == 1
+        # 重建后的进程池可以继续使用
+        assert engine.run(abs, -3) == 3
+
+    def test_light_formats_run_inline(self, engine, tmp_path):
+        """测试纯文本类格式在调用线程内提取，不启动进程池"""
+        path = tmp_path / "notes.txt"
+        path.write_text("hello", encoding="utf-8")
+        assert engine.extract(str(path))["text"] == "hello"
+        stats = engine.get_stats()
+        assert stats["inline"] == 1
+        assert stats["completed"] == 1
+        assert engine._pool is None
+
+    def test_large_light_files_use_pool(self, tmp_path):
+        """测试超过大小上限的纯文本文件交给进程池，受超时保护"""
+        engine = ParseEngine(max_workers=1, timeout=5, light_max_bytes=100)
+        try:
+            small = tmp_path / "small.txt"
+            small.write_text("hello", encoding="utf-8")
+            large = tmp_path / "large.md"
+            large.write_text("# 标题\n\n" + "正文 " * 100, encoding="utf-8")
+            assert engine._is_light(str(small))
+            assert not engine._is_light(str(large))
+            assert not engine._is_light(str(tmp_path / "missing.txt"))
+
+            assert engine.extract(str(small))["text"] == "hello"
+            assert "正文" in engine.extract(str(large))["text"]
+            stats = engine.get_stats()
+            assert (stats["inline"], stats["submitted"], stats["completed"]) == (1, 2, 2)
+            assert engine._pool is not None
+        finally:
+            engine.shutdown()
+
+    def test_inline_mode(self):
+        """测试禁用进程池时在调用线程内提取"""
+        engine = ParseEngine(use_processes=False)
+        assert engine.mode == "inline"
+        assert engine.get_stats()["submitted"] == 0
+
+    def test_pdf_backend_stats(self):
+        """测试汇总 PDF 后端的使用次数和耗时"""
+        engine = ParseEngine(use_processes=False)
+        engine._record_extraction({
+            "backend": "pdfplumber",
+            "image_only": False,
+            "probe_seconds": 0.01,
+            "attempts": [
+                {"backend": "pypdf2", "seconds": 0.5, "outcome": "empty"},
+                {"backend": "pdfplumber", "seconds": 1.0, "outcome": "ok"},
+            ]
+        })
+        engine._record_extraction({"backend": None, "image_only": True, "probe_seconds": 0.01, "attempts": []})
+        pdf = engine.get_stats()["pdf"]
+        assert pdf["image_only"] == 1
+        assert pdf["backends"]["pypdf2"] == {"selected": 0, "attempts": 1, "errors": 0, "empty": 1, "seconds": 0.5}
+        assert pdf["backends"]["pdfplumber"]["selected"] == 1
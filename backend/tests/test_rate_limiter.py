@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 调用限流单元测试
+"""
+
+import pytest
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+import multiprocessing
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.utils import rate_limiter
+from app.utils.rate_limiter import RateLimiter
+
+
+def _acquire_in_process(db_path, count, queue):
+    limiter = RateLimiter(db_path, rpm=10, tpm=100000, max_concurrency=100, initial_concurrency=100)
+    granted = 0
+    for _ in range(count):
+        permit, _ = limiter.try_acquire(1)
+        if permit is not None:
+            granted += 1
+            limiter.release(permit, succeeded=True)
+    queue.put(granted)
+
+
+class TestRateLimiter:
+    """测试令牌桶和自适应并发"""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "limits.db")
+
+    def test_request_bucket(self, db_path):
+        """测试每分钟请求数用完后需要等待，等待时间按补充速度计算"""
+        limiter = RateLimiter(db_path, rpm=2, tpm=100000, max_concurrency=10, initial_concurrency=10)
+        assert limiter.try_acquire(10)[0] is not None
+        assert limiter.try_acquire(10)[0] is not None
+        permit, wait = limiter.try_acquire(10)
+        assert permit is None
+        assert 29 < wait <= 30
+
+    def test_token_bucket_settles_actual_usage(self, db_path):
+        """测试按估算值预扣 token，完成后按实际用量退回"""
+        limiter = RateLimiter(db_path, rpm=100, tpm=1000, max_concurrency=10, initial_concurrency=10)
+        permit, _ = limiter.try_acquire(800)
+        assert limiter.try_acquire(300)[0] is None
+        limiter.release(permit, used_tokens=100, succeeded=True)
+        assert limiter.try_acquire(300)[0] is not None
+
+    def test_concurrency_leases(self, db_path):
+        """测试在途请求数达到并发上限时等待，租约过期后自动释放"""
+        limiter = RateLimiter(db_path, rpm=100, tpm=100000, max_concurrency=4, initial_concurrency=1,
+                              lease_seconds=0.2)
+        assert limiter.try_acquire(1)[0] is not None
+        permit, wait = limiter.try_acquire(1)
+        assert permit is None and wait == rate_limiter.CONCURRENCY_POLL_SECONDS
+        time.sleep(0.3)
+        assert limiter.try_acquire(1)[0] is not None
+
+    def test_aimd(self, db_path, monkeypatch):
+        """测试成功时加性增大并发上限，429 时减半并暂停所有请求"""
+        limiter = RateLimiter(db_path, rpm=1000, tpm=100000, max_concurrency=8, initial_concurrency=2)
+        for _ in range(4):
+            permit, _ = limiter.try_acquire(1)
+            limiter.release(permit, succeeded=True)
+        assert limiter.get_stats()["concurrency_limit"] == 3
+
+        permit, _ = limiter.try_acquire(1)
+        limiter.release(permit, throttled=True, retry_after=2)
+        stats = limiter.get_stats()
+        assert stats["concurrency_limit"] == 1
+        assert 1.5 < stats["paused_seconds"] <= 2
+        assert stats["throttled_total"] == 1
+        permit, wait = limiter.try_acquire(1)
+        assert permit is None and wait > 1.5
+
+    def test_slow_responses_decrease(self, db_path):
+        """测试延迟超过目标时减小并发上限（冷却期内只减一次）"""
+        limiter = RateLimiter(db_path, rpm=1000, tpm=100000, max_concurrency=16, initial_concurrency=16,
+                              latency_target=0.01)
+        for _ in range(2):
+            permit, _ = limiter.try_acquire(1)
+            time.sleep(0.02)
+            limiter.release(permit, succeeded=True)
+        assert limiter.get_stats()["concurrency_limit"] == 8
+        assert limiter.get_stats()["process"]["slow"] == 2
+
+    def test_async_acquire_waits(self, db_path):
+        """测试异步等待额度补充后取得许可"""
+        limiter = RateLimiter(db_path, rpm=60, tpm=100000, max_concurrency=10, initial_concurrency=10)
+        for _ in range(60):
+            limiter.release(limiter.try_acquire(0)[0])
+        started = time.monotonic()
+        asyncio.run(limiter.acquire(0))
+        assert 0.5 < time.monotonic() - started < 2
+        assert limiter.get_stats()["process"]["waits"] == 1
+
+    def test_acquire_does_not_block_event_loop(self, db_path):
+        """测试等待其他进程的写锁时事件循环仍在运行"""
+        limiter = RateLimiter(db_path, rpm=60, tpm=100000)
+        holder = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        holder.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.5, lambda: holder.execute("COMMIT")).start()
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.05)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            permit = await limiter.acquire(1)
+            task.cancel()
+            await limiter.arelease(permit, succeeded=True)
+            return ticks
+
+        assert asyncio.run(main()) >= 5
+        holder.close()
+
+    def test_shared_across_processes(self, db_path):
+        """测试多个进程共用同一份额度"""
+        RateLimiter(db_path, rpm=10, tpm=100000)
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_acquire_in_process, args=(db_path, 10, queue)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+        assert sum(queue.get(timeout=5) for _ in processes) == 10
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描检查点单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.crawler.scan_checkpoint import ScanCheckpoint
+
+
+class TestScanCheckpoint:
+    """测试检查点的保存与恢复"""
+
+    def test_save_and_load(self, tmp_path):
+        """测试保存后可以读回前沿和计数"""
+        checkpoint = ScanCheckpoint(str(tmp_path), "/data/library", interval=0)
+        assert checkpoint.load() is None
+
+        checkpoint.save([("/data/library/a", 2), ("/data/library/b", 2)], 7, {"added": 10})
+
+        state = ScanCheckpoint(str(tmp_path), "/data/library").load()
+        assert state["frontier"] == [("/data/library/a", 2), ("/data/library/b", 2)]
+        assert state["completed_dirs"] == 7
+        assert state["stats"] == {"added": 10}
+        assert not os.path.exists(checkpoint.path + ".tmp")
+
+    def test_scoped_by_root_and_scope(self, tmp_path):
+        """测试不同根目录、不同扫描入口的检查点互不影响"""
+        ScanCheckpoint(str(tmp_path), "/a", scope="file_scanner").save([("/a/x", 1)], 1)
+
+        assert ScanCheckpoint(str(tmp_path), "/b", scope="file_scanner").load() is None
+        assert ScanCheckpoint(str(tmp_path), "/a", scope="minimal_server").load() is None
+
+    def test_clear_and_corrupt_file(self, tmp_path):
+        """测试完成后删除检查点，损坏的检查点被忽略"""
+        checkpoint = ScanCheckpoint(str(tmp_path), "/a")
+        checkpoint.save([], 3)
+        checkpoint.clear()
+        assert checkpoint.load() is None
+        checkpoint.clear()
+
+        with open(checkpoint.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        assert checkpoint.load() is None
+
+    def test_due_interval(self, tmp_path):
+        """测试保存间隔"""
+        checkpoint = ScanCheckpoint(str(tmp_path), "/a", interval=3600)
+        assert checkpoint.due() is False
+        assert ScanCheckpoint(str(tmp_path), "/a", interval=0).due() is True
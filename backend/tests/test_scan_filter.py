@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描过滤规则单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.crawler.dir_walker import ParallelDirWalker
+from app.crawler.scan_filter import ScanFilter, compile_rule
+
+
+class TestIgnoreRules:
+    """测试 gitignore 风格规则"""
+
+    def _matches(self, pattern, rel_path):
+        return bool(compile_rule(pattern).regex.match(rel_path))
+
+    def test_unanchored_matches_any_level(self):
+        """测试不含 / 的规则匹配任意层级的名称"""
+        assert self._matches("node_modules", "node_modules")
+        assert self._matches("node_modules", "a/b/node_modules")
+        assert not self._matches("node_modules", "a/node_modules_old")
+
+    def test_anchored_matches_from_root(self):
+        """测试含 / 的规则相对根目录匹配"""
+        assert self._matches("/build", "build")
+        assert not self._matches("/build", "src/build")
+        assert self._matches("docs/*.tmp", "docs/a.tmp")
+        assert not self._matches("docs/*.tmp", "docs/sub/a.tmp")
+
+    def test_double_star(self):
+        """测试 ** 匹配任意层目录"""
+        assert self._matches("**/cache", "cache")
+        assert self._matches("**/cache", "a/b/cache")
+        assert self._matches("archive/**", "archive/2020/x.pdf")
+
+    def test_comments_and_blank_lines(self):
+        """测试空行与注释"""
+        assert compile_rule("") is None
+        assert compile_rule("# comment") is None
+
+
+class TestScanFilter:
+    """测试过滤器"""
+
+    def test_dir_only_rule(self, tmp_path):
+        """测试以 / 结尾的规则只匹配文件夹"""
+        f = ScanFilter(str(tmp_path), exclude=["build/"])
+        assert f.is_excluded(str(tmp_path / "build"), True)
+        assert not f.is_excluded(str(tmp_path / "build"), False)
+
+    def test_negation_last_match_wins(self, tmp_path):
+        """测试 ! 规则取消之前的排除"""
+        f = ScanFilter(str(tmp_path), exclude=["*.log", "!keep.log"])
+        assert f.is_excluded(str(tmp_path / "a.log"), False)
+        assert not f.is_excluded(str(tmp_path / "keep.log"), False)
+
+    def test_include_and_size(self, tmp_path):
+        """测试包含规则与大小范围"""
+        f = ScanFilter(str(tmp_path), include=["*.pdf"], min_file_size=10, max_file_size=100)
+        assert not f.accepts_file(str(tmp_path / "a.txt"))
+        assert f.accepts_file(str(tmp_path / "a.pdf"), 50)
+        assert not f.accepts_file(str(tmp_path / "a.pdf"), 5)
+        assert not f.accepts_file(str(tmp_path / "a.pdf"), 500)
+
+    def test_excluded_path_checks_ancestors(self, tmp_path):
+        """测试被排除目录下的任意路径都视为排除"""
+        f = ScanFilter(str(tmp_path), exclude=["node_modules/"])
+        assert f.is_excluded_path(str(tmp_path / "app" / "node_modules" / "x" / "a.pdf"))
+        assert not f.is_excluded_path(str(tmp_path / "app" / "a.pdf"))
+
+    def test_ignore_file(self, tmp_path):
+        """测试读取根目录下的忽略规则文件"""
+        (tmp_path / ".scanignore").write_text("# 备份\nbackup/\n", encoding="utf-8")
+        f = ScanFilter(str(tmp_path))
+        assert f.load_ignore_file(".scanignore") == 1
+        assert f.is_excluded(str(tmp_path / "backup"), True)
+
+
+class TestWalkerPruning:
+    """测试遍历时的剪枝"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.root = tmp_path / "library"
+        (self.root / "node_modules" / "pkg").mkdir(parents=True)
+        (self.root / "node_modules" / "pkg" / "readme.md").write_text("x", encoding="utf-8")
+        (self.root / "books").mkdir(parents=True)
+        for i in range(5):
+            (self.root / "books" / f"{i}.pdf").write_bytes(b"%PDF" + b"x" * i)
+        (self.root / "books" / "tiny.pdf").write_bytes(b"")
+
+    def _walk(self, scan_filter):
+        walker = ParallelDirWalker(max_workers=2, scan_filter=scan_filter)
+        return [os.path.relpath(e.path, self.root) for e in walker.walk(str(self.root))]
+
+    def test_excluded_subtree_not_listed(self, monkeypatch):
+        """测试被排除的文件夹不会被列举"""
+        listed = []
+        original = ParallelDirWalker._list_dir
+
+        def spy(walker, dir_path, depth):
+            listed.append(os.path.basename(dir_path))
+            return original(walker, dir_path, depth)
+
+        monkeypatch.setattr(ParallelDirWalker, "_list_dir", spy)
+        names = self._walk(ScanFilter(str(self.root), exclude=["node_modules/"]))
+        assert not any(name.startswith("node_modules") for name in names)
+        assert "node_modules" not in listed and "pkg" not in listed
+
+    def test_size_filter_and_files_per_dir_cap(self):
+        """测试大小过滤与每目录文件数上限"""
+        names = self._walk(ScanFilter(
+            str(self.root), exclude=["node_modules/"], min_file_size=1, max_files_per_dir=3
+        ))
+        files = [name for name in names if name.endswith(".pdf")]
+        assert files == [os.path.join("books", f"{i}.pdf") for i in range(3)]
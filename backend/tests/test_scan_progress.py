@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描进度跟踪单元测试
+"""
+
+import pytest
+import os
+
+# 添加项目路径 - 必须在导入 app 之前
+import sys
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.crawler.scan_progress import ScanProgressRegistry, estimate_total_files, format_sse
+
+
+class TestScanProgress:
+    """测试扫描进度与增量事件"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.registry = ScanProgressRegistry(max_finished=2)
+
+    def test_snapshot_excludes_node_lists(self):
+        """测试状态快照不随节点数量增长"""
+        scan = self.registry.create("/data", node_batch_size=10)
+        for i in range(50):
+            scan.add_node({"id": i, "name": f"f{i}.pdf", "type": "file"})
+
+        snapshot = scan.snapshot()
+        assert "files" not in snapshot
+        assert "folders" not in snapshot
+        assert len(scan.files) == 50
+
+    def test_nodes_since_cursor(self):
+        """测试按游标获取增量节点"""
+        scan = self.registry.create("/data", node_batch_size=2)
+        scan.add_node({"id": 1, "type": "file"})
+        scan.add_node({"id": 2, "type": "file"})
+        nodes, cursor = scan.nodes_since(0)
+        assert [n["id"] for n in nodes] == [1, 2]
+
+        scan.add_node({"id": 3, "type": "folder"})
+        scan.finish()
+        nodes, cursor = scan.nodes_since(cursor)
+        assert [n["id"] for n in nodes] == [3]
+        assert scan.snapshot()["status"] == "completed"
+        assert scan.snapshot()["progress"] == 100
+
+    def test_concurrent_scans_isolated(self):
+        """测试并发扫描互不覆盖"""
+        scan_a = self.registry.create("/a")
+        scan_b = self.registry.create("/b")
+        scan_a.update(scanned_files=5)
+
+        assert self.registry.get(scan_a.scan_id).scanned_files == 5
+        assert self.registry.get(scan_b.scan_id).scanned_files == 0
+        assert self.registry.get() is scan_b
+
+    def test_finished_scans_pruned(self):
+        """测试只保留最近的已结束扫描"""
+        scans = [self.registry.create(f"/{i}") for i in range(4)]
+        for scan in scans:
+            scan.finish()
+        self.registry.create("/new")
+
+        assert self.registry.get(scans[0].scan_id) is None
+        assert self.registry.get(scans[3].scan_id) is scans[3]
+
+    def test_format_sse(self):
+        """测试 SSE 消息格式"""
+        message = format_sse("progress", {"progress": 50}, 7)
+        assert message == 'id: 7\nevent: progress\ndata: {"progress": 50}\n\n'
+
+
+class TestEstimateTotalFiles:
+    """测试单遍扫描的总数估算"""
+
+    def test_previous_total_used_until_exceeded(self):
+        """测试沿用上次扫描的文件数"""
+        assert estimate_total_files(10, 2, 5, previous_total=100) == 100
+        assert estimate_total_files(120, 2, 0, previous_total=100) == 120
+
+    def test_extrapolates_frontier(self):
+        """测试按已完成目录的平均文件数外推遍历前沿"""
+        assert estimate_total_files(40, 4, 6) == 100
+        assert estimate_total_files(0, 0, 3) == 0
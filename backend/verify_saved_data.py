@@ -18,6 +18,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.core.database import SessionLocal
 from app.models.data_overview import DataBookDetail
+from app.utils.blob_store import load_deepseek_response, load_full_text
 
 def verify_saved_data():
     """验证数据库中保存的数据"""
@@ -47,8 +48,11 @@ def verify_saved_data():
             print(f"实验流程: {record.experiment_flow}")
             print(f"统计方法: {record.statistical_methods}")
             print(f"结论: {record.conclusion}")
-            print(f"置信度: {record.deepseek_response.get('confidence_score') if record.deepseek_response else 'N/A'}")
-            print(f"全文长度: {len(record.full_text) if record.full_text else 0} 字符")
+            # 原始响应和全文压缩存放在 data_book_blob 表中
+            deepseek_response = load_deepseek_response(db, record.file_id)
+            full_text = load_full_text(db, record.file_id)
+            print(f"置信度: {deepseek_response.get('confidence_score') if deepseek_response else 'N/A'}")
+            print(f"全文长度: {len(full_text) if full_text else 0} 字符")
             print()
             
     finally:
@@ -139,53 +139,84 @@ const KnowledgeTree: React.FC = () => {
     }
   };
 
-  // 查询扫描进度
+  // 处理扫描进度快照
+  const applyScanSnapshot = (scanData: any) => {
+    setScanProgress(scanData.progress || 0);
+    setScanStatus(scanData.status);
+    setScanInfo(scanData);
+
+    // 如果扫描完成，重新加载知识树
+    if (scanData.status === 'completed') {
+      message.success(`扫描完成！共发现 ${scanData.scanned_files} 个文件`);
+      setTimeout(() => {
+        loadKnowledgeTree();
+        setScanTaskId('');
+      }, 1500);
+    } else if (scanData.status === 'error') {
+      message.error('扫描过程中出现错误');
+      console.error('扫描错误:', scanData.errors);
+    }
+  };
+
+  // 查询扫描进度（SSE 不可用时的轮询降级）
   const checkScanProgress = async () => {
     if (scanStatus === 'completed' || scanStatus === 'idle') return;
 
     try {
-      const data = await apiService.getScanStatus();
+      const data = await apiService.getScanStatus(scanTaskId || undefined);
 
       if (data.code === 200) {
-        const scanData = data.data;
-        setScanProgress(scanData.progress || 0);
-        setScanStatus(scanData.status);
-        setScanInfo(scanData);
-
-        // 如果扫描完成，重新加载知识树
-        if (scanData.status === 'completed') {
-          message.success(`扫描完成！共发现 ${scanData.scanned_files} 个文件`);
-          setTimeout(() => {
-            loadKnowledgeTree();
-            setScanTaskId('');
-          }, 1500);
-        } else if (scanData.status === 'error') {
-          message.error('扫描过程中出现错误');
-          console.error('扫描错误:', scanData.errors);
-        }
+        applyScanSnapshot(data.data);
       }
     } catch (error) {
       console.error('查询扫描进度失败:', error);
     }
   };
 
-  // 定时查询扫描进度
+  // 订阅扫描进度事件流，连接失败时降级为定时轮询
   useEffect(() => {
     let interval: NodeJS.Timeout;
+    let source: EventSource | null = null;
 
-    if (scanStatus === 'processing') {
-      // 立即查询一次
+    const startPolling = () => {
+      // 立即查询一次，然后每2s查询一次
       checkScanProgress();
-      // 然后每500ms查询一次，更实时
-      interval = setInterval(checkScanProgress, 500);
+      interval = setInterval(checkScanProgress, 2000);
+    };
+
+    if (scanStatus === 'processing' && scanTaskId) {
+      if (typeof EventSource !== 'undefined') {
+        source = apiService.subscribeScanEvents(scanTaskId);
+        const onSnapshot = (event: MessageEvent) => applyScanSnapshot(JSON.parse(event.data));
+        source.addEventListener('progress', onSnapshot as EventListener);
+        source.addEventListener('finished', ((event: MessageEvent) => {
+          source?.close();
+          onSnapshot(event);
+        }) as EventListener);
+        source.addEventListener('error', ((event: MessageEvent) => {
+          if (event.data) {
+            console.error('扫描错误:', JSON.parse(event.data).message);
+            return;
+          }
+          // 连接错误：关闭事件流，改为轮询
+          source?.close();
+          source = null;
+          startPolling();
+        }) as EventListener);
+      } else {
+        startPolling();
+      }
     }
 
     return () => {
+      if (source) {
+        source.close();
+      }
       if (interval) {
         clearInterval(interval);
       }
     };
-  }, [scanStatus]);
+  }, [scanStatus, scanTaskId]);
 
   // 加载已扫描的文件列表
   const loadScannedFiles = async () => {
@@ -80,9 +80,14 @@ export const apiService = {
     return apiClient.post(`/api/v1/knowledge-tree/scan?folder_path=${encodeURIComponent(folderPath)}`);
   },
 
-  // 获取扫描进度
-  async getScanStatus(): Promise<any> {
-    return apiClient.get('/api/v1/knowledge-tree/scan/status');
+  // 获取扫描进度（只返回计数摘要）
+  async getScanStatus(scanId?: string): Promise<any> {
+    return apiClient.get('/api/v1/knowledge-tree/scan/status', { params: scanId ? { scan_id: scanId } : {} });
+  },
+
+  // 订阅扫描进度事件流（SSE）
+  subscribeScanEvents(scanId: string): EventSource {
+    return new EventSource(`${API_BASE_URL}/api/v1/knowledge-tree/scan/${scanId}/events`);
   },
 
   // 搜索文档